@@ -0,0 +1,124 @@
+"""Admission control: bounded in-flight work, load shedding and request deadlines."""
+
+# Standard library
+import collections
+import contextlib
+import threading
+import time
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed because the wait queue is full or too slow."""
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request's client deadline passed before inference started."""
+
+
+class AdmissionController:
+    """Limit concurrent inferences and shed excess load quickly.
+
+    Up to ``max_in_flight`` requests run at once and up to ``max_queue`` more
+    wait for a slot; anything beyond that is rejected immediately instead of
+    adding latency for everyone. Requests carry an optional absolute deadline
+    (Unix time) and are dropped once it has passed.
+
+    Args:
+        max_in_flight (int): Concurrent requests allowed past admission.
+        max_queue (int): Requests allowed to wait for a slot.
+        queue_timeout (float): Longest wait for a slot in seconds, or None.
+    """
+
+    def __init__(self, max_in_flight=8, max_queue=32, queue_timeout=None):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._waiting = 0
+        self._counters = collections.Counter()
+
+    @contextlib.contextmanager
+    def admit(self, deadline=None):
+        """Hold an in-flight slot for the duration of the ``with`` block.
+
+        Args:
+            deadline (float): Unix time after which the request is useless.
+
+        Raises:
+            Overloaded: If the queue is full or no slot freed up in time.
+            DeadlineExceeded: If the deadline passed before a slot was free.
+        """
+        self._acquire(deadline)
+        completed = False
+        try:
+            yield self
+            completed = True
+        finally:
+            with self._condition:
+                self._in_flight -= 1
+                if completed:
+                    self._counters["served"] += 1
+                self._condition.notify()
+
+    def check_deadline(self, deadline):
+        """Raise DeadlineExceeded if ``deadline`` has already passed.
+
+        Args:
+            deadline (float): Unix time, or None for no deadline.
+        """
+        if deadline is not None and time.time() >= deadline:
+            with self._condition:
+                self._counters["expired"] += 1
+            raise DeadlineExceeded("Request deadline passed before inference started")
+
+    def stats(self):
+        """Return current occupancy and shed/expired/served counters.
+
+        Returns:
+            dict: Limits, in-flight and waiting counts, and counters.
+        """
+        with self._condition:
+            return {
+                "max_in_flight": self.max_in_flight,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "waiting": self._waiting,
+                "served": self._counters["served"],
+                "shed": self._counters["shed"],
+                "expired": self._counters["expired"],
+            }
+
+    def _acquire(self, deadline):
+        self.check_deadline(deadline)
+        with self._condition:
+            if self._in_flight < self.max_in_flight:
+                self._in_flight += 1
+                return
+            if self._waiting >= self.max_queue:
+                self._counters["shed"] += 1
+                raise Overloaded("Server is at capacity")
+            self._waiting += 1
+            try:
+                admitted = self._condition.wait_for(
+                    lambda: self._in_flight < self.max_in_flight, self._wait_budget(deadline)
+                )
+            finally:
+                self._waiting -= 1
+            if admitted:
+                self._in_flight += 1
+                return
+        if deadline is not None and time.time() >= deadline:
+            self.check_deadline(deadline)
+        with self._condition:
+            self._counters["shed"] += 1
+        raise Overloaded("Timed out waiting for capacity")
+
+    def _wait_budget(self, deadline):
+        budgets = [self.queue_timeout]
+        if deadline is not None:
+            budgets.append(max(0.0, deadline - time.time()))
+        budgets = [b for b in budgets if b is not None]
+        return min(budgets) if budgets else None
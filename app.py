@@ -1,17 +1,350 @@
 """Main Flask application for image recognition."""
 
+# Standard library
+import hmac
+import importlib
+import json
+import os
+import threading
+import time
+import zipfile
+
 # Third-party
-from flask import Flask, render_template, request
+import numpy as np
+from flask import Flask, Response, abort, g, jsonify, render_template, request, send_from_directory
 from PIL import UnidentifiedImageError
+from werkzeug.exceptions import RequestEntityTooLarge
 
 # Your own modules
-from model import preprocess_image, predict_result, load_model
+from admission import AdmissionController, DeadlineExceeded, Overloaded
+from backends import backend_for_path
+from batching import BatchScheduler
+from cache import PredictionCache, content_key
+from cascade import CascadeModel
+from embeddings import EmbeddingIndex, Embedder
+from frames import FrameSmoother, classify_frames
+from jobs import JobRunner, JobStore, SubmissionTooLarge, expand_uploads
+from loading import ModelLoader, ModelNotReady
+from metrics import MetricsRegistry
+from model import preprocess_image, preprocess_images, predict_proba, predict_result, load_model
+from preprocessing import INPUT_SIZE, MAX_DECODED_PIXELS, ImageTooLarge, decode_image, normalize_into, open_image
+from request_profiler import RequestProfiler
+from registry import ModelRegistry
+from runtime import apply_runtime_config, configure_tensorflow
+from workers import WorkerPool
 
 # Instantiating Flask app
 app = Flask(__name__)
 
-# Load the model once at startup
-model = load_model("digit_model.h5")
+# Defaults, overridable through FLASK_-prefixed environment variables
+app.config.update(
+    MODEL_PATH="digit_model.h5",
+    MODEL_LOADING="background",
+    MODEL_LOAD_TIMEOUT=120.0,
+    MODEL_VERSIONS={},
+    MODEL_ACTIVE_VERSION="default",
+    MODEL_CANDIDATE_VERSION=None,
+    MODEL_CANDIDATE_SHARE=0.0,
+    MODEL_MEMORY_BUDGET_MB=None,
+    MODEL_ADMIN_TOKEN=None,
+    INFERENCE_BACKEND=None,
+    INFERENCE_WORKERS=0,
+    INFERENCE_INTRA_OP_THREADS=None,
+    INFERENCE_INTER_OP_THREADS=None,
+    INFERENCE_CPUS=None,
+    TUNING_FILE="tuned_config.json",
+    COMPILED_INFERENCE=True,
+    ENGINE_BUCKETS=None,
+    BATCH_MAX_SIZE=16,
+    BATCH_MAX_WAIT_MS=2.0,
+    BATCH_CHUNK_SIZE=32,
+    CACHE_MAX_ENTRIES=1024,
+    CACHE_TTL_SECONDS=None,
+    ADMISSION_MAX_IN_FLIGHT=8,
+    ADMISSION_MAX_QUEUE=32,
+    ADMISSION_QUEUE_TIMEOUT=None,
+    ADMISSION_RETRY_AFTER=1,
+    DEADLINE_HEADER="X-Request-Deadline",
+    API_TOP_K=3,
+    MAX_CONTENT_LENGTH=32 * 1024 * 1024,
+    MAX_IMAGE_PIXELS=MAX_DECODED_PIXELS,
+    EMBEDDING_INDEX_PATH="embedding_index",
+    SIMILAR_TOP_K=5,
+    FRAME_BATCH_SIZE=8,
+    FRAME_MAX_COUNT=256,
+    FRAME_SMOOTHING=0.5,
+    FRAME_CONFIDENCE=0.9,
+    FRAME_STABLE_COUNT=3,
+    CASCADE_MODEL_PATH=None,
+    CASCADE_THRESHOLD=0.9,
+    PROFILE_DIR="profiles",
+    PROFILE_SAMPLE_RATE=0.0,
+    PROFILE_HEADER="X-Profile",
+    PROFILE_MAX_DUMPS=100,
+    JOB_DB_PATH="jobs.sqlite3",
+    JOB_UPLOAD_DIR="job_uploads",
+    JOB_WORKERS=1,
+    JOB_BATCH_SIZE=32,
+    JOB_MAX_IMAGES=10000,
+    JOB_MAX_BYTES=1024 * 1024 * 1024,
+    JOB_LEASE_SECONDS=300.0,
+    JOB_POLL_INTERVAL=1.0,
+)
+app.config.from_prefixed_env()
+# Settings written by tune_threads.py apply unless overridden by the environment
+if app.config.from_file(app.config["TUNING_FILE"], load=json.load, silent=True):
+    app.config.from_prefixed_env()
+
+# Thread pools and CPU pinning must be in place before TensorFlow starts
+apply_runtime_config(
+    app.config["INFERENCE_INTRA_OP_THREADS"], app.config["INFERENCE_INTER_OP_THREADS"], app.config["INFERENCE_CPUS"]
+)
+
+# MODEL_PATH is registered under this name; other versions come from MODEL_VERSIONS
+DEFAULT_VERSION = "default"
+
+# Penultimate-layer embeddings of the default in-process Keras model, for /similar
+embedder = Embedder(buckets=(1,))
+
+
+def compile_keras(model):
+    """Wrap a Keras model in the warmed-up inference engine when COMPILED_INFERENCE is set."""
+    if not app.config["COMPILED_INFERENCE"]:
+        return model
+    engine = importlib.import_module("engine")
+    return engine.InferenceEngine(model, app.config["ENGINE_BUCKETS"] or engine.DEFAULT_BUCKETS)
+
+
+def load_first_stage(loader):
+    """Load the cheap cascade model named by CASCADE_MODEL_PATH in this process."""
+    path = app.config["CASCADE_MODEL_PATH"]
+    with loader.phase("cascade"):
+        configure_tensorflow()
+        first = load_model(path)
+        if backend_for_path(path) == "keras":
+            first = compile_keras(first)
+    return first
+
+
+def build_serving_model(version, loader):
+    """Import TensorFlow, load a model version and prepare it for serving.
+
+    Each version gets its own batch scheduler, so concurrent requests share
+    forward passes only with requests routed to the same version. With
+    CASCADE_MODEL_PATH set, the first stage always runs in this process and
+    escalates to the full model, in-process or in the worker pool.
+    """
+    backend = app.config["INFERENCE_BACKEND"] or backend_for_path(version.path)
+    workers = app.config["INFERENCE_WORKERS"]
+    model = None
+    if workers:
+        # Each worker process imports TensorFlow and loads its own model, and
+        # the scheduler feeds them in parallel
+        with loader.phase("workers"):
+            serving_model = WorkerPool(
+                version.path, workers,
+                max_batch_size=max(app.config["BATCH_CHUNK_SIZE"], app.config["BATCH_MAX_SIZE"]),
+                backend=backend, compiled=app.config["COMPILED_INFERENCE"],
+                timeout=app.config["MODEL_LOAD_TIMEOUT"],
+            ).start()
+        # Every worker holds its own copy, which the memory budget must count
+        version.nbytes = workers * os.path.getsize(version.path)
+    else:
+        with loader.phase("import"):
+            configure_tensorflow()
+        with loader.phase("load"):
+            model = load_model(version.path, backend)
+        serving_model = model
+        if backend == "keras" and app.config["COMPILED_INFERENCE"]:
+            # Traced, warmed-up functions replace model.predict's per-call setup
+            with loader.phase("warmup"):
+                serving_model = compile_keras(model)
+    if app.config["CASCADE_MODEL_PATH"]:
+        # A cheap first stage answers confident images; the rest escalate
+        serving_model = CascadeModel(load_first_stage(loader), serving_model, app.config["CASCADE_THRESHOLD"])
+    if model is not None and backend == "keras":
+        version.nbytes = sum(int(np.prod(w.shape)) * w.dtype.size for w in model.weights)
+        if version.name == DEFAULT_VERSION:
+            with loader.phase("embeddings"):
+                embedder.attach(model)
+    version.scheduler = BatchScheduler(
+        serving_model, app.config["BATCH_MAX_SIZE"], app.config["BATCH_MAX_WAIT_MS"], num_threads=workers or 1,
+    )
+    return serving_model
+
+
+# Repeated uploads of identical bytes skip decoding and inference; keys start
+# with the version name, and a version's entries are dropped whenever it is
+# (re)loaded, so a replaced model file never answers from the old model's results
+prediction_cache = PredictionCache(app.config["CACHE_MAX_ENTRIES"], app.config["CACHE_TTL_SECONDS"])
+
+
+def version_loaded(version):
+    """Drop cached predictions made by an earlier load of ``version``."""
+    prediction_cache.invalidate(f"{version.name}:")
+
+
+def version_unloaded(version):
+    """Release the embedder's reference to the default model once it is evicted."""
+    if version.name == DEFAULT_VERSION:
+        embedder.detach()
+
+
+# Named model versions: activating another one loads and warms it up in the
+# background and swaps it in without interrupting requests, a candidate can
+# take a share of traffic, and idle versions over the memory budget are unloaded
+registry = ModelRegistry(
+    build_serving_model,
+    None if app.config["MODEL_MEMORY_BUDGET_MB"] is None else int(app.config["MODEL_MEMORY_BUDGET_MB"] * 2**20),
+    on_loaded=version_loaded,
+    on_unloaded=version_unloaded,
+)
+registry.register(DEFAULT_VERSION, app.config["MODEL_PATH"])
+for version_name, version_path in app.config["MODEL_VERSIONS"].items():
+    registry.register(version_name, version_path)
+
+# TensorFlow import and model load happen off the import path: "background"
+# starts them now on a thread, "lazy" on the first request, "eager" blocks here
+registry.activate(
+    app.config["MODEL_ACTIVE_VERSION"],
+    background=app.config["MODEL_LOADING"] == "background",
+    start=app.config["MODEL_LOADING"] != "lazy",
+)
+if app.config["MODEL_CANDIDATE_VERSION"]:
+    registry.set_candidate(app.config["MODEL_CANDIDATE_VERSION"], app.config["MODEL_CANDIDATE_SHARE"])
+
+# Excess concurrent predictions wait in a bounded queue or are shed
+admission = AdmissionController(
+    app.config["ADMISSION_MAX_IN_FLIGHT"], app.config["ADMISSION_MAX_QUEUE"], app.config["ADMISSION_QUEUE_TIMEOUT"]
+)
+
+# Stored image embeddings, memory-mapped when an index has been built
+embedding_index = (
+    EmbeddingIndex.load(app.config["EMBEDDING_INDEX_PATH"])
+    if os.path.isdir(app.config["EMBEDDING_INDEX_PATH"]) else None
+)
+
+# Sampled /prediction requests, and those sending PROFILE_HEADER with the admin
+# token, are profiled with cProfile and saved to PROFILE_DIR
+profiler = RequestProfiler(
+    app.config["PROFILE_DIR"], app.config["PROFILE_SAMPLE_RATE"], app.config["MODEL_ADMIN_TOKEN"],
+    app.config["PROFILE_MAX_DUMPS"],
+)
+
+
+# Large submissions are queued in SQLite and classified in batches by background
+# threads; the queue survives restarts. The store and runner are created by
+# job_service on the first job request, so importing the app creates no files
+# and starts no threads
+job_services = {}
+job_services_lock = threading.Lock()
+
+
+# Per-stage latency histograms and request/error counters for /metrics
+STAGE_SECONDS = "prediction_stage_seconds"
+REQUESTS_TOTAL = "prediction_requests_total"
+ERRORS_TOTAL = "prediction_errors_total"
+METRIC_ROUTES = ("/prediction", "/api/predict", "/api/predict/frames", "/prediction/batch", "/similar")
+metrics = MetricsRegistry()
+metrics.describe(STAGE_SECONDS, "Time spent in each stage of a prediction request.")
+metrics.describe(REQUESTS_TOTAL, "Prediction requests by route and HTTP status.")
+metrics.describe(ERRORS_TOTAL, "Failed prediction requests by route and exception type.")
+
+
+def count_error(route, error):
+    """Count a failed prediction request under the exception's type name."""
+    metrics.inc(ERRORS_TOTAL, route=route, type=type(error).__name__)
+
+
+def get_model():
+    """Return the active serving model, waiting up to MODEL_LOAD_TIMEOUT for it to load."""
+    return registry.get(app.config["MODEL_LOAD_TIMEOUT"])
+
+
+def retry_after():
+    """Return the Retry-After header sent with 503 responses."""
+    return {"Retry-After": str(app.config["ADMISSION_RETRY_AFTER"])}
+
+
+def request_deadline():
+    """Return the client deadline (Unix time in seconds) from DEADLINE_HEADER, or None.
+
+    A header that is not a number aborts the request with 400.
+    """
+    value = request.headers.get(app.config["DEADLINE_HEADER"])
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return abort(400, f"Invalid {app.config['DEADLINE_HEADER']} header, expected Unix time in seconds.")
+
+
+def api_request_options():
+    """Return the upload, ``k`` and whether probabilities are wanted for /api/predict.
+
+    Raises:
+        ValueError: If the file is missing or ``k`` is not a positive integer.
+    """
+    upload = request.files.get("file")
+    if upload is None:
+        raise ValueError("No file uploaded under the 'file' field.")
+    try:
+        k = int(request.values.get("k", app.config["API_TOP_K"]))
+    except ValueError as e:
+        raise ValueError("k must be an integer.") from e
+    if k < 1:
+        raise ValueError("k must be at least 1.")
+    with_probabilities = request.values.get("probabilities", "1").lower() not in ("0", "false", "off")
+    return upload, k, with_probabilities
+
+
+def similar_unavailable():
+    """Return why /similar cannot serve requests, or None if it can."""
+    if embedding_index is None:
+        return "No embedding index has been built."
+    backend = app.config["INFERENCE_BACKEND"] or backend_for_path(app.config["MODEL_PATH"])
+    if backend != "keras" or app.config["INFERENCE_WORKERS"]:
+        return "Embeddings need an in-process Keras model."
+    return None
+
+
+def similar_request_options():
+    """Return the upload and ``k`` for /similar.
+
+    Raises:
+        ValueError: If the file is missing or ``k`` is not a positive integer.
+    """
+    upload = request.files.get("file")
+    if upload is None:
+        raise ValueError("No file uploaded under the 'file' field.")
+    try:
+        k = int(request.values.get("k", app.config["SIMILAR_TOP_K"]))
+    except ValueError as e:
+        raise ValueError("k must be an integer.") from e
+    if k < 1:
+        raise ValueError("k must be at least 1.")
+    return upload, k
+
+
+def frame_request_options():
+    """Return the upload, frame stride and frame limit for /api/predict/frames.
+
+    Raises:
+        ValueError: If the file is missing or a parameter is not a positive integer.
+    """
+    upload = request.files.get("file")
+    if upload is None:
+        raise ValueError("No file uploaded under the 'file' field.")
+    try:
+        stride = int(request.values.get("stride", 1))
+        max_frames = min(int(request.values.get("max_frames", app.config["FRAME_MAX_COUNT"])),
+                         app.config["FRAME_MAX_COUNT"])
+    except ValueError as e:
+        raise ValueError("stride and max_frames must be integers.") from e
+    if stride < 1 or max_frames < 1:
+        raise ValueError("stride and max_frames must be at least 1.")
+    return upload, stride, max_frames
 
 
 # Home route
@@ -21,25 +354,564 @@ def main():
     return render_template("index.html")
 
 
+def classify_upload(version, upload, deadline):
+    """Preprocess and classify one /prediction upload with ``version`` under admission control."""
+    with admission.admit(deadline):
+        version.get(app.config["MODEL_LOAD_TIMEOUT"])
+        with metrics.time(STAGE_SECONDS, route="/prediction", stage="preprocess"):
+            processed_img = preprocess_image(upload, max_pixels=app.config["MAX_IMAGE_PIXELS"])
+        # Drop the request if decoding used up the client's remaining time
+        admission.check_deadline(deadline)
+        with metrics.time(STAGE_SECONDS, route="/prediction", stage="inference"):
+            if g.get("profile") is not None:
+                # The batch scheduler predicts on its own thread, out of the profiler's sight
+                return int(predict_result(version.get(app.config["MODEL_LOAD_TIMEOUT"]), processed_img))
+            return version.scheduler.predict(processed_img)
+
+
 # Prediction route
 @app.route('/prediction', methods=['POST'])
 def predict_image_file():
     """Process uploaded image, run prediction, and render results."""
     if request.method == 'POST':
+        deadline = request_deadline()
         try:
-            processed_img = preprocess_image(request.files['file'].stream)
-            prediction_result = predict_result(model, processed_img)
-            return render_template("result.html", predictions=str(prediction_result))
+            # Werkzeug enforces MAX_CONTENT_LENGTH while parsing and spools
+            # large files to disk, so the upload is hashed and decoded from
+            # its stream rather than read into memory
+            with metrics.time(STAGE_SECONDS, route="/prediction", stage="parse"):
+                upload = request.files['file'].stream
+            with registry.acquire() as version:
+                # Each version caches separately, so a candidate never answers for the active model
+                key = f"{version.name}:{content_key(upload)}"
+                # Profiled requests always take the full decode and inference path
+                prediction_result = prediction_cache.get(key) if g.get("profile") is None else None
+                if prediction_result is None:
+                    prediction_result = classify_upload(version, upload, deadline)
+                    prediction_cache.put(key, prediction_result)
+            with metrics.time(STAGE_SECONDS, route="/prediction", stage="render"):
+                return render_template("result.html", predictions=str(prediction_result))
 
-        except (FileNotFoundError, UnidentifiedImageError) as e:
+        except (FileNotFoundError, UnidentifiedImageError, ImageTooLarge) as e:
             # Catch specific exceptions instead of all exceptions
+            count_error("/prediction", e)
             error = f"File cannot be processed. Error: {e}"
-            return render_template("result.html", err=error)
+            # Images whose header declares too many pixels are never decoded
+            return render_template("result.html", err=error), 413 if isinstance(e, ImageTooLarge) else 200
+
+        except ModelNotReady as e:
+            count_error("/prediction", e)
+            return render_template("result.html", err=str(e)), 503, retry_after()
+
+        except Overloaded as e:
+            count_error("/prediction", e)
+            return render_template("result.html", err=str(e)), 503, retry_after()
+
+        except DeadlineExceeded as e:
+            count_error("/prediction", e)
+            return render_template("result.html", err=str(e)), 504
 
     # Fallback return to satisfy Pylint inconsistent-return warning
     return render_template("index.html")
 
 
+# JSON prediction route
+@app.route('/api/predict', methods=['POST'])
+def predict_json():
+    """Classify one uploaded file and return the top-k classes and stage timings as JSON.
+
+    Query or form parameters: ``k`` (number of classes returned, default
+    API_TOP_K) and ``probabilities`` ('0' or 'false' to return class labels
+    only).
+    """
+    deadline = request_deadline()
+    try:
+        upload, k, with_probabilities = api_request_options()
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
+    timings = {}
+    try:
+        with admission.admit(deadline), registry.acquire() as version:
+            version.get(app.config["MODEL_LOAD_TIMEOUT"])
+            started = time.perf_counter()
+            img = open_image(upload.stream, max_pixels=app.config["MAX_IMAGE_PIXELS"])
+            timings["decode"] = time.perf_counter() - started
+            started = time.perf_counter()
+            processed_img = normalize_into(decode_image(img), np.empty((1, *INPUT_SIZE, 3), dtype=np.float32))
+            timings["preprocess"] = time.perf_counter() - started
+            admission.check_deadline(deadline)
+            started = time.perf_counter()
+            probabilities = version.scheduler.submit(processed_img, probabilities=True).result()
+            timings["inference"] = time.perf_counter() - started
+    except (OSError, UnidentifiedImageError) as e:
+        count_error("/api/predict", e)
+        return jsonify(error=f"File cannot be processed. Error: {e}"), 413 if isinstance(e, ImageTooLarge) else 400
+    except ModelNotReady as e:
+        count_error("/api/predict", e)
+        return jsonify(error=str(e)), 503, retry_after()
+    except Overloaded as e:
+        count_error("/api/predict", e)
+        return jsonify(error=str(e)), 503, retry_after()
+    except DeadlineExceeded as e:
+        count_error("/api/predict", e)
+        return jsonify(error=str(e)), 504
+
+    top = np.argsort(probabilities)[::-1][:k]
+    response = {"label": int(top[0]), "classes": top.tolist(), "version": version.name}
+    if with_probabilities:
+        response["probabilities"] = [round(float(p), 6) for p in probabilities[top]]
+    for stage, seconds in timings.items():
+        metrics.observe(STAGE_SECONDS, seconds, route="/api/predict", stage=stage)
+    response["timings_ms"] = {stage: round(seconds * 1000, 3) for stage, seconds in timings.items()}
+    return jsonify(response)
+
+
+# Multi-frame prediction route
+@app.route('/api/predict/frames', methods=['POST'])
+def predict_frames_json():
+    """Classify the frames of an animated GIF or multi-page TIFF and return JSON.
+
+    Query or form parameters: ``stride`` (classify every n-th frame, default
+    1) and ``max_frames`` (capped at FRAME_MAX_COUNT). Frames are classified
+    in batches of FRAME_BATCH_SIZE and decoding stops once the smoothed
+    prediction has been confident and unchanged for FRAME_STABLE_COUNT frames.
+    """
+    deadline = request_deadline()
+    try:
+        upload, stride, max_frames = frame_request_options()
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
+    smoother = FrameSmoother(
+        app.config["FRAME_SMOOTHING"], app.config["FRAME_CONFIDENCE"], app.config["FRAME_STABLE_COUNT"]
+    )
+    try:
+        with admission.admit(deadline), registry.acquire() as version:
+            result = classify_frames(
+                version.get(app.config["MODEL_LOAD_TIMEOUT"]), upload.stream,
+                stride=stride, batch_size=app.config["FRAME_BATCH_SIZE"], max_frames=max_frames,
+                smoother=smoother, max_pixels=app.config["MAX_IMAGE_PIXELS"],
+            )
+    except (OSError, UnidentifiedImageError) as e:
+        count_error("/api/predict/frames", e)
+        return jsonify(error=f"File cannot be processed. Error: {e}"), 413 if isinstance(e, ImageTooLarge) else 400
+    except (ModelNotReady, Overloaded) as e:
+        count_error("/api/predict/frames", e)
+        return jsonify(error=str(e)), 503, retry_after()
+    except DeadlineExceeded as e:
+        count_error("/api/predict/frames", e)
+        return jsonify(error=str(e)), 504
+    return jsonify({**result, "version": version.name})
+
+
+def classify_batch(version, images, deadline=None):
+    """Classify ``images`` (paths or streams) with ``version`` in chunks of BATCH_CHUNK_SIZE.
+
+    Returns:
+        tuple: One result dict per image, in input order (``label`` and
+        ``probabilities``, or ``error``), and the exceptions by index.
+
+    Raises:
+        ModelNotReady: If the model is not loaded within MODEL_LOAD_TIMEOUT.
+        DeadlineExceeded: If ``deadline`` passed while the images were decoded.
+    """
+    serving_model = version.get(app.config["MODEL_LOAD_TIMEOUT"])
+    batch, indices, errors = preprocess_images(images, app.config["MAX_IMAGE_PIXELS"])
+    admission.check_deadline(deadline)
+    probabilities = predict_proba(serving_model, batch, app.config["BATCH_CHUNK_SIZE"])
+    results = [None] * len(images)
+    for row, i in enumerate(indices):
+        results[i] = {"label": int(np.argmax(probabilities[row])), "probabilities": probabilities[row].tolist()}
+    for i, e in errors.items():
+        results[i] = {"error": f"File cannot be processed. Error: {e}"}
+    return results, errors
+
+
+# Batch prediction route
+@app.route('/prediction/batch', methods=['POST'])
+def predict_image_files():
+    """Classify every uploaded file in one request and return JSON results in input order."""
+    files = request.files.getlist('files') or request.files.getlist('file')
+    if not files:
+        return jsonify(error="No files uploaded under the 'files' field."), 400
+
+    deadline = request_deadline()
+    try:
+        with admission.admit(deadline), registry.acquire() as version:
+            results, errors = classify_batch(version, [f.stream for f in files], deadline)
+    except (ModelNotReady, Overloaded) as e:
+        count_error("/prediction/batch", e)
+        return jsonify(error=str(e)), 503, retry_after()
+    except DeadlineExceeded as e:
+        count_error("/prediction/batch", e)
+        return jsonify(error=str(e)), 504
+
+    for e in errors.values():
+        count_error("/prediction/batch", e)
+    results = [{"filename": f.filename, **result} for f, result in zip(files, results)]
+    return jsonify(results=results, version=version.name)
+
+
+def classify_job_images(paths):
+    """Classify one batch of queued job images, recording the version that served them."""
+    with registry.acquire() as version:
+        results, _ = classify_batch(version, paths)
+    return [{**result, "version": version.name} if "error" not in result else result for result in results]
+
+
+def job_service(create=True):
+    """Return the job store and runner, opening the store and starting the runner on first use.
+
+    Args:
+        create (bool): Whether to create the queue when its database does
+            not exist yet; if not, ``(None, None)`` is returned instead, so
+            read-only routes leave no files or threads behind.
+    """
+    with job_services_lock:
+        if not job_services:
+            if not create and not os.path.exists(app.config["JOB_DB_PATH"]):
+                return None, None
+            store = JobStore(app.config["JOB_DB_PATH"], app.config["JOB_UPLOAD_DIR"], app.config["JOB_LEASE_SECONDS"])
+            runner = JobRunner(
+                store, classify_job_images, app.config["JOB_BATCH_SIZE"], app.config["JOB_WORKERS"],
+                app.config["JOB_POLL_INTERVAL"],
+            )
+            runner.start()
+            job_services.update(store=store, runner=runner)
+        return job_services["store"], job_services["runner"]
+
+
+# Job submission route
+@app.route("/jobs", methods=["POST"])
+def submit_job():
+    """Queue the uploaded images, or the images inside uploaded zip archives, as one job."""
+    files = request.files.getlist("files") or request.files.getlist("file")
+    if not files:
+        return jsonify(error="No files uploaded under the 'files' field."), 400
+    uploads = expand_uploads(
+        [(f.filename, f.stream) for f in files], app.config["JOB_MAX_IMAGES"], app.config["MAX_CONTENT_LENGTH"],
+        app.config["JOB_MAX_BYTES"],
+    )
+    job_store, job_runner = job_service()
+    try:
+        job_id = job_store.submit(uploads, app.config["MAX_CONTENT_LENGTH"], app.config["JOB_MAX_BYTES"])
+    except SubmissionTooLarge as e:
+        return jsonify(error=str(e)), 413
+    except zipfile.BadZipFile as e:
+        return jsonify(error=f"Archive cannot be read. Error: {e}"), 400
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    job_runner.wake()
+    return jsonify(job_store.status(job_id)), 202, {"Location": f"/jobs/{job_id}"}
+
+
+# Job status route
+@app.route("/jobs/<job_id>")
+def job_status(job_id):
+    """Return the progress, throughput and failure count of a job."""
+    job_store = job_service(create=False)[0]
+    status = job_store.status(job_id) if job_store is not None else None
+    if status is None:
+        return jsonify(error="No such job."), 404
+    return jsonify(status)
+
+
+# Job results route
+@app.route("/jobs/<job_id>/results")
+def job_results(job_id):
+    """Return results finished since the ``after`` cursor, or stream them as NDJSON with ``stream=1``."""
+    job_store = job_service(create=False)[0]
+    if job_store is None or job_store.status(job_id) is None:
+        return jsonify(error="No such job."), 404
+    try:
+        after = int(request.args.get("after", 0))
+        limit = int(request.args["limit"]) if "limit" in request.args else None
+    except ValueError:
+        return jsonify(error="after and limit must be integers."), 400
+    if request.args.get("stream") in ("1", "true"):
+        return Response(stream_job_results(job_store, job_id, after), mimetype="application/x-ndjson")
+    results, cursor = job_store.results(job_id, after, limit)
+    return jsonify(results=results, next=cursor, status=job_store.status(job_id)["status"])
+
+
+def stream_job_results(job_store, job_id, after):
+    """Yield a job's results as JSON lines as they finish, until the job is done or deleted."""
+    while True:
+        status = job_store.status(job_id)
+        results, after = job_store.results(job_id, after)
+        for result in results:
+            yield json.dumps(result) + "\n"
+        if status is None or status["finished"] is not None:
+            # The status was read before the results, so nothing finished in between is missed
+            return
+        if not results:
+            time.sleep(app.config["JOB_POLL_INTERVAL"])
+
+
+# Job deletion route
+@app.route("/jobs/<job_id>", methods=["DELETE"])
+def delete_job(job_id):
+    """Delete a job, its results and its queued images."""
+    job_store = job_service(create=False)[0]
+    if job_store is None or not job_store.delete(job_id):
+        return jsonify(error="No such job."), 404
+    return "", 204
+
+
+# Nearest-neighbour route
+@app.route('/similar', methods=['POST'])
+def similar_images():
+    """Return the stored images whose embeddings are closest to the uploaded file's.
+
+    Query or form parameter ``k``: number of neighbours returned (default
+    SIMILAR_TOP_K). Scores are cosine similarities, best first.
+    """
+    unavailable = similar_unavailable()
+    if unavailable:
+        return jsonify(error=unavailable), 404
+    deadline = request_deadline()
+    try:
+        upload, k = similar_request_options()
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
+    try:
+        # The index holds embeddings of the default version's model, pinned
+        # here so it cannot be evicted mid-request
+        with admission.admit(deadline), registry.acquire(DEFAULT_VERSION) as version:
+            if version is not registry.active and not version.ready:
+                # An evicted default version reloads in the background, not on this request
+                version.loader.start(background=True)
+                raise ModelNotReady("The default model version is loading.")
+            version.get(app.config["MODEL_LOAD_TIMEOUT"])
+            processed_img = preprocess_image(upload.stream, max_pixels=app.config["MAX_IMAGE_PIXELS"])
+            admission.check_deadline(deadline)
+            indices, scores = embedding_index.search(embedder.embed(processed_img), k)
+    except (OSError, UnidentifiedImageError) as e:
+        count_error("/similar", e)
+        return jsonify(error=f"File cannot be processed. Error: {e}"), 413 if isinstance(e, ImageTooLarge) else 400
+    except (ModelNotReady, Overloaded) as e:
+        count_error("/similar", e)
+        return jsonify(error=str(e)), 503, retry_after()
+    except DeadlineExceeded as e:
+        count_error("/similar", e)
+        return jsonify(error=str(e)), 504
+
+    neighbours = [
+        {"id": embedding_index.ids[i], "score": round(float(score), 6)} for i, score in zip(indices[0], scores[0])
+    ]
+    return jsonify(neighbours=neighbours)
+
+
+@app.errorhandler(RequestEntityTooLarge)
+def request_too_large(error):
+    """Reject uploads over MAX_CONTENT_LENGTH, detected while the body streams in."""
+    message = f"Upload exceeds the limit of {app.config['MAX_CONTENT_LENGTH']} bytes."
+    if request.path == "/prediction":
+        return render_template("result.html", err=message), error.code
+    return jsonify(error=message), error.code
+
+
+@app.before_request
+def start_profile():
+    """Start profiling a /prediction request that is sampled or sends the profile header."""
+    if request.url_rule is not None and request.url_rule.rule == "/prediction":
+        if profiler.wanted(request.headers.get(app.config["PROFILE_HEADER"])):
+            g.profile = profiler.start()
+
+
+@app.after_request
+def save_profile(response):
+    """Save the request's profile and name the dump in the X-Profile-Dump header."""
+    profile = g.pop("profile", None)
+    if profile is not None:
+        response.headers["X-Profile-Dump"] = profiler.stop(profile, request.path)
+    return response
+
+
+@app.after_request
+def count_request(response):
+    """Count prediction requests by route and status code."""
+    if request.url_rule is not None and request.url_rule.rule in METRIC_ROUTES:
+        metrics.inc(REQUESTS_TOTAL, route=request.url_rule.rule, status=response.status_code)
+    return response
+
+
+@app.teardown_request
+def count_unhandled_error(error):
+    """Count exceptions that escaped a prediction route."""
+    if error is not None and request.url_rule is not None and request.url_rule.rule in METRIC_ROUTES:
+        count_error(request.url_rule.rule, error)
+
+
+@app.teardown_request
+def discard_profile(_error):
+    """Stop the profiler of a request that failed before its profile was saved."""
+    profile = g.pop("profile", None)
+    if profile is not None:
+        profiler.discard(profile)
+
+
+# Prometheus metrics route
+@app.route("/metrics")
+def prometheus_metrics():
+    """Return stage latency histograms and request/error counters in Prometheus text format."""
+    return metrics.render(), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+
+
+# Liveness route
+@app.route("/healthz")
+def healthz():
+    """Report that the process is up, failing only if the active model cannot load."""
+    status = {"version": registry.active.name, **registry.active.loader.status()}
+    return jsonify(status), 500 if status["state"] == ModelLoader.FAILED else 200
+
+
+# Readiness route
+@app.route("/readyz")
+def readyz():
+    """Report whether the active model is loaded and requests can be served."""
+    status = {"version": registry.active.name, **registry.active.loader.status()}
+    if registry.active.ready:
+        return jsonify(status), 200
+    return jsonify(status), 503, retry_after()
+
+
+# Batching statistics route
+@app.route("/stats/batching")
+def batching_stats():
+    """Return batch-size and queue-wait statistics of the active version's batch scheduler."""
+    scheduler = registry.active.scheduler
+    if scheduler is None:
+        return jsonify(error="Model is still loading."), 503, retry_after()
+    return jsonify(scheduler.stats())
+
+
+# Worker pool statistics route
+@app.route("/stats/workers")
+def worker_stats():
+    """Return per-process request and restart counts when INFERENCE_WORKERS is set."""
+    serving_model = registry.active.loader.model
+    if isinstance(serving_model, CascadeModel):
+        serving_model = serving_model.full
+    if not isinstance(serving_model, WorkerPool):
+        return jsonify(error="Inference worker processes are not enabled."), 404
+    return jsonify(serving_model.stats())
+
+
+def require_admin():
+    """Abort unless the request carries ``Authorization: Bearer <MODEL_ADMIN_TOKEN>``.
+
+    Model administration is disabled (403) while MODEL_ADMIN_TOKEN is unset.
+    """
+    token = app.config["MODEL_ADMIN_TOKEN"]
+    if not token:
+        abort(403, "Model administration is disabled; set MODEL_ADMIN_TOKEN to enable it.")
+    if not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        abort(401, "Missing or invalid admin token.")
+
+
+# Model registry route
+@app.route("/models")
+def models():
+    """Return the active and candidate versions and the status of every registered version."""
+    return jsonify(registry.status())
+
+
+# Model registration route
+@app.route("/models", methods=["POST"])
+def register_model():
+    """Register the model file ``path`` as version ``name`` (form fields) without loading it."""
+    require_admin()
+    name, path = request.values.get("name"), request.values.get("path")
+    if not name or not path or not os.path.isfile(path):
+        return jsonify(error="A version name and the path of an existing model file are required."), 400
+    try:
+        registry.register(name, path)
+    except ValueError as e:
+        return jsonify(error=str(e)), 409
+    return jsonify(registry.status()), 201
+
+
+# Model activation route
+@app.route("/models/<name>/activate", methods=["POST"])
+def activate_model(name):
+    """Load and warm up version ``name`` in the background, then swap it in as the active version."""
+    require_admin()
+    try:
+        registry.activate(name)
+    except KeyError as e:
+        return jsonify(error=str(e.args[0])), 404
+    return jsonify(registry.status()), 202
+
+
+# Candidate routing route
+@app.route("/models/<name>/candidate", methods=["POST"])
+def candidate_model(name):
+    """Send the ``share`` (0 to 1) of traffic to version ``name``; a share of 0 stops candidate routing."""
+    require_admin()
+    try:
+        share = float(request.values.get("share", app.config["MODEL_CANDIDATE_SHARE"]))
+        registry.set_candidate(name if share > 0 else None, share)
+    except KeyError as e:
+        return jsonify(error=str(e.args[0])), 404
+    except ValueError:
+        return jsonify(error="share must be a number between 0 and 1."), 400
+    return jsonify(registry.status()), 202
+
+
+# Profile dump listing route
+@app.route("/profiles")
+def profiles():
+    """Return the names of the saved request profiles, oldest first."""
+    require_admin()
+    return jsonify(profiles=profiler.dumps())
+
+
+# Profile dump download route
+@app.route("/profiles/<name>")
+def profile_dump(name):
+    """Download one saved request profile for ``python -m pstats`` or snakeviz."""
+    require_admin()
+    return send_from_directory(os.path.abspath(profiler.dump_dir), name, as_attachment=True)
+
+
+# Cascade statistics route
+@app.route("/stats/cascade")
+def cascade_stats():
+    """Return the escalation rate of the active version when CASCADE_MODEL_PATH is set."""
+    serving_model = registry.active.loader.model
+    if not isinstance(serving_model, CascadeModel):
+        return jsonify(error="The model cascade is not enabled."), 404
+    return jsonify(serving_model.stats())
+
+
+# Job queue statistics route
+@app.route("/stats/jobs")
+def jobs_stats():
+    """Return processed batch, image and error counts of the job workers and the queue depth."""
+    job_runner = job_service(create=False)[1]
+    if job_runner is None:
+        # No job was ever queued, so nothing has been processed
+        return jsonify(workers=0, batches=0, images=0, errors=0, last_error=None, queued=0)
+    return jsonify(job_runner.stats())
+
+
+# Admission control statistics route
+@app.route("/stats/admission")
+def admission_stats():
+    """Return in-flight, queued, shed, expired and served request counts."""
+    return jsonify(admission.stats())
+
+
+# Prediction cache statistics route
+@app.route("/stats/cache")
+def cache_stats():
+    """Return hit, miss and eviction counters of the prediction cache."""
+    return jsonify(prediction_cache.stats())
+
+
 # Driver code
 if __name__ == "__main__":
     # Run the Flask app on port 9000 in debug mode
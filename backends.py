@@ -0,0 +1,101 @@
+"""Inference backends behind model.load_model.
+
+Every backend returns an object with ``predict(images)`` mapping a
+(N, 224, 224, 3) float32 batch to (N, num_classes) probabilities, so
+predict_result, the batch scheduler and the batch endpoint work unchanged.
+"""
+
+# Standard library
+import importlib
+import os
+import threading
+
+# Third-party
+import numpy as np
+
+# Your own modules
+from runtime import configured_intra_op_threads
+
+# Backend used for each model file extension when none is configured
+BACKEND_BY_EXTENSION = {
+    ".h5": "keras",
+    ".keras": "keras",
+    ".npz": "keras",
+    ".tflite": "tflite",
+}
+
+
+def backend_for_path(path):
+    """Return the backend name implied by a model file's extension.
+
+    Args:
+        path (str): Model file path.
+
+    Returns:
+        str: Backend name, defaulting to 'keras' for unknown extensions.
+    """
+    return BACKEND_BY_EXTENSION.get(os.path.splitext(str(path))[1].lower(), "keras")
+
+
+class TFLiteModel:
+    """Run a '.tflite' flatbuffer through the TensorFlow Lite interpreter.
+
+    The interpreter is not thread-safe, so calls are serialized. Its input
+    tensor is resized only when the batch size changes.
+
+    Args:
+        path (str): Path to the '.tflite' file.
+        num_threads (int): Interpreter threads, or None for the configured
+            intra-op thread count (see runtime) or TFLite's default.
+    """
+
+    def __init__(self, path, num_threads=None):
+        tf = importlib.import_module("tensorflow")
+        if num_threads is None:
+            num_threads = configured_intra_op_threads()
+        self.path = path
+        self._interpreter = tf.lite.Interpreter(model_path=str(path), num_threads=num_threads)
+        self._interpreter.allocate_tensors()
+        self._input = self._interpreter.get_input_details()[0]
+        self._output = self._interpreter.get_output_details()[0]
+        self._batch_size = int(self._input["shape"][0])
+        self._lock = threading.Lock()
+        self.input_shape = (None, *self._input["shape"][1:])
+
+    def predict(self, images):
+        """Predict class probabilities for a batch of preprocessed images.
+
+        Args:
+            images (np.ndarray): Preprocessed images of shape (N, 224, 224, 3).
+
+        Returns:
+            np.ndarray: Class probabilities of shape (N, num_classes).
+        """
+        images = np.asarray(images, dtype=np.float32)
+        with self._lock:
+            if len(images) != self._batch_size:
+                self._interpreter.resize_tensor_input(self._input["index"], list(images.shape))
+                self._interpreter.allocate_tensors()
+                self._input = self._interpreter.get_input_details()[0]
+                self._output = self._interpreter.get_output_details()[0]
+                self._batch_size = len(images)
+            self._interpreter.set_tensor(self._input["index"], images)
+            self._interpreter.invoke()
+            return self._interpreter.get_tensor(self._output["index"])
+
+
+def load_keras(path):
+    """Load a Keras model from '.h5', '.keras' or a save_fast_model '.npz'."""
+    keras_models = importlib.import_module("keras.models")
+    if str(path).endswith(".npz"):
+        with np.load(path) as archive:
+            model = keras_models.model_from_json(str(archive["config"]))
+            model.set_weights([archive[f"w{i}"] for i in range(int(archive["num_weights"]))])
+        return model
+    return keras_models.load_model(path, compile=False)
+
+
+BACKENDS = {
+    "keras": load_keras,
+    "tflite": TFLiteModel,
+}
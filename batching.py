@@ -0,0 +1,163 @@
+"""Dynamic micro-batching of concurrent prediction requests."""
+
+# Standard library
+import collections
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+# Third-party
+import numpy as np
+
+
+class BatchScheduler:
+    """Group preprocessed images from concurrent callers into shared forward passes.
+
+    Callers submit single images and block on their own result. A background
+    worker takes the first pending image, keeps collecting until either
+    ``max_batch_size`` images are gathered or ``max_wait_ms`` has elapsed, runs
+    one ``model.predict`` over the stacked batch and hands each caller its own
+    argmax.
+
+    Args:
+        model: Loaded model exposing ``predict(batch)``.
+        max_batch_size (int): Largest number of images per forward pass.
+        max_wait_ms (float): Longest time the oldest request waits for company.
+        stats_window (int): Number of recent queue waits kept for percentiles.
+        num_threads (int): Batches dispatched concurrently, e.g. one per
+            worker process when the model is a WorkerPool.
+    """
+
+    def __init__(self, model, max_batch_size=16, max_wait_ms=2.0, stats_window=10000, num_threads=1):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms must not be negative")
+        if num_threads < 1:
+            raise ValueError("num_threads must be at least 1")
+        self.model = model
+        self.max_batch_size = int(max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self.num_threads = int(num_threads)
+        self._workers = []
+        self._closed = False
+        self._batch_sizes = collections.Counter()
+        self._waits = collections.deque(maxlen=stats_window)
+
+    def submit(self, image, probabilities=False):
+        """Queue one preprocessed image and return a future for its label.
+
+        Args:
+            image (np.ndarray): Array of shape (1, 224, 224, 3) or (224, 224, 3).
+            probabilities (bool): Resolve to the image's class probability
+                vector instead of its label.
+
+        Returns:
+            concurrent.futures.Future: Resolves to the predicted class label,
+            or to a (num_classes,) array when ``probabilities`` is set.
+        """
+        if self._closed:
+            raise RuntimeError("BatchScheduler is closed")
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((np.asarray(image).reshape(1, 224, 224, 3), future, time.perf_counter(), probabilities))
+        return future
+
+    def predict(self, image, timeout=None):
+        """Predict the class label of one image through the shared batch.
+
+        Args:
+            image (np.ndarray): Preprocessed image (from preprocess_image).
+            timeout (float): Seconds to wait for the result, or None to block.
+
+        Returns:
+            int: Predicted class label as an integer.
+        """
+        return self.submit(image).result(timeout)
+
+    def close(self):
+        """Stop the worker after the images already queued have been served."""
+        self._closed = True
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+
+    def stats(self):
+        """Return batch-size and queue-wait statistics collected so far.
+
+        Returns:
+            dict: Request and batch counts, the batch-size histogram and
+            queue-wait percentiles in milliseconds.
+        """
+        with self._lock:
+            sizes = dict(self._batch_sizes)
+            waits = np.array(self._waits, dtype=np.float64) * 1000.0
+        batches = sum(sizes.values())
+        requests = sum(size * count for size, count in sizes.items())
+        if waits.size:
+            p50, p95, p99 = np.percentile(waits, [50, 95, 99])
+            wait_ms = {"p50": p50, "p95": p95, "p99": p99, "max": waits.max()}
+        else:
+            wait_ms = {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "requests": requests,
+            "batches": batches,
+            "mean_batch_size": requests / batches if batches else 0.0,
+            "batch_size_histogram": dict(sorted(sizes.items())),
+            "queue_wait_ms": {key: round(float(value), 3) for key, value in wait_ms.items()},
+        }
+
+    def _ensure_worker(self):
+        with self._lock:
+            while len(self._workers) < self.num_threads:
+                worker = threading.Thread(target=self._run, name=f"batch-scheduler-{len(self._workers)}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def _run(self):
+        stop = False
+        while not stop:
+            batch, stop = self._collect()
+            if batch:
+                self._dispatch(batch)
+
+    def _collect(self):
+        # Returns the batch and whether this thread received its stop sentinel
+        first = self._queue.get()
+        if first is None:
+            return [], True
+        batch = [first]
+        deadline = first[2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _dispatch(self, batch):
+        started = time.perf_counter()
+        with self._lock:
+            self._batch_sizes[len(batch)] += 1
+            self._waits.extend(started - item[2] for item in batch)
+        try:
+            pred = self.model.predict(np.concatenate([item[0] for item in batch], axis=0))
+            labels = np.argmax(pred, axis=-1)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            # Surface the failure to every caller instead of killing the worker
+            for item in batch:
+                item[1].set_exception(e)
+            return
+        for (_, future, _, probabilities), row, label in zip(batch, pred, labels):
+            future.set_result(np.asarray(row) if probabilities else label)
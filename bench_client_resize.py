@@ -0,0 +1,132 @@
+"""Benchmark uploading phone-sized photos against uploads pre-resized in the browser.
+
+Test images are enlarged to a phone camera resolution and saved as JPEGs to
+stand in for original uploads. The pre-resized variant repeats what
+static/js/image_upload.js does before submitting: scale to 224x224 and
+re-encode as JPEG. Each variant is posted to /api/predict through the Flask
+test client with the prediction cache disabled, and the script reports the
+upload size, request latency, server CPU time per request and the server's
+decode and preprocess timings, plus how often both variants get the same label.
+
+The same pair is also built from phone-style rotated photos: sensor pixels
+stored sideways with an EXIF orientation tag. The browser resizes the stored
+pixels without applying the tag, as the server decodes them, so the rotated
+original and its resized copy should get the same label too.
+
+Usage:
+    python bench_client_resize.py [--images test_images] [--count 20]
+        [--photo-size 4032x3024] [--quality 95] [--repeats 3]
+"""
+
+# Standard library
+import argparse
+import json
+import os
+import statistics
+import time
+from io import BytesIO
+
+# Third-party
+from PIL import Image
+
+# Your own modules
+from datasets import list_labelled_images
+from preprocessing import INPUT_SIZE
+
+EXIF_ORIENTATION = 0x0112
+# Stored pixels are turned 90 degrees counter-clockwise; viewers rotate them back
+ROTATED_ORIENTATION = 6
+
+
+def encode_jpeg(img, quality, exif=b""):
+    """Return ``img`` encoded as JPEG bytes, with ``exif`` tags if given."""
+    buf = BytesIO()
+    img.save(buf, format="JPEG", quality=quality, exif=exif)
+    return buf.getvalue()
+
+
+def make_payloads(paths, photo_size, quality):
+    """Return the original-photo and browser-resized upload bytes of every image, upright and rotated."""
+    payloads = {"original": [], "resized": [], "rotated": [], "rot-resized": []}
+    exif = Image.Exif()
+    exif[EXIF_ORIENTATION] = ROTATED_ORIENTATION
+    for path in paths:
+        with Image.open(path) as img:
+            photo = img.convert("RGB").resize(photo_size, Image.Resampling.BICUBIC)
+        sensor = photo.transpose(Image.Transpose.ROTATE_90)
+        payloads["original"].append(encode_jpeg(photo, 90))
+        payloads["rotated"].append(encode_jpeg(sensor, 90, exif))
+        # The canvas in image_upload.js draws with high-quality smoothing, which
+        # browsers implement as a filtered downscale much like bicubic; the
+        # canvas JPEG carries no EXIF, so the rotated copy keeps sensor pixels
+        payloads["resized"].append(encode_jpeg(photo.resize(INPUT_SIZE, Image.Resampling.BICUBIC), quality))
+        payloads["rot-resized"].append(encode_jpeg(sensor.resize(INPUT_SIZE, Image.Resampling.BICUBIC), quality))
+    return payloads
+
+
+def measure(client, payloads, repeats):
+    """Post every payload ``repeats`` times and summarize sizes, latency and CPU time."""
+    latencies, server_ms, labels = [], [], []
+    cpu_started = time.process_time()
+    for _ in range(repeats):
+        labels = []
+        for payload in payloads:
+            started = time.perf_counter()
+            response = client.post(
+                "/api/predict", data={"file": (BytesIO(payload), "upload.jpeg")}, content_type="multipart/form-data"
+            )
+            latencies.append((time.perf_counter() - started) * 1000)
+            body = response.get_json()
+            if response.status_code != 200:
+                raise RuntimeError(f"/api/predict failed with status {response.status_code}: {body}")
+            labels.append(body["label"])
+            server_ms.append(body["timings_ms"]["decode"] + body["timings_ms"]["preprocess"])
+    cpu_ms = (time.process_time() - cpu_started) * 1000
+    return {
+        "upload_kib": statistics.median(len(p) for p in payloads) / 1024,
+        "latency_ms": statistics.median(latencies),
+        "p95_ms": statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0],
+        "cpu_ms": cpu_ms / len(latencies),
+        "decode_preprocess_ms": statistics.median(server_ms),
+        "labels": labels,
+    }
+
+
+def main():
+    """Build both payload sets, measure each and print the comparison."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", default="test_images", help="Directory of <label>/<image> files")
+    parser.add_argument("--count", type=int, default=20, help="Number of images to upload")
+    parser.add_argument("--photo-size", default="4032x3024", help="Original photo size as WxH")
+    parser.add_argument("--quality", type=int, default=95, help="JPEG quality of the pre-resized upload")
+    parser.add_argument("--repeats", type=int, default=3, help="Passes over the images per variant")
+    parser.add_argument("--model", default="digit_model.h5", help="Model file served by the app")
+    args = parser.parse_args()
+
+    os.environ["FLASK_MODEL_PATH"] = json.dumps(args.model)
+    os.environ["FLASK_MODEL_LOADING"] = json.dumps("eager")
+    os.environ["FLASK_CACHE_MAX_ENTRIES"] = "0"
+    from app import app  # pylint: disable=import-outside-toplevel
+
+    paths = [path for path, _ in list_labelled_images(args.images)][:args.count]
+    photo_size = tuple(int(v) for v in args.photo_size.split("x"))
+    payloads = make_payloads(paths, photo_size, args.quality)
+
+    results = {}
+    with app.test_client() as client:
+        # One untimed request so lazy initialization is not measured
+        measure(client, payloads["resized"][:1], 1)
+        for variant, data in payloads.items():
+            results[variant] = measure(client, data, args.repeats)
+
+    print(f"{'upload':<12}{'KiB':>10}{'median ms':>11}{'p95 ms':>9}{'CPU ms':>9}{'decode+prep ms':>16}")
+    for variant, r in results.items():
+        print(f"{variant:<12}{r['upload_kib']:>10.1f}{r['latency_ms']:>11.2f}{r['p95_ms']:>9.2f}"
+              f"{r['cpu_ms']:>9.2f}{r['decode_preprocess_ms']:>16.2f}")
+    for original, resized in (("original", "resized"), ("rotated", "rot-resized")):
+        agreement = statistics.fmean(a == b for a, b in zip(results[original]["labels"], results[resized]["labels"]))
+        print(f"Label agreement between {original} and {resized} uploads: {agreement:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Benchmark building, saving, mapping and querying the embedding index.
+
+Random vectors of the model's embedding dimension stand in for stored
+images. For each index size the script measures adding all vectors,
+saving, loading memory-mapped, and top-k query throughput for single
+queries and for batched queries.
+
+Usage:
+    python bench_embeddings.py [--sizes 10000,100000,1000000] [--dim 64]
+        [--k 5] [--queries 256] [--batch-size 64]
+"""
+
+# Standard library
+import argparse
+import os
+import tempfile
+import time
+
+# Third-party
+import numpy as np
+
+# Your own modules
+from embeddings import EmbeddingIndex
+
+
+def timed(fn, *args, **kwargs):
+    """Return ``fn``'s result and the seconds it took."""
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def bench_size(size, dim, args, directory):
+    """Build, persist and query one index of ``size`` random vectors."""
+    rng = np.random.default_rng(size)
+    vectors = rng.standard_normal((size, dim), dtype=np.float32)
+    queries = rng.standard_normal((args.queries, dim), dtype=np.float32)
+    index = EmbeddingIndex(dim, capacity=size)
+    _, build = timed(index.add, vectors, [str(i) for i in range(size)])
+    path = os.path.join(directory, f"index_{size}")
+    _, save = timed(index.save, path)
+    loaded, load = timed(EmbeddingIndex.load, path)
+
+    # Touch the mapped pages once so queries below measure search, not disk reads
+    loaded.search(queries[:1], args.k)
+    _, single = timed(lambda: [loaded.search(query[np.newaxis], args.k) for query in queries])
+    _, batched = timed(loaded.search, queries, args.k, args.batch_size)
+    return {
+        "build_ms": build * 1000,
+        "save_ms": save * 1000,
+        "load_ms": load * 1000,
+        "single_qps": len(queries) / single,
+        "batched_qps": len(queries) / batched,
+    }
+
+
+def main():
+    """Run the benchmark for every size and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="Comma-separated index sizes")
+    parser.add_argument("--dim", type=int, default=64, help="Embedding dimension")
+    parser.add_argument("--k", type=int, default=5, help="Neighbours per query")
+    parser.add_argument("--queries", type=int, default=256, help="Queries per measurement")
+    parser.add_argument("--batch-size", type=int, default=64, help="Queries per matrix product when batched")
+    args = parser.parse_args()
+
+    print(f"{'vectors':>10}{'build ms':>11}{'save ms':>10}{'mmap ms':>10}{'single q/s':>13}{'batched q/s':>13}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in (int(v) for v in args.sizes.split(",") if v):
+            r = bench_size(size, args.dim, args, directory)
+            print(f"{size:>10}{r['build_ms']:>11.1f}{r['save_ms']:>10.1f}{r['load_ms']:>10.2f}"
+                  f"{r['single_qps']:>13.1f}{r['batched_qps']:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
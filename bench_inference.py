@@ -0,0 +1,73 @@
+"""Microbenchmark per-call inference latency: model.predict vs InferenceEngine.
+
+Usage:
+    python bench_inference.py [--model digit_model.h5] [--calls 50] [--cache-dir .cache/test_images]
+"""
+
+# Standard library
+import argparse
+import glob
+import os
+import statistics
+import time
+
+# Third-party
+import numpy as np
+
+# Your own modules
+from engine import InferenceEngine
+from model import load_model, predict_result, preprocess_images
+from tensor_cache import normalize_batch, open_cache
+
+BATCH_SIZES = (1, 8, 32)
+
+
+def time_calls(func, batch, calls):
+    """Return per-call latencies in milliseconds after one warm-up call."""
+    func(batch)
+    timings = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        func(batch)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main():
+    """Benchmark both inference paths and print a comparison table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="digit_model.h5", help="Path to the Keras model file")
+    parser.add_argument("--images", default="test_images", help="Directory of <label>/<image> files")
+    parser.add_argument("--calls", type=int, default=50, help="Timed calls per batch size")
+    parser.add_argument("--cache-dir", help="Read images from a tensor cache of --images kept here")
+    args = parser.parse_args()
+
+    if args.cache_dir:
+        images = normalize_batch(open_cache(args.images, args.cache_dir).images[:max(BATCH_SIZES)])
+    else:
+        paths = sorted(glob.glob(os.path.join(args.images, "*", "*")))
+        images, _, _ = preprocess_images(paths[:max(BATCH_SIZES)])
+    keras_model = load_model(args.model)
+    engine = InferenceEngine(keras_model, buckets=BATCH_SIZES)
+
+    def keras_predict(batch):
+        # predict_result's model.predict call, applied to the whole batch
+        return np.argmax(keras_model.predict(batch, verbose=0), axis=-1)
+
+    def engine_predict(batch):
+        return np.argmax(engine.predict(batch), axis=-1)
+
+    single = images[:1]
+    assert engine_predict(single)[0] == predict_result(keras_model, single)
+
+    print(f"{'batch':>6}{'predict p50 ms':>16}{'engine p50 ms':>16}{'speedup':>10}{'engine ms/img':>15}")
+    for size in BATCH_SIZES:
+        batch = np.ascontiguousarray(np.resize(images, (size, *images.shape[1:])))
+        baseline = statistics.median(time_calls(keras_predict, batch, args.calls))
+        compiled = statistics.median(time_calls(engine_predict, batch, args.calls))
+        print(f"{size:>6}{baseline:>16.2f}{compiled:>16.2f}{baseline / compiled:>9.1f}x{compiled / size:>15.2f}")
+    print(f"traces: {engine.tracing_count()} (one per bucket, none added while serving)")
+
+
+if __name__ == "__main__":
+    main()
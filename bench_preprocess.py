@@ -0,0 +1,145 @@
+"""Benchmark per-image time and peak memory of image preprocessing.
+
+Compares the original preprocess_image (full decode, default resize,
+img_to_array, divide, reshape) with the draft-mode fast path writing into a
+pooled buffer. Each variant runs in a fresh process so peak RSS is not
+shared between them.
+
+Usage:
+    python bench_preprocess.py [--images test_images] [--repeat 3] [--scale 1]
+
+``--scale`` re-encodes the images upscaled by that factor to mimic
+full-resolution phone photos, where draft decoding matters most.
+"""
+
+# Standard library
+import argparse
+import glob
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+# Third-party
+import numpy as np
+from PIL import Image
+
+# Your own modules
+from preprocessing import BufferPool, preprocess_into
+from sysinfo import child_result, peak_rss_kib
+
+
+def legacy_preprocess(image):
+    """Reproduce the original preprocess_image without importing Keras.
+
+    keras.utils.img_to_array is ``np.asarray(img, dtype="float32")`` for
+    channels-last RGB images, so this performs the same copies.
+    """
+    op_img = Image.open(image)
+    img_resize = op_img.resize((224, 224))
+    img2arr = np.asarray(img_resize, dtype=np.float32) / 255.0
+    return img2arr.reshape(1, 224, 224, 3)
+
+
+def make_fast_preprocess(resample, draft):
+    """Return a fast-path preprocessor that reuses one pooled buffer."""
+    pool = BufferPool()
+
+    def fast_preprocess(image):
+        buffer = pool.acquire()
+        preprocess_into(image, buffer, resample, draft)
+        pool.release(buffer)
+        return buffer
+
+    return fast_preprocess
+
+
+VARIANTS = {
+    "legacy": lambda: legacy_preprocess,
+    "fast (bicubic, full decode)": lambda: make_fast_preprocess("bicubic", False),
+    "fast (bicubic, draft)": lambda: make_fast_preprocess("bicubic", True),
+    "fast (bilinear, draft)": lambda: make_fast_preprocess("bilinear", True),
+}
+
+
+def run_variant(name, paths, repeat, results):
+    """Time one variant over every image and record its memory peaks."""
+    preprocess = VARIANTS[name]()
+    preprocess(paths[0])  # warm up codecs and the buffer pool
+    tracemalloc.start()
+    timings = []
+    for _ in range(repeat):
+        for path in paths:
+            started = time.perf_counter()
+            preprocess(path)
+            timings.append(time.perf_counter() - started)
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    peak_rss = peak_rss_kib()
+    results.put({
+        "variant": name,
+        "mean_ms": statistics.mean(timings) * 1000,
+        "p50_ms": statistics.median(timings) * 1000,
+        "traced_peak_kib": traced_peak / 1024,
+        "peak_rss_kib": peak_rss,
+    })
+
+
+def upscale_images(paths, scale, directory):
+    """Write JPEG copies of ``paths`` enlarged by ``scale`` and return their paths."""
+    scaled = []
+    for i, path in enumerate(paths):
+        with Image.open(path) as img:
+            big = img.convert("RGB").resize((img.width * scale, img.height * scale), Image.Resampling.BICUBIC)
+        target = os.path.join(directory, f"{i}.jpeg")
+        big.save(target, quality=90)
+        scaled.append(target)
+    return scaled
+
+
+def compare_variants(paths, repeat):
+    """Run every variant in its own process and return their result rows."""
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    rows = []
+    for name in VARIANTS:
+        proc = ctx.Process(target=run_variant, args=(name, paths, repeat, results))
+        proc.start()
+        row = child_result(proc, results)
+        proc.join()
+        rows.append(row or {"variant": name, "error": f"Variant process exited with code {proc.exitcode}"})
+    return rows
+
+
+
+def main():
+    """Run every variant and print a comparison table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", default="test_images", help="Directory of <label>/<image> files")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the image set per variant")
+    parser.add_argument("--scale", type=int, default=1, help="Upscale factor applied to the source images")
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.images, "*", "*")))
+    if not paths:
+        parser.error(f"No images found under {args.images}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        if args.scale > 1:
+            paths = upscale_images(paths, args.scale, directory)
+        rows = compare_variants(paths, args.repeat)
+
+    print(f"{len(paths)} images upscaled x{args.scale}, {args.repeat} passes")
+    print(f"{'variant':<30}{'mean ms':>10}{'p50 ms':>10}{'numpy peak KiB':>16}{'peak RSS KiB':>16}")
+    for row in rows:
+        if "error" in row:
+            print(f"{row['variant']:<30}failed: {row['error']}")
+            continue
+        print(f"{row['variant']:<30}{row['mean_ms']:>10.2f}{row['p50_ms']:>10.2f}"
+              f"{row['traced_peak_kib']:>16.0f}{row['peak_rss_kib']:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Benchmark cold start: import time vs model load time vs first inference.
+
+Every measurement runs in a fresh interpreter so nothing is already imported
+or cached. For each model file the breakdown is:
+
+- import: ``import tensorflow`` (what any Keras load pays first)
+- load: ``model.load_model`` on the file
+- first_inference: the first predict call, including graph setup
+- app_import: ``import app`` with background loading, i.e. the time until
+  routes such as /healthz can be served
+
+Usage:
+    python bench_startup.py [digit_model.h5 digit_model.npz ...] [--runs 3]
+"""
+
+# Standard library
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+CHILD_FLAG = "--child"
+
+
+def measure_model(path):
+    """Time the import, load and first-inference phases for one model file."""
+    timings = {}
+    started = time.perf_counter()
+    import tensorflow  # pylint: disable=import-outside-toplevel,unused-import
+    timings["import"] = time.perf_counter() - started
+
+    import numpy as np  # pylint: disable=import-outside-toplevel
+    from model import load_model  # pylint: disable=import-outside-toplevel
+
+    started = time.perf_counter()
+    loaded = load_model(path)
+    timings["load"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    loaded.predict(np.zeros((1, 224, 224, 3), dtype=np.float32))
+    timings["first_inference"] = time.perf_counter() - started
+    return timings
+
+
+def measure_app(path):
+    """Time ``import app`` with background loading and the wait until ready."""
+    os.environ["FLASK_MODEL_PATH"] = json.dumps(path)
+    os.environ["FLASK_MODEL_LOADING"] = json.dumps("background")
+    started = time.perf_counter()
+    import app  # pylint: disable=import-outside-toplevel
+    timings = {"app_import": time.perf_counter() - started}
+    app.get_model()
+    timings["app_ready"] = time.perf_counter() - started
+    return timings
+
+
+MEASUREMENTS = {"model": measure_model, "app": measure_app}
+
+
+def run_child(measurement, path, runs):
+    """Run one measurement in ``runs`` fresh interpreters and return the medians."""
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, __file__, CHILD_FLAG, measurement, path],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {key: statistics.median(sample[key] for sample in samples) for key in samples[0]}
+
+
+def main():
+    """Measure every model file and print the startup breakdown."""
+    if len(sys.argv) == 4 and sys.argv[1] == CHILD_FLAG:
+        print(json.dumps(MEASUREMENTS[sys.argv[2]](sys.argv[3])))
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("models", nargs="*", default=["digit_model.h5"], help="Model files to compare")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters per model")
+    args = parser.parse_args()
+
+    columns = ["import", "load", "first_inference", "app_import", "app_ready"]
+    print(f"{'model':<24}" + "".join(f"{column + ' s':>18}" for column in columns))
+    for path in args.models:
+        timings = run_child("model", path, args.runs)
+        timings.update(run_child("app", path, args.runs))
+        print(f"{os.path.basename(path):<24}" + "".join(f"{timings[column]:>18.3f}" for column in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""End-to-end serving benchmark over the labelled test images.
+
+Replays every image in test_images/0..9 through three layers:
+
+- preprocess: ``model.preprocess_image`` on the image file
+- predict: ``model.predict_result`` on an already preprocessed image
+- route: a POST to ``/prediction`` through the Flask test client, with the
+  prediction cache disabled so every request does real work
+
+Each layer runs in a fresh interpreter so its peak RSS is its own, with
+``--concurrency`` client threads. Throughput, p50/p95/p99 latency and peak
+RSS are written as JSON; with ``--baseline`` the run is compared against an
+earlier JSON file and the exit status is 1 if any layer regressed by more
+than ``--tolerance``.
+
+Usage:
+    python bench_suite.py [--layers preprocess,predict,route] [--concurrency 4]
+        [--repeat 3] [--output bench_results.json]
+        [--baseline bench_baseline.json] [--tolerance 0.1]
+"""
+
+# Standard library
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+# Third-party
+import numpy as np
+
+# Your own modules
+from datasets import list_labelled_images
+from sysinfo import peak_rss_kib
+
+CHILD_FLAG = "--child"
+LAYERS = ("preprocess", "predict", "route")
+
+
+def make_preprocess_call(paths, _config):
+    """Return a call that preprocesses one image file."""
+    from model import preprocess_image  # pylint: disable=import-outside-toplevel
+
+    return lambda i: preprocess_image(paths[i])
+
+
+def make_predict_call(paths, config):
+    """Return a call that classifies one preprocessed image with predict_result."""
+    from model import load_model, predict_result, preprocess_images  # pylint: disable=import-outside-toplevel
+
+    loaded = load_model(config["model"])
+    images, _, _ = preprocess_images(paths)
+    return lambda i: predict_result(loaded, images[i:i + 1])
+
+
+def make_route_call(paths, config):
+    """Return a call that posts one image to /prediction through the test client."""
+    os.environ["FLASK_MODEL_PATH"] = json.dumps(config["model"])
+    os.environ["FLASK_MODEL_LOADING"] = json.dumps("eager")
+    os.environ["FLASK_CACHE_MAX_ENTRIES"] = "0"
+    os.environ["FLASK_ADMISSION_MAX_QUEUE"] = str(config["concurrency"])
+    from app import app  # pylint: disable=import-outside-toplevel
+
+    payloads = []
+    for path in paths:
+        with open(path, "rb") as f:
+            payloads.append(f.read())
+
+    def call(i):
+        with app.test_client() as client:
+            response = client.post(
+                "/prediction",
+                data={"file": (BytesIO(payloads[i]), os.path.basename(paths[i]))},
+                content_type="multipart/form-data",
+            )
+        if response.status_code != 200 or b"Prediction" not in response.data:
+            raise RuntimeError(f"/prediction failed for {paths[i]} with status {response.status_code}")
+
+    return call
+
+
+LAYER_CALLS = {
+    "preprocess": make_preprocess_call,
+    "predict": make_predict_call,
+    "route": make_route_call,
+}
+
+
+def run_layer(layer, config):
+    """Time every image through one layer and summarize latency, throughput and memory.
+
+    Args:
+        layer (str): Name from LAYERS.
+        config (dict): ``images``, ``model``, ``concurrency`` and ``repeat``.
+
+    Returns:
+        dict: Request count, throughput in requests per second, latency
+        percentiles in milliseconds and peak RSS in KiB.
+    """
+    paths = [path for path, _ in list_labelled_images(config["images"])]
+    call = LAYER_CALLS[layer](paths, config)
+    # The first call pays one-off costs such as graph tracing
+    call(0)
+
+    def timed(i):
+        started = time.perf_counter()
+        call(i % len(paths))
+        return time.perf_counter() - started
+
+    requests = len(paths) * config["repeat"]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(config["concurrency"]) as pool:
+        latencies = np.array(list(pool.map(timed, range(requests)))) * 1000
+    elapsed = time.perf_counter() - started
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "requests": requests,
+        "concurrency": config["concurrency"],
+        "throughput_rps": round(requests / elapsed, 2),
+        "latency_ms": {
+            "mean": round(float(latencies.mean()), 3),
+            "p50": round(float(p50), 3),
+            "p95": round(float(p95), 3),
+            "p99": round(float(p99), 3),
+        },
+        "peak_rss_kib": peak_rss_kib(),
+    }
+
+
+def run_child(layer, config):
+    """Run one layer in a fresh interpreter and return its summary."""
+    output = subprocess.run(
+        [sys.executable, __file__, CHILD_FLAG, layer, json.dumps(config)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def compare_results(results, baseline, tolerance):
+    """List the layers whose throughput or tail latency regressed against a baseline.
+
+    Args:
+        results (dict): Layer name to summary, as returned by run_layer.
+        baseline (dict): Earlier results in the same format.
+        tolerance (float): Allowed relative change, e.g. 0.1 for 10%.
+
+    Returns:
+        list: Human-readable regression descriptions, empty if none.
+    """
+    regressions = []
+    for layer, current in results.items():
+        previous = baseline.get(layer)
+        if previous is None:
+            continue
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{layer}: throughput {current['throughput_rps']:.1f} rps < "
+                f"baseline {previous['throughput_rps']:.1f} rps"
+            )
+        for percentile in ("p95", "p99"):
+            now, before = current["latency_ms"][percentile], previous["latency_ms"][percentile]
+            if now > before * (1 + tolerance):
+                regressions.append(f"{layer}: {percentile} {now:.2f} ms > baseline {before:.2f} ms")
+    return regressions
+
+
+def main():
+    """Benchmark the requested layers, write the JSON report and check the baseline."""
+    if len(sys.argv) == 4 and sys.argv[1] == CHILD_FLAG:
+        print(json.dumps(run_layer(sys.argv[2], json.loads(sys.argv[3]))))
+        return 0
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", default="test_images", help="Directory of <label>/<image> files")
+    parser.add_argument("--model", default="digit_model.h5", help="Model file used by predict and route")
+    parser.add_argument("--layers", default=",".join(LAYERS), help="Comma-separated layers to run")
+    parser.add_argument("--concurrency", type=int, default=1, help="Client threads per layer")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the image set per layer")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write the JSON results")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    layers = [layer for layer in args.layers.split(",") if layer]
+    unknown = set(layers) - set(LAYERS)
+    if unknown:
+        parser.error(f"Unknown layers: {sorted(unknown)}")
+
+    config = {"images": args.images, "model": args.model, "concurrency": args.concurrency, "repeat": args.repeat}
+    results = {layer: run_child(layer, config) for layer in layers}
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"config": config, "layers": results}, f, indent=2)
+
+    print(f"{'layer':<12}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'peak RSS MiB':>14}")
+    for layer, row in results.items():
+        latency = row["latency_ms"]
+        print(f"{layer:<12}{row['throughput_rps']:>10.1f}{latency['p50']:>10.2f}{latency['p95']:>10.2f}"
+              f"{latency['p99']:>10.2f}{row['peak_rss_kib'] / 1024:>14.1f}")
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare_results(results, json.load(f)["layers"], args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
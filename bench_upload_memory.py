@@ -0,0 +1,96 @@
+"""Benchmark peak memory and time of preprocessing very large uploads.
+
+Writes large synthetic JPEG and PNG files, then preprocesses each one in a
+fresh interpreter with full-resolution decoding and with reduced-scale
+(draft) decoding, and reports the growth of peak RSS over the idle process.
+Files over the pixel limit are also shown being rejected from their header.
+
+Usage:
+    python bench_upload_memory.py [--sizes 4000x3000,8000x6000,12000x9000]
+        [--max-pixels 25000000]
+"""
+
+# Standard library
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+CHILD_FLAG = "--child"
+
+
+def write_image(directory, size, fmt):
+    """Write a noisy-gradient image of ``size`` and return its path."""
+    import numpy as np  # pylint: disable=import-outside-toplevel
+    from PIL import Image  # pylint: disable=import-outside-toplevel
+
+    width, height = size
+    row = np.linspace(0, 255, width, dtype=np.uint8)
+    pixels = np.repeat(np.repeat(row[np.newaxis, :, np.newaxis], height, axis=0), 3, axis=2)
+    path = os.path.join(directory, f"upload_{width}x{height}.{fmt.lower()}")
+    Image.fromarray(pixels).save(path, format=fmt)
+    return path
+
+
+def measure(path, draft, max_pixels):
+    """Preprocess one file and return elapsed time and peak RSS growth."""
+    # Imports happen before the baseline so only the decode is measured
+    from preprocessing import ImageTooLarge, preprocess_into  # pylint: disable=import-outside-toplevel
+    from sysinfo import peak_rss_kib, rss_kib  # pylint: disable=import-outside-toplevel
+
+    baseline = rss_kib()
+    started = time.perf_counter()
+    try:
+        preprocess_into(path, draft=draft, max_pixels=max_pixels)
+        outcome = "ok"
+    except ImageTooLarge:
+        outcome = "rejected"
+    return {
+        "outcome": outcome,
+        "seconds": time.perf_counter() - started,
+        "peak_growth_kib": peak_rss_kib() - baseline,
+    }
+
+
+def run_child(path, draft, max_pixels):
+    """Run measure in a fresh interpreter so peak RSS readings are not shared."""
+    output = subprocess.run(
+        [sys.executable, __file__, CHILD_FLAG, json.dumps([path, draft, max_pixels])],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    """Write the large inputs, measure every decoding mode and print the table."""
+    if len(sys.argv) == 3 and sys.argv[1] == CHILD_FLAG:
+        print(json.dumps(measure(*json.loads(sys.argv[2]))))
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="4000x3000,8000x6000,12000x9000", help="Comma-separated WxH sizes")
+    parser.add_argument("--max-pixels", type=int, default=25_000_000, help="Decoded pixel limit to apply")
+    args = parser.parse_args()
+
+    sizes = [tuple(int(v) for v in size.split("x")) for size in args.sizes.split(",") if size]
+    modes = (("full decode", False, None), ("draft", True, None), ("draft + limit", True, args.max_pixels))
+    print(f"{'file':<24}{'MiB':>8}" + "".join(f"{name + ' ms':>20}{'peak MiB':>10}" for name, _, _ in modes))
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            for fmt in ("JPEG", "PNG"):
+                path = write_image(directory, size, fmt)
+                line = f"{os.path.basename(path):<24}{os.path.getsize(path) / 2**20:>8.1f}"
+                for _, draft, max_pixels in modes:
+                    result = run_child(path, draft, max_pixels)
+                    if result["outcome"] == "rejected":
+                        line += f"{'rejected':>20}{result['peak_growth_kib'] / 1024:>10.1f}"
+                    else:
+                        line += f"{result['seconds'] * 1000:>20.1f}{result['peak_growth_kib'] / 1024:>10.1f}"
+                print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Benchmark inference throughput as the number of worker processes grows.
+
+Concurrent client threads each send single preprocessed images through the
+batch scheduler, as /prediction does, first against an in-process model and
+then against WorkerPools of 1..N processes.
+
+Usage:
+    python bench_workers.py [--model digit_model.h5] [--max-workers 4] [--requests 400] [--clients 16]
+"""
+
+# Standard library
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Your own modules
+from batching import BatchScheduler
+from datasets import list_labelled_images
+from engine import InferenceEngine
+from model import load_model, preprocess_images
+from workers import WorkerPool
+
+
+def measure_throughput(serving_model, images, requests, *, clients, dispatch_threads, max_batch_size):
+    """Return images per second for ``requests`` single-image predictions."""
+    scheduler = BatchScheduler(serving_model, max_batch_size, max_wait_ms=2.0, num_threads=dispatch_threads)
+    for image in images[:dispatch_threads]:
+        scheduler.predict(image[None])
+    started = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        list(pool.map(lambda i: scheduler.predict(images[i % len(images)][None]), range(requests)))
+    elapsed = time.perf_counter() - started
+    scheduler.close()
+    return requests / elapsed
+
+
+def main():
+    """Scale the worker count from 1 to N and print throughput for each."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="digit_model.h5", help="Model file to serve")
+    parser.add_argument("--images", default="test_images", help="Labelled image folder")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1, help="Largest pool size")
+    parser.add_argument("--requests", type=int, default=400, help="Predictions per measurement")
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent client threads")
+    parser.add_argument("--batch-size", type=int, default=8, help="Scheduler max batch size")
+    args = parser.parse_args()
+
+    images, _, _ = preprocess_images([path for path, _ in list_labelled_images(args.images)])
+
+    local = InferenceEngine(load_model(args.model))
+    options = {"clients": args.clients, "max_batch_size": args.batch_size}
+    baseline = measure_throughput(local, images, args.requests, dispatch_threads=1, **options)
+    print(f"{'mode':<16}{'images/s':>10}{'speedup':>10}")
+    print(f"{'in-process':<16}{baseline:>10.1f}{1.0:>9.2f}x")
+
+    for workers in range(1, args.max_workers + 1):
+        pool = WorkerPool(args.model, workers, max_batch_size=args.batch_size).start()
+        throughput = measure_throughput(pool, images, args.requests, dispatch_threads=workers, **options)
+        pool.close()
+        print(f"{f'{workers} workers':<16}{throughput:>10.1f}{throughput / baseline:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
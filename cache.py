@@ -0,0 +1,156 @@
+"""Content-addressed cache of predictions for repeated uploads."""
+
+# Standard library
+import collections
+import hashlib
+import os
+import threading
+import time
+
+
+# Bytes hashed at a time when content_key is given a stream
+HASH_CHUNK_SIZE = 1 << 16
+
+
+def content_key(data):
+    """Return a compact hash of uploaded image bytes.
+
+    Args:
+        data: Raw uploaded file contents as bytes, or a seekable binary
+            stream, which is hashed in chunks and rewound to where it was.
+
+    Returns:
+        str: Hex digest identifying the contents.
+    """
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+    digest = hashlib.blake2b(digest_size=16)
+    position = data.tell()
+    for chunk in iter(lambda: data.read(HASH_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    data.seek(position)
+    return digest.hexdigest()
+
+
+class PredictionCache:
+    """Bounded LRU cache mapping upload hashes to prediction results.
+
+    Entries optionally expire after ``ttl`` seconds, and the whole cache is
+    dropped whenever the model file at ``model_path`` changes on disk, so
+    predictions from an old model are never served.
+
+    Args:
+        max_entries (int): Number of entries kept before the least recently
+            used one is evicted. 0 disables caching.
+        ttl (float): Seconds an entry stays valid, or None to never expire.
+        model_path (str): Model file whose modification invalidates the cache.
+    """
+
+    def __init__(self, max_entries=1024, ttl=None, model_path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl or None
+        self.model_path = model_path
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._model_signature = self._read_model_signature()
+        self._counters = collections.Counter()
+
+    def get(self, key):
+        """Return the cached result for ``key``, or None on a miss.
+
+        Args:
+            key (str): Hash from content_key.
+
+        Returns:
+            The cached prediction, or None.
+        """
+        with self._lock:
+            self._check_model()
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            value, stored_at = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                self._counters["expirations"] += 1
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+            return value
+
+    def put(self, key, value):
+        """Store a prediction result, evicting the least recently used entries.
+
+        Args:
+            key (str): Hash from content_key.
+            value: Prediction result to cache.
+        """
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._check_model()
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def clear(self):
+        """Drop every cached entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def invalidate(self, prefix):
+        """Drop the entries whose key starts with ``prefix``, e.g. one model version's.
+
+        Returns:
+            int: Number of entries dropped.
+        """
+        with self._lock:
+            stale = [key for key in self._entries if key.startswith(prefix)]
+            for key in stale:
+                del self._entries[key]
+            if stale:
+                self._counters["invalidations"] += 1
+        return len(stale)
+
+    def stats(self):
+        """Return hit/miss/eviction counters and the current size.
+
+        Returns:
+            dict: Counters, current entry count and hit ratio.
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            size = len(self._entries)
+        lookups = counters.get("hits", 0) + counters.get("misses", 0)
+        return {
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "entries": size,
+            "hits": counters.get("hits", 0),
+            "misses": counters.get("misses", 0),
+            "evictions": counters.get("evictions", 0),
+            "expirations": counters.get("expirations", 0),
+            "invalidations": counters.get("invalidations", 0),
+            "hit_ratio": counters.get("hits", 0) / lookups if lookups else 0.0,
+        }
+
+    def _read_model_signature(self):
+        if self.model_path is None:
+            return None
+        try:
+            stat = os.stat(self.model_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _check_model(self):
+        signature = self._read_model_signature()
+        if signature != self._model_signature:
+            self._model_signature = signature
+            if self._entries:
+                self._entries.clear()
+                self._counters["invalidations"] += 1
@@ -0,0 +1,71 @@
+"""Confidence-gated cascade of a cheap first-stage model and the full model."""
+
+# Standard library
+import threading
+
+# Third-party
+import numpy as np
+
+
+class CascadeModel:
+    """Classify with a cheap model first and escalate only uncertain images.
+
+    Every image goes through ``first``; the rows whose top probability is
+    below ``threshold`` are run again through ``full`` and take its
+    probabilities. Both models follow the ``predict(images)`` protocol, so
+    the cascade can stand in for the serving model anywhere.
+
+    Args:
+        first: Cheap first-stage model exposing ``predict(images)``.
+        full: Full model exposing ``predict(images)``.
+        threshold (float): Lowest first-stage top probability accepted
+            without escalation; 0 never escalates, above 1 always does.
+    """
+
+    def __init__(self, first, full, threshold=0.9):
+        self.first = first
+        self.full = full
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._images = 0
+        self._escalated = 0
+
+    def predict(self, images):
+        """Predict class probabilities, escalating low-confidence rows to the full model.
+
+        Args:
+            images (np.ndarray): Preprocessed images of shape (N, 224, 224, 3).
+
+        Returns:
+            np.ndarray: Class probabilities of shape (N, num_classes).
+        """
+        probabilities = np.array(self.first.predict(images), dtype=np.float32)
+        uncertain = np.flatnonzero(probabilities.max(axis=1) < self.threshold)
+        if uncertain.size:
+            probabilities[uncertain] = self.full.predict(images[uncertain])
+        with self._lock:
+            self._images += len(images)
+            self._escalated += int(uncertain.size)
+        return probabilities
+
+    def close(self):
+        """Close either stage that holds resources, such as a WorkerPool."""
+        for stage in (self.first, self.full):
+            close = getattr(stage, "close", None)
+            if close is not None:
+                close()
+
+    def stats(self):
+        """Return how many images were classified and how many were escalated.
+
+        Returns:
+            dict: Threshold, image and escalation counts and the escalation rate.
+        """
+        with self._lock:
+            images, escalated = self._images, self._escalated
+        return {
+            "threshold": self.threshold,
+            "images": images,
+            "escalated": escalated,
+            "escalation_rate": escalated / images if images else 0.0,
+        }
@@ -0,0 +1,65 @@
+"""Check that two inference backends agree on every labelled test image.
+
+Usage:
+    python check_parity.py digit_model.h5 digit_model.tflite [--images test_images]
+
+Exits with status 1 if any image gets a different argmax.
+"""
+
+# Standard library
+import argparse
+import glob
+import os
+import sys
+
+# Third-party
+import numpy as np
+
+# Your own modules
+from model import load_model, predict_proba, preprocess_images
+
+
+def compare_backends(reference, candidate, paths, batch_size=32):
+    """Return the paths whose predicted labels differ, plus the max probability gap.
+
+    Args:
+        reference: Model whose predictions are taken as correct.
+        candidate: Model being checked.
+        paths (list): Image paths to classify.
+        batch_size (int): Images per forward pass.
+
+    Returns:
+        tuple: List of (path, reference label, candidate label) mismatches
+        and the largest absolute probability difference.
+    """
+    images, indices, errors = preprocess_images(paths)
+    if errors:
+        raise ValueError(f"Could not decode: {[paths[i] for i in errors]}")
+    expected = predict_proba(reference, images, batch_size)
+    actual = predict_proba(candidate, images, batch_size)
+    mismatches = [
+        (paths[i], int(e), int(a))
+        for i, e, a in zip(indices, np.argmax(expected, axis=-1), np.argmax(actual, axis=-1))
+        if e != a
+    ]
+    return mismatches, float(np.max(np.abs(expected - actual)))
+
+
+def main():
+    """Compare the two models and report any disagreement."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("reference", help="Reference model file (e.g. digit_model.h5)")
+    parser.add_argument("candidate", help="Candidate model file (e.g. digit_model.tflite)")
+    parser.add_argument("--images", default="test_images", help="Directory of <label>/<image> files")
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.images, "*", "*")))
+    mismatches, max_gap = compare_backends(load_model(args.reference), load_model(args.candidate), paths)
+    for path, expected, actual in mismatches:
+        print(f"MISMATCH {path}: {args.reference}={expected} {args.candidate}={actual}")
+    print(f"{len(paths) - len(mismatches)}/{len(paths)} images agree, max probability difference {max_gap:.2e}")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
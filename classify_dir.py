@@ -0,0 +1,268 @@
+"""Classify every image under a directory tree and stream the results to JSONL or CSV.
+
+Images are decoded and preprocessed on a thread pool while earlier batches
+run through the model, and at most ``--batch-size * --prefetch`` images are
+held in memory at once, so memory use does not grow with the dataset. Rows
+are flushed after every batch. Rerunning with the same output file skips the
+images already recorded there, so an interrupted run resumes where it
+stopped. When images sit in numeric folders (``<root>/<digit>/<image>``),
+accuracy against the folder names is reported at the end.
+
+Usage:
+    python classify_dir.py test_images -o predictions.jsonl
+        [--model digit_model.h5] [--batch-size 32] [--threads 4] [--prefetch 4]
+        [--format jsonl|csv] [--overwrite]
+"""
+
+# Standard library
+import argparse
+import collections
+import csv
+import importlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Third-party
+import numpy as np
+
+# Your own modules
+from backends import backend_for_path
+from datasets import iter_images
+from model import load_model, predict_proba
+from preprocessing import INPUT_SIZE, BufferPool, preprocess_into
+
+FIELDS = ("path", "label", "prediction", "confidence", "error")
+
+
+def format_for_path(path):
+    """Return 'csv' for '.csv' output files and 'jsonl' otherwise."""
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+def _parse_label(value):
+    if value in (None, ""):
+        return None
+    if isinstance(value, int):
+        return value
+    return int(value) if str(value).isdigit() else value
+
+
+def read_completed(path, fmt):
+    """Read the rows an earlier run already wrote to ``path``.
+
+    A partially written last line (from an interrupted run) is cut off so
+    appended rows start on a clean line.
+
+    Args:
+        path (str): Existing output file.
+        fmt (str): 'jsonl' or 'csv'.
+
+    Returns:
+        list: Completed rows as dicts with the keys in FIELDS.
+    """
+    with open(path, "rb+") as f:
+        data = f.read()
+        complete = data[:data.rfind(b"\n") + 1]
+        if len(complete) != len(data):
+            f.truncate(len(complete))
+    lines = complete.decode("utf-8").splitlines()
+    if fmt == "csv":
+        rows = list(csv.DictReader(lines))
+        for row in rows:
+            row["label"] = _parse_label(row["label"])
+            row["prediction"] = _parse_label(row["prediction"])
+        return rows
+    return [json.loads(line) for line in lines if line.strip()]
+
+
+class ResultWriter:
+    """Append result rows to a JSONL or CSV file, flushing once per batch.
+
+    Args:
+        path (str): Output file.
+        fmt (str): 'jsonl' or 'csv'.
+        append (bool): Keep existing rows instead of truncating the file.
+    """
+
+    def __init__(self, path, fmt, append):
+        new_file = not append or not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, "a" if append else "w", encoding="utf-8", newline="")  # pylint: disable=consider-using-with
+        self._csv = None
+        if fmt == "csv":
+            self._csv = csv.DictWriter(self._file, FIELDS)
+            if new_file:
+                self._csv.writeheader()
+
+    def write(self, row):
+        """Write one result row."""
+        if self._csv is not None:
+            self._csv.writerow(row)
+        else:
+            self._file.write(json.dumps(row) + "\n")
+
+    def flush(self):
+        """Push written rows to disk."""
+        self._file.flush()
+
+    def close(self):
+        """Flush and close the file."""
+        self._file.close()
+
+
+class Tally:
+    """Running counts of classified, failed and correctly labelled images."""
+
+    def __init__(self):
+        self.counts = collections.Counter()
+
+    def add(self, row):
+        """Count one result row."""
+        if row.get("error"):
+            self.counts["errors"] += 1
+            return
+        self.counts["classified"] += 1
+        if isinstance(row.get("label"), int):
+            self.counts["labelled"] += 1
+            self.counts["correct"] += int(row["label"] == row["prediction"])
+
+    def accuracy(self):
+        """Return accuracy over images in numeric folders, or None if there were none."""
+        if not self.counts["labelled"]:
+            return None
+        return self.counts["correct"] / self.counts["labelled"]
+
+
+def decode(path, pool):
+    """Preprocess one image into a pooled buffer, returning the buffer or the error."""
+    buffer = pool.acquire()
+    try:
+        return preprocess_into(path, buffer), None
+    except OSError as e:  # also covers FileNotFoundError and UnidentifiedImageError
+        pool.release(buffer)
+        return None, e
+
+
+def _collect_batch(pending, batch, pool):
+    # Copy the next decoded images in order into ``batch``; failed decodes
+    # become error rows. Returns all rows and the ones that fill the batch.
+    rows, filled = [], []
+    while pending and len(filled) < len(batch):
+        path, label, future = pending.popleft()
+        buffer, error = future.result()
+        row = {"path": path, "label": label, "prediction": None, "confidence": None, "error": None}
+        rows.append(row)
+        if error is not None:
+            row["error"] = str(error)
+            continue
+        batch[len(filled)] = buffer
+        pool.release(buffer)
+        filled.append(row)
+    return rows, filled
+
+
+def _fill_predictions(serving_model, images, rows):
+    probabilities = predict_proba(serving_model, images, len(images))
+    for row, probs in zip(rows, probabilities):
+        row["prediction"] = int(np.argmax(probs))
+        row["confidence"] = round(float(np.max(probs)), 6)
+
+
+def _write_rows(writer, tally, rows):
+    for row in rows:
+        writer.write(row)
+        tally.add(row)
+    writer.flush()
+
+
+def classify_tree(serving_model, items, writer, tally, *, batch_size=32, threads=4, prefetch=4):
+    """Decode ``items`` on a thread pool and classify them in batches as they complete.
+
+    Args:
+        serving_model: Object exposing ``predict(images)``.
+        items (iterable): ``(path, label)`` pairs, consumed lazily.
+        writer (ResultWriter): Destination for result rows.
+        tally (Tally): Running counts updated for every row.
+        batch_size (int): Images per forward pass.
+        threads (int): Decoding threads.
+        prefetch (int): Batches decoded ahead of the one being classified.
+
+    Returns:
+        int: Number of images processed.
+    """
+    pool = BufferPool((*INPUT_SIZE, 3), capacity=batch_size * (prefetch + 1))
+    batch = np.empty((batch_size, *INPUT_SIZE, 3), dtype=np.float32)
+    pending = collections.deque()
+    items = iter(items)
+    processed = 0
+    with ThreadPoolExecutor(threads) as executor:
+        while True:
+            # Keep the decoders busy while the model works on the current batch
+            for item in items:
+                pending.append((*item, executor.submit(decode, item[0], pool)))
+                if len(pending) >= batch_size * prefetch:
+                    break
+            if not pending:
+                return processed
+            rows, filled = _collect_batch(pending, batch, pool)
+            if filled:
+                _fill_predictions(serving_model, batch[:len(filled)], filled)
+            _write_rows(writer, tally, rows)
+            processed += len(rows)
+
+
+def load_serving_model(path, compiled=True):
+    """Load ``path`` and wrap Keras models in the compiled inference engine."""
+    serving_model = load_model(path)
+    if compiled and backend_for_path(path) == "keras":
+        serving_model = importlib.import_module("engine").InferenceEngine(serving_model)
+    return serving_model
+
+
+def main():
+    """Classify a directory tree and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("root", help="Directory of images, optionally laid out as <root>/<label>/<image>")
+    parser.add_argument("-o", "--output", required=True, help="Output file (.jsonl or .csv)")
+    parser.add_argument("--format", choices=("jsonl", "csv"), help="Output format (defaults to the extension)")
+    parser.add_argument("--model", default="digit_model.h5", help="Model file to classify with")
+    parser.add_argument("--batch-size", type=int, default=32, help="Images per forward pass")
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1, help="Decoding threads")
+    parser.add_argument("--prefetch", type=int, default=4, help="Batches decoded ahead of inference")
+    parser.add_argument("--no-compile", action="store_true", help="Use model.predict instead of the compiled engine")
+    parser.add_argument("--overwrite", action="store_true", help="Start over instead of resuming")
+    args = parser.parse_args()
+
+    fmt = args.format or format_for_path(args.output)
+    tally = Tally()
+    done = set()
+    resume = not args.overwrite and os.path.exists(args.output)
+    if resume:
+        for row in read_completed(args.output, fmt):
+            done.add(row["path"])
+            tally.add(row)
+        print(f"Resuming: {len(done)} images already in {args.output}", file=sys.stderr)
+
+    writer = ResultWriter(args.output, fmt, append=resume)
+    started = time.perf_counter()
+    try:
+        processed = classify_tree(
+            load_serving_model(args.model, compiled=not args.no_compile),
+            ((path, label) for path, label in iter_images(args.root) if path not in done),
+            writer, tally, batch_size=args.batch_size, threads=args.threads, prefetch=args.prefetch,
+        )
+    finally:
+        writer.close()
+    elapsed = time.perf_counter() - started
+
+    print(f"Processed {processed} images in {elapsed:.1f} s ({processed / max(elapsed, 1e-9):.1f} images/s)")
+    print(f"Total: {tally.counts['classified']} classified, {tally.counts['errors']} failed")
+    accuracy = tally.accuracy()
+    if accuracy is not None:
+        print(f"Accuracy: {accuracy:.4f} ({tally.counts['correct']}/{tally.counts['labelled']} labelled images)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,14 @@
 
 
+import os
+
 import pytest
+
+# Load the model while importing app, so TensorFlow is never imported by the
+# background loader and a test module at the same time
+os.environ.setdefault("FLASK_MODEL_LOADING", '"eager"')
+
+# pylint: disable-next=wrong-import-position
 from app import app  # This imports the Flask app for testing
 
 @pytest.fixture
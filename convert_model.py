@@ -0,0 +1,38 @@
+"""Convert a saved Keras model into a faster-loading serving format.
+
+Usage:
+    python convert_model.py digit_model.h5 [--format npz|tflite] [-o OUTPUT]
+
+Serve the result with e.g. FLASK_MODEL_PATH='"digit_model.tflite"'; the
+backend is picked from the extension unless FLASK_INFERENCE_BACKEND is set.
+"""
+
+# Standard library
+import argparse
+import os
+
+# Your own modules
+from model import load_model, save_fast_model, save_tflite_model
+
+# Writer for each output format
+FORMATS = {
+    "npz": save_fast_model,
+    "tflite": save_tflite_model,
+}
+
+
+def main():
+    """Load the source model and write it in the fast-loading format."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", help="Path to the Keras model file (e.g. digit_model.h5)")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="npz", help="Output format")
+    parser.add_argument("-o", "--output", help="Destination path (defaults to the source name and format)")
+    args = parser.parse_args()
+
+    output = args.output or f"{os.path.splitext(args.source)[0]}.{args.format}"
+    FORMATS[args.format](load_model(args.source), output)
+    print(f"Wrote {output} ({os.path.getsize(output) / 1024:.0f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
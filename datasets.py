@@ -0,0 +1,52 @@
+"""Discovery of labelled image folders such as test_images/<digit>/."""
+
+# Standard library
+import os
+
+# File extensions treated as images
+IMAGE_EXTENSIONS = (".jpeg", ".jpg", ".png", ".bmp", ".gif", ".webp", ".tif", ".tiff")
+
+
+def list_labelled_images(root):
+    """List the images under ``root`` whose parent folder name is their label.
+
+    Args:
+        root (str): Directory laid out as ``<root>/<label>/<image>``.
+
+    Returns:
+        list: ``(path, label)`` pairs sorted by path, where ``label`` is an
+        int for numeric folder names and the folder name otherwise.
+    """
+    pairs = []
+    for folder in sorted(os.listdir(root)):
+        directory = os.path.join(root, folder)
+        if not os.path.isdir(directory):
+            continue
+        label = int(folder) if folder.isdigit() else folder
+        for name in sorted(os.listdir(directory)):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                pairs.append((os.path.join(directory, name), label))
+    return pairs
+
+
+def iter_images(root):
+    """Yield every image below ``root`` in sorted depth-first order, lazily.
+
+    Args:
+        root (str): Directory to walk; images may sit at any depth.
+
+    Yields:
+        tuple: ``(path, label)``, where ``label`` is the parent folder name
+        (an int when numeric) or None for images directly in ``root``.
+    """
+    root = os.path.normpath(root)
+    for directory, folders, files in os.walk(root):
+        folders.sort()
+        folder = os.path.basename(directory)
+        if directory == root:
+            label = None
+        else:
+            label = int(folder) if folder.isdigit() else folder
+        for name in sorted(files):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                yield os.path.join(directory, name), label
@@ -0,0 +1,258 @@
+"""Penultimate-layer embeddings and a NumPy cosine nearest-neighbour index.
+
+Build an index of every labelled image and save it for the app, which
+memory-maps it at startup and serves /similar:
+
+    python embeddings.py test_images -o embedding_index [--model digit_model.h5]
+"""
+
+# Standard library
+import argparse
+import importlib
+import json
+import os
+import threading
+
+# Third-party
+import numpy as np
+
+# Your own modules
+from datasets import list_labelled_images
+from loading import ModelNotReady
+
+VECTORS_FILE = "vectors.npy"
+IDS_FILE = "ids.json"
+
+
+def embedding_model(model):
+    """Return a Keras model mapping images to the input of ``model``'s last layer.
+
+    Args:
+        model (keras.Model): Classifier loaded by model.load_model.
+
+    Returns:
+        keras.Model: Model whose (N, dim) output is the penultimate activation.
+    """
+    keras = importlib.import_module("keras")
+    features = model.layers[-1].input
+    if len(features.shape) > 2:
+        features = keras.layers.Flatten()(features)
+    return keras.Model(inputs=model.inputs, outputs=features)
+
+
+class Embedder:
+    """Compute embeddings through the compiled inference engine.
+
+    Created empty at import time and given a model once it has loaded,
+    like the batch scheduler.
+
+    Args:
+        model (keras.Model): Classifier to take embeddings from, or None.
+        buckets (tuple): Batch sizes traced by the inference engine.
+    """
+
+    def __init__(self, model=None, buckets=(1, 32)):
+        self.buckets = buckets
+        self._engine = None
+        if model is not None:
+            self.attach(model)
+
+    def attach(self, model):
+        """Trace the embedding function of ``model``."""
+        engine = importlib.import_module("engine")
+        self._engine = engine.InferenceEngine(embedding_model(model), self.buckets)
+
+    def detach(self):
+        """Drop the attached model, e.g. once it has been unloaded."""
+        self._engine = None
+
+    @property
+    def ready(self):
+        """Whether a model has been attached."""
+        return self._engine is not None
+
+    def embed(self, images):
+        """Return the embeddings of a batch of preprocessed images.
+
+        Args:
+            images (np.ndarray): Preprocessed images of shape (N, 224, 224, 3).
+
+        Returns:
+            np.ndarray: float32 embeddings of shape (N, dim).
+        """
+        if self._engine is None:
+            raise ModelNotReady("Embeddings are not available for this model")
+        # The embedding model has no softmax head, so its "logits" are the raw activations
+        return self._engine.infer(images)[0]
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, np.float32(1e-12))
+
+
+class EmbeddingIndex:
+    """In-memory matrix of L2-normalized embeddings with batched cosine top-k search.
+
+    Rows live in one contiguous float32 array that grows by doubling. An
+    index loaded with ``mmap=True`` reads its rows straight from disk until
+    the first ``add`` copies them into memory.
+
+    Args:
+        dim (int): Embedding dimension.
+        capacity (int): Rows preallocated before the first growth.
+    """
+
+    def __init__(self, dim, capacity=1024):
+        self.dim = dim
+        self._vectors = np.empty((capacity, dim), dtype=np.float32)
+        self._size = 0
+        self.ids = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def vectors(self):
+        """The normalized rows currently in the index."""
+        return self._vectors[:self._size]
+
+    def add(self, vectors, ids):
+        """Normalize and append embeddings with their identifiers.
+
+        Args:
+            vectors (np.ndarray): Embeddings of shape (N, dim).
+            ids (list): N identifiers, e.g. image paths.
+        """
+        vectors = _normalize(vectors).reshape(-1, self.dim)
+        if len(vectors) != len(ids):
+            raise ValueError("vectors and ids must have the same length")
+        with self._lock:
+            needed = self._size + len(vectors)
+            if needed > len(self._vectors) or not self._vectors.flags.writeable:
+                grown = np.empty((max(needed, 2 * len(self._vectors), 1), self.dim), dtype=np.float32)
+                grown[:self._size] = self._vectors[:self._size]
+                self._vectors = grown
+            self._vectors[self._size:needed] = vectors
+            self._size = needed
+            self.ids.extend(ids)
+
+    def search(self, queries, k=5, batch_size=256):
+        """Return the ``k`` most cosine-similar rows for each query.
+
+        Queries are scored against the whole matrix in batches of
+        ``batch_size`` with one matrix product each, and only the top ``k``
+        of every row is sorted.
+
+        Args:
+            queries (np.ndarray): Embeddings of shape (Q, dim).
+            k (int): Neighbours per query.
+            batch_size (int): Queries scored per matrix product.
+
+        Returns:
+            tuple: ``(indices, scores)`` arrays of shape (Q, min(k, len(self))),
+            best match first.
+        """
+        queries = _normalize(queries).reshape(-1, self.dim)
+        vectors = self.vectors
+        k = min(k, len(vectors))
+        indices = np.empty((len(queries), k), dtype=np.int64)
+        scores = np.empty((len(queries), k), dtype=np.float32)
+        if k == 0:
+            return indices, scores
+        for start in range(0, len(queries), batch_size):
+            similarity = queries[start:start + batch_size] @ vectors.T
+            if k < len(vectors):
+                top = np.argpartition(similarity, -k, axis=1)[:, -k:]
+            else:
+                top = np.broadcast_to(np.arange(len(vectors)), similarity.shape)
+            top_scores = np.take_along_axis(similarity, top, axis=1)
+            order = np.argsort(-top_scores, axis=1)
+            indices[start:start + batch_size] = np.take_along_axis(top, order, axis=1)
+            scores[start:start + batch_size] = np.take_along_axis(top_scores, order, axis=1)
+        return indices, scores
+
+    def save(self, path):
+        """Write the index to directory ``path`` as vectors.npy and ids.json."""
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, VECTORS_FILE), self.vectors)
+        with open(os.path.join(path, IDS_FILE), "w", encoding="utf-8") as f:
+            json.dump(self.ids, f)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Load an index written by save.
+
+        Args:
+            path (str): Directory holding the index.
+            mmap (bool): Map the vectors read-only instead of reading them.
+
+        Returns:
+            EmbeddingIndex: The loaded index.
+        """
+        vectors = np.load(os.path.join(path, VECTORS_FILE), mmap_mode="r" if mmap else None)
+        with open(os.path.join(path, IDS_FILE), encoding="utf-8") as f:
+            ids = json.load(f)
+        index = cls(vectors.shape[1], capacity=0)
+        index._vectors = vectors  # pylint: disable=protected-access
+        index._size = len(vectors)  # pylint: disable=protected-access
+        index.ids = ids
+        return index
+
+
+def build_index(embedder, paths, batch_size=32):
+    """Embed image files in batches and return an index keyed by path.
+
+    Args:
+        embedder (Embedder): Embedder with an attached model.
+        paths (list): Image files.
+        batch_size (int): Images per forward pass.
+
+    Returns:
+        EmbeddingIndex: Index of every decodable image.
+
+    Raises:
+        ValueError: If none of the images could be decoded.
+    """
+    from model import preprocess_images  # pylint: disable=import-outside-toplevel
+
+    index = None
+    for start in range(0, len(paths), batch_size):
+        chunk = paths[start:start + batch_size]
+        images, indices, _ = preprocess_images(chunk)
+        if not indices:
+            continue
+        vectors = embedder.embed(images)
+        if index is None:
+            index = EmbeddingIndex(vectors.shape[1], capacity=len(paths))
+        index.add(vectors, [chunk[i] for i in indices])
+    if index is None:
+        reason = f"none of the {len(paths)} images could be decoded" if paths else "no images were given"
+        raise ValueError(f"Nothing was indexed: {reason}")
+    return index
+
+
+def main():
+    """Embed a labelled image folder and save the index."""
+    from model import load_model  # pylint: disable=import-outside-toplevel
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("images", help="Directory of <label>/<image> files")
+    parser.add_argument("-o", "--output", default="embedding_index", help="Index directory to write")
+    parser.add_argument("--model", default="digit_model.h5", help="Keras model to take embeddings from")
+    parser.add_argument("--batch-size", type=int, default=32, help="Images per forward pass")
+    args = parser.parse_args()
+
+    embedder = Embedder(load_model(args.model), buckets=(args.batch_size,))
+    try:
+        index = build_index(embedder, [path for path, _ in list_labelled_images(args.images)], args.batch_size)
+    except ValueError as e:
+        parser.error(str(e))
+    index.save(args.output)
+    print(f"Indexed {len(index)} images ({index.dim} dimensions) into {args.output}")
+
+
+if __name__ == "__main__":
+    main()
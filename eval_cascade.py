@@ -0,0 +1,130 @@
+"""Evaluate the confidence-gated cascade over a range of thresholds.
+
+Every labelled image is classified one at a time (batch size 1, as a single
+request would be) by the first-stage model and by the full model, and each
+call is timed. For every threshold, an image escalates when its first-stage
+top probability is below the threshold; its prediction is then the full
+model's and its latency is the sum of both stages. The table shows the
+escalation rate, accuracy and mean and p99 per-image latency, next to the
+first stage alone and the full model alone.
+
+A cheap first stage can be any file load_model accepts, e.g. the int8
+variant written by quantize.py.
+
+Usage:
+    python eval_cascade.py --first digit_model_int8.tflite [--full digit_model.h5]
+        [--images test_images] [--thresholds 0.5,0.7,0.8,0.9,0.95,0.99] [--repeats 3]
+        [--report cascade_report.json]
+"""
+
+# Standard library
+import argparse
+import json
+import statistics
+import time
+
+# Third-party
+import numpy as np
+
+# Your own modules
+from classify_dir import load_serving_model
+from datasets import list_labelled_images
+from model import preprocess_images
+
+
+def time_per_image(serving_model, images, repeats):
+    """Classify each image alone and return its probabilities and median latency.
+
+    Args:
+        serving_model: Object exposing ``predict(images)``.
+        images (np.ndarray): Preprocessed images of shape (N, 224, 224, 3).
+        repeats (int): Timed calls per image; the median is kept.
+
+    Returns:
+        tuple: (N, num_classes) probabilities and (N,) seconds per image.
+    """
+    probabilities, seconds = [], []
+    serving_model.predict(images[:1])
+    for i in range(len(images)):
+        timings = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            output = serving_model.predict(images[i:i + 1])
+            timings.append(time.perf_counter() - started)
+        probabilities.append(np.asarray(output)[0])
+        seconds.append(statistics.median(timings))
+    return np.array(probabilities), np.array(seconds)
+
+
+def summarize(name, predictions, labels, latencies, escalated):
+    """Return one table row of accuracy, escalation rate and latency statistics."""
+    return {
+        "config": name,
+        "escalation_rate": round(float(np.mean(escalated)), 4),
+        "accuracy": round(float(np.mean(predictions == labels)), 4),
+        "mean_ms": round(float(np.mean(latencies)) * 1000, 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 3),
+    }
+
+
+def evaluate_thresholds(first, full, labels, thresholds):
+    """Combine per-image stage results into cascade results for each threshold.
+
+    Args:
+        first (tuple): Probabilities and seconds per image of the first stage.
+        full (tuple): Probabilities and seconds per image of the full model.
+        labels (np.ndarray): True class of each image.
+        thresholds (list): First-stage confidence thresholds.
+
+    Returns:
+        list: Rows for the first stage alone, the full model alone and each threshold.
+    """
+    first_probs, first_seconds = first
+    full_probs, full_seconds = full
+    first_pred, full_pred = first_probs.argmax(axis=1), full_probs.argmax(axis=1)
+    confidence = first_probs.max(axis=1)
+    rows = [
+        summarize("first only", first_pred, labels, first_seconds, np.zeros(len(labels), dtype=bool)),
+        summarize("full only", full_pred, labels, full_seconds, np.ones(len(labels), dtype=bool)),
+    ]
+    for threshold in thresholds:
+        escalated = confidence < threshold
+        rows.append(summarize(
+            f"cascade@{threshold:g}",
+            np.where(escalated, full_pred, first_pred),
+            labels,
+            first_seconds + np.where(escalated, full_seconds, 0.0),
+            escalated,
+        ))
+    return rows
+
+
+def main():
+    """Time both stages on every image and print the threshold table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--first", required=True, help="Cheap first-stage model file")
+    parser.add_argument("--full", default="digit_model.h5", help="Full model file")
+    parser.add_argument("--images", default="test_images", help="Directory of <label>/<image> files")
+    parser.add_argument("--thresholds", default="0.5,0.7,0.8,0.9,0.95,0.99", help="Comma-separated thresholds")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed calls per image and model")
+    parser.add_argument("--report", default=None, help="Optional JSON file for the table")
+    args = parser.parse_args()
+
+    pairs = list_labelled_images(args.images)
+    images, indices, _ = preprocess_images([path for path, _ in pairs])
+    labels = np.array([pairs[i][1] for i in indices])
+    first = time_per_image(load_serving_model(args.first), images, args.repeats)
+    full = time_per_image(load_serving_model(args.full), images, args.repeats)
+    rows = evaluate_thresholds(first, full, labels, [float(t) for t in args.thresholds.split(",") if t])
+
+    print(f"{'config':<16}{'escalated':>10}{'accuracy':>10}{'mean ms':>10}{'p99 ms':>10}")
+    for row in rows:
+        print(f"{row['config']:<16}{row['escalation_rate']:>10.3f}{row['accuracy']:>10.3f}"
+              f"{row['mean_ms']:>10.3f}{row['p99_ms']:>10.3f}")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump({"first": args.first, "full": args.full, "images": len(labels), "results": rows}, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Classification of multi-frame images such as animated GIFs and multi-page TIFFs.
+
+Frames are decoded one at a time as they are needed, every ``stride``-th
+frame is kept, and kept frames are classified in fixed-size batches. An
+exponential moving average of the frame probabilities gives the overall
+prediction, and decoding stops once that prediction has stayed the same and
+confident for ``stable_frames`` frames in a row. Memory therefore depends on
+the batch size, and compute on the frames needed, rather than on the clip
+length.
+"""
+
+# Third-party
+import numpy as np
+from PIL import Image
+
+# Your own modules
+from model import predict_proba
+from preprocessing import INPUT_SIZE, MAX_DECODED_PIXELS, ImageTooLarge, preprocess_into
+
+
+def iter_frames(image, stride=1, max_frames=None, max_pixels=MAX_DECODED_PIXELS):
+    """Lazily yield the frame indices and opened frames of a (possibly animated) image.
+
+    Frames are decoded only when the consumer asks for them. Single-frame
+    images yield one frame.
+
+    Args:
+        image: A file-like object, a path or an already opened PIL image.
+        stride (int): Keep every ``stride``-th frame, starting with the first.
+        max_frames (int): Stop after this many kept frames, or None for all.
+        max_pixels (int): Largest decoded bitmap allowed per frame.
+
+    Yields:
+        tuple: ``(index, img)`` where ``img`` is positioned on frame ``index``.
+    """
+    if stride < 1:
+        raise ValueError("stride must be at least 1")
+    try:
+        img = image if isinstance(image, Image.Image) else Image.open(image)
+    except Image.DecompressionBombError as e:
+        raise ImageTooLarge(str(e)) from e
+    width, height = img.size
+    if max_pixels is not None and width * height > max_pixels:
+        raise ImageTooLarge(f"Image of {width}x{height} pixels exceeds the limit of {max_pixels} pixels")
+    kept = 0
+    index = 0
+    while max_frames is None or kept < max_frames:
+        try:
+            img.seek(index)
+        except EOFError:
+            return
+        yield index, img
+        kept += 1
+        index += stride
+
+
+class FrameSmoother:
+    """Exponential moving average of frame probabilities with a stability counter.
+
+    Args:
+        smoothing (float): Weight of the history in the average, in [0, 1).
+        confidence (float): Smoothed probability the leading class must reach
+            for a frame to count as stable.
+        stable_frames (int): Consecutive stable frames with the same leading
+            class after which the prediction is settled.
+    """
+
+    def __init__(self, smoothing=0.5, confidence=0.9, stable_frames=3):
+        self.smoothing = smoothing
+        self.confidence = confidence
+        self.stable_frames = stable_frames
+        self.probabilities = None
+        self.streak = 0
+
+    @property
+    def label(self):
+        """Leading class of the smoothed probabilities, or None before any frame."""
+        return None if self.probabilities is None else int(np.argmax(self.probabilities))
+
+    @property
+    def settled(self):
+        """Whether the prediction has been stable for ``stable_frames`` frames."""
+        return self.streak >= self.stable_frames
+
+    def update(self, probabilities):
+        """Fold one frame's probabilities into the average and update the streak."""
+        previous = self.label
+        if self.probabilities is None:
+            self.probabilities = np.asarray(probabilities, dtype=np.float32).copy()
+        else:
+            self.probabilities = self.smoothing * self.probabilities + (1 - self.smoothing) * probabilities
+        if self.probabilities[self.label] < self.confidence:
+            self.streak = 0
+        else:
+            self.streak = self.streak + 1 if self.label == previous else 1
+
+
+def _fill_batch(frames, batch, max_pixels):
+    # Preprocess the next frames into ``batch``; returns their indices
+    indices = []
+    for index, img in frames:
+        preprocess_into(img, batch[len(indices)], max_pixels=max_pixels)
+        indices.append(index)
+        if len(indices) == len(batch):
+            break
+    return indices
+
+
+def classify_frames(serving_model, image, *, stride=1, batch_size=8, max_frames=None,
+                    smoother=None, max_pixels=MAX_DECODED_PIXELS):
+    """Classify the frames of a multi-frame image in batches, stopping once the result is stable.
+
+    Args:
+        serving_model: Object exposing ``predict(images)``.
+        image: A file-like object, a path or an already opened PIL image.
+        stride (int): Classify every ``stride``-th frame.
+        batch_size (int): Frames per forward pass.
+        max_frames (int): Most frames classified, or None for no limit.
+        smoother (FrameSmoother): Smoothing and early-stop settings; defaults
+            to FrameSmoother().
+        max_pixels (int): Largest decoded bitmap allowed per frame.
+
+    Returns:
+        dict: ``label`` and ``probabilities`` of the smoothed prediction,
+        ``frames`` (index, label and confidence of every classified frame up
+        to the one that settled it) and whether the prediction ``settled``
+        (if so, no later frames were decoded).
+    """
+    smoother = smoother or FrameSmoother()
+    frames = iter_frames(image, stride, max_frames, max_pixels)
+    batch = np.empty((batch_size, *INPUT_SIZE, 3), dtype=np.float32)
+    results = []
+    while not smoother.settled:
+        indices = _fill_batch(frames, batch, max_pixels)
+        if not indices:
+            break
+        for index, probs in zip(indices, predict_proba(serving_model, batch[:len(indices)], batch_size)):
+            smoother.update(probs)
+            results.append({"index": index, "label": int(np.argmax(probs)), "confidence": float(np.max(probs))})
+            if smoother.settled:
+                break
+    if not results:
+        raise ValueError("Image has no frames to classify")
+    frames.close()
+    return {
+        "label": smoother.label,
+        "probabilities": smoother.probabilities.tolist(),
+        "frames": results,
+        "settled": smoother.settled,
+    }
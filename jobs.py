@@ -0,0 +1,436 @@
+"""Asynchronous classification jobs backed by a SQLite queue.
+
+A job is a set of uploaded images, written to disk one file per image and
+recorded in SQLite with one row per image, so submitted work survives
+restarts. JobRunner threads claim pending images in submission order,
+across jobs, in batches, classify them and store each result. Per-job
+counters give progress, throughput and failures. A claim is a lease: images
+whose claim is older than the lease, because the process classifying them
+stopped, are claimed again by whichever process next asks for work.
+"""
+
+# Standard library
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+import zipfile
+
+PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    total INTEGER NOT NULL,
+    done INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS items (
+    job_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT,
+    finished_seq INTEGER,
+    claimed REAL,
+    PRIMARY KEY (job_id, idx)
+);
+CREATE INDEX IF NOT EXISTS items_status ON items (status);
+CREATE INDEX IF NOT EXISTS items_finished ON items (job_id, finished_seq);
+CREATE TABLE IF NOT EXISTS finished_counter (value INTEGER NOT NULL);
+"""
+
+
+class SubmissionTooLarge(Exception):
+    """Raised when a submission holds too many images or too many bytes."""
+
+
+def expand_uploads(uploads, max_images, max_bytes, max_total_bytes=sys.maxsize):
+    """Yield ``(name, stream)`` for every image in the uploads, unpacking zip archives.
+
+    Sizes are checked against the archive headers, so an archive that
+    declares too much is rejected before anything is decompressed; the
+    headers can lie, so JobStore.submit counts the bytes it really writes.
+
+    Args:
+        uploads (list): ``(filename, stream)`` pairs; zip archives are
+            replaced by their file members.
+        max_images (int): Most images accepted in one submission.
+        max_bytes (int): Largest uncompressed archive member accepted.
+        max_total_bytes (int): Most uncompressed archive bytes accepted in
+            one submission.
+
+    Yields:
+        tuple: Image name and a readable binary stream.
+
+    Raises:
+        SubmissionTooLarge: If the limits are exceeded.
+    """
+    count = total = 0
+    for filename, stream in uploads:
+        if zipfile.is_zipfile(stream):
+            stream.seek(0)
+            with zipfile.ZipFile(stream) as archive:
+                for info in archive.infolist():
+                    if info.is_dir():
+                        continue
+                    if info.file_size > max_bytes:
+                        raise SubmissionTooLarge(f"Archive member {info.filename} exceeds {max_bytes} bytes.")
+                    total += info.file_size
+                    if total > max_total_bytes:
+                        raise SubmissionTooLarge(f"A job holds at most {max_total_bytes} bytes.")
+                    count += 1
+                    if count > max_images:
+                        raise SubmissionTooLarge(f"A job holds at most {max_images} images.")
+                    with archive.open(info) as member:
+                        yield info.filename, member
+            continue
+        stream.seek(0)
+        count += 1
+        if count > max_images:
+            raise SubmissionTooLarge(f"A job holds at most {max_images} images.")
+        yield filename, stream
+
+
+def copy_at_most(stream, f, limit):
+    """Copy ``stream`` into ``f`` until it ends or more than ``limit`` bytes were read.
+
+    Returns:
+        int: Bytes copied; more than ``limit`` means the stream was cut short.
+    """
+    copied = 0
+    while copied <= limit:
+        chunk = stream.read(min(COPY_CHUNK_SIZE, limit + 1 - copied))
+        if not chunk:
+            break
+        f.write(chunk)
+        copied += len(chunk)
+    return copied
+
+
+class JobStore:
+    """Persistent job queue: image files under ``upload_dir``, state in SQLite.
+
+    Several processes may share one store; each image is claimed by one of
+    them at a time.
+
+    Args:
+        db_path (str): SQLite database file, created if missing.
+        upload_dir (str): Directory for queued image files.
+        lease_seconds (float): How long a claim lasts before its images may
+            be claimed again; longer than any batch takes to classify.
+    """
+
+    def __init__(self, db_path, upload_dir, lease_seconds=300.0):
+        self.upload_dir = upload_dir
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+            if "claimed" not in {row["name"] for row in self._conn.execute("PRAGMA table_info(items)")}:
+                # Databases created before claims were leased
+                self._conn.execute("ALTER TABLE items ADD COLUMN claimed REAL")
+            # One counter row shared by every process, seeded from databases that predate it
+            self._conn.execute(
+                "INSERT INTO finished_counter SELECT COALESCE(MAX(finished_seq), 0) FROM items"
+                " WHERE NOT EXISTS (SELECT 1 FROM finished_counter)"
+            )
+
+    def submit(self, images, max_image_bytes=sys.maxsize, max_total_bytes=sys.maxsize):
+        """Queue a new job holding ``images``.
+
+        The files are written first and the job is recorded in one
+        transaction, so a job is either fully queued or absent. The limits
+        count the bytes actually written, whatever archive headers declared.
+
+        Args:
+            images: Iterable of ``(name, stream)`` pairs.
+            max_image_bytes (int): Largest image accepted.
+            max_total_bytes (int): Most bytes accepted across the job.
+
+        Returns:
+            str: The new job's ID.
+
+        Raises:
+            ValueError: If ``images`` is empty.
+            SubmissionTooLarge: If an image or the job exceeds its limit.
+        """
+        job_id = uuid.uuid4().hex
+        job_dir = os.path.join(self.upload_dir, job_id)
+        os.makedirs(job_dir)
+        names = []
+        total = 0
+        try:
+            for idx, (name, stream) in enumerate(images):
+                limit = min(max_image_bytes, max_total_bytes - total)
+                with open(os.path.join(job_dir, str(idx)), "wb") as f:
+                    copied = copy_at_most(stream, f, limit)
+                if copied > max_image_bytes:
+                    raise SubmissionTooLarge(f"Image {name} exceeds {max_image_bytes} bytes.")
+                if copied > limit:
+                    raise SubmissionTooLarge(f"A job holds at most {max_total_bytes} bytes.")
+                total += copied
+                names.append(name)
+            if not names:
+                raise ValueError("The submission holds no images.")
+        except BaseException:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, created, total) VALUES (?, ?, ?)", (job_id, time.time(), len(names))
+            )
+            self._conn.executemany(
+                "INSERT INTO items (job_id, idx, name, status) VALUES (?, ?, ?, ?)",
+                [(job_id, idx, name, PENDING) for idx, name in enumerate(names)],
+            )
+        return job_id
+
+    def claim(self, limit):
+        """Mark up to ``limit`` of the oldest claimable images as running and return them.
+
+        Pending images are claimable, and so are running images whose claim
+        is older than ``lease_seconds``. Selecting and marking happen in one
+        write transaction, so processes sharing the database never claim the
+        same image at once.
+
+        Returns:
+            list: ``(job_id, idx, path)`` tuples.
+        """
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            now = time.time()
+            rows = self._conn.execute(
+                "SELECT job_id, idx FROM items WHERE status = ? OR (status = ? AND COALESCE(claimed, 0) < ?)"
+                " ORDER BY rowid LIMIT ?",
+                (PENDING, RUNNING, now - self.lease_seconds, limit),
+            ).fetchall()
+            for job_id, idx in rows:
+                self._conn.execute(
+                    "UPDATE items SET status = ?, claimed = ? WHERE job_id = ? AND idx = ?", (RUNNING, now, job_id, idx)
+                )
+                self._conn.execute("UPDATE jobs SET started = COALESCE(started, ?) WHERE id = ?", (now, job_id))
+        return [(job_id, idx, os.path.join(self.upload_dir, job_id, str(idx))) for job_id, idx in rows]
+
+    def release(self, items):
+        """Return claimed images to the queue, e.g. when the model could not be loaded."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE items SET status = ? WHERE job_id = ? AND idx = ? AND status = ?",
+                [(PENDING, job_id, idx, RUNNING) for job_id, idx, _ in items],
+            )
+
+    def complete(self, items, results):
+        """Store the result of each claimed image and delete its file.
+
+        Completion sequence numbers come from a counter in the database and
+        are taken and committed in one write transaction, so processes
+        sharing the store never repeat them and readers see them in order.
+
+        Args:
+            items (list): ``(job_id, idx, path)`` tuples from claim.
+            results (list): One dict per item; those with an ``error`` key
+                count as failures.
+        """
+        finished_jobs = set()
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            now = time.time()
+            seq = self._conn.execute("SELECT value FROM finished_counter").fetchone()[0]
+            for (job_id, idx, _), result in zip(items, results):
+                failed = "error" in result
+                seq += 1
+                updated = self._conn.execute(
+                    "UPDATE items SET status = ?, result = ?, finished_seq = ?"
+                    " WHERE job_id = ? AND idx = ? AND status = ?",
+                    (FAILED if failed else DONE, json.dumps(result), seq, job_id, idx, RUNNING),
+                ).rowcount
+                if not updated:
+                    # The job was deleted while its images were being classified
+                    continue
+                column = "failed" if failed else "done"
+                self._conn.execute(f"UPDATE jobs SET {column} = {column} + 1 WHERE id = ?", (job_id,))
+                if self._conn.execute(
+                    "UPDATE jobs SET finished = ? WHERE id = ? AND done + failed = total", (now, job_id)
+                ).rowcount:
+                    finished_jobs.add(job_id)
+            self._conn.execute("UPDATE finished_counter SET value = ?", (seq,))
+        for _, _, path in items:
+            if os.path.exists(path):
+                os.remove(path)
+        for job_id in finished_jobs:
+            shutil.rmtree(os.path.join(self.upload_dir, job_id), ignore_errors=True)
+
+    def status(self, job_id):
+        """Return the progress, throughput and failure count of a job.
+
+        Returns:
+            dict: Job state, or None if there is no such job.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        processed = row["done"] + row["failed"]
+        if row["finished"] is not None:
+            state = DONE
+        elif row["started"] is not None:
+            state = RUNNING
+        else:
+            state = PENDING
+        elapsed = (row["finished"] or time.time()) - row["started"] if row["started"] else 0.0
+        return {
+            "id": job_id,
+            "status": state,
+            "total": row["total"],
+            "done": row["done"],
+            "failed": row["failed"],
+            "pending": row["total"] - processed,
+            "progress": processed / row["total"] if row["total"] else 1.0,
+            "images_per_second": round(processed / elapsed, 3) if elapsed > 0 else 0.0,
+            "created": row["created"],
+            "started": row["started"],
+            "finished": row["finished"],
+        }
+
+    def results(self, job_id, after=0, limit=None):
+        """Return a job's results in completion order, from after the cursor ``after``.
+
+        Returns:
+            tuple: List of result dicts (with ``index`` and ``filename``) and
+            the cursor to pass next time.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT idx, name, result, finished_seq FROM items WHERE job_id = ? AND finished_seq > ?"
+                " ORDER BY finished_seq LIMIT ?",
+                (job_id, after, -1 if limit is None else limit),
+            ).fetchall()
+        results = [{"index": row["idx"], "filename": row["name"], **json.loads(row["result"])} for row in rows]
+        return results, rows[-1]["finished_seq"] if rows else after
+
+    def delete(self, job_id):
+        """Delete a job, its results and its queued files.
+
+        Returns:
+            bool: Whether the job existed.
+        """
+        with self._lock, self._conn:
+            deleted = self._conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,)).rowcount
+            self._conn.execute("DELETE FROM items WHERE job_id = ?", (job_id,))
+        shutil.rmtree(os.path.join(self.upload_dir, job_id), ignore_errors=True)
+        return bool(deleted)
+
+    def queued(self):
+        """Return the number of images waiting to be classified, across jobs."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM items WHERE status = ?", (PENDING,)).fetchone()[0]
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class JobRunner:
+    """Background threads that drain a JobStore in batches.
+
+    Args:
+        store (JobStore): Queue to drain.
+        classify (callable): Takes a list of image paths and returns one
+            result dict per path (with ``error`` for images that failed).
+        batch_size (int): Most images classified per call.
+        workers (int): Number of threads.
+        poll_interval (float): Seconds to wait when the queue is empty, and
+            before retrying after ``classify`` raised.
+    """
+
+    def __init__(self, store, classify, batch_size=32, workers=1, poll_interval=1.0):
+        self.store = store
+        self.classify = classify
+        self.batch_size = batch_size
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._counts = {"batches": 0, "images": 0, "errors": 0, "last_error": None}
+
+    def start(self):
+        """Start the worker threads."""
+        self._stop.clear()
+        for _ in range(self.workers):
+            thread = threading.Thread(target=self._run, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def wake(self):
+        """Make idle workers check the queue now, e.g. after a submission."""
+        self._wake.set()
+
+    def close(self):
+        """Stop the workers after their current batch."""
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def run_once(self):
+        """Claim and classify one batch.
+
+        Returns:
+            int: Number of images processed (0 if the queue was empty).
+        """
+        items = self.store.claim(self.batch_size)
+        if not items:
+            return 0
+        try:
+            results = self.classify([path for _, _, path in items])
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            # Keep the images queued; a model that is still loading or failed to load is retried later
+            self.store.release(items)
+            with self._lock:
+                self._counts["errors"] += 1
+                self._counts["last_error"] = f"{type(e).__name__}: {e}"
+            raise
+        self.store.complete(items, results)
+        with self._lock:
+            self._counts["batches"] += 1
+            self._counts["images"] += len(items)
+        return len(items)
+
+    def stats(self):
+        """Return batch, image and error counts and the queue depth.
+
+        Returns:
+            dict: Worker count, processed batches and images, classify
+            errors, the last error message and images still queued.
+        """
+        with self._lock:
+            counts = dict(self._counts)
+        return {"workers": len(self._threads), **counts, "queued": self.store.queued()}
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                processed = self.run_once()
+            except Exception:  # pylint: disable=broad-exception-caught
+                self._stop.wait(self.poll_interval)
+                continue
+            if not processed:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
@@ -0,0 +1,106 @@
+"""Background model loading with readiness reporting."""
+
+# Standard library
+import contextlib
+import threading
+import time
+
+
+class ModelNotReady(Exception):
+    """Raised when the model is not available to serve a request."""
+
+
+class ModelLoader:
+    """Build the serving model off the request path and report its progress.
+
+    ``build`` receives the loader so it can time its phases with ``phase``
+    (for example TensorFlow import, model load and warm-up); the timings are
+    reported by ``status``.
+
+    Args:
+        build (callable): Function taking the loader and returning the model.
+    """
+
+    PENDING = "pending"
+    LOADING = "loading"
+    READY = "ready"
+    FAILED = "failed"
+
+    def __init__(self, build):
+        self._build = build
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._thread = None
+        self.state = self.PENDING
+        self.error = None
+        self.model = None
+        self.timings = {}
+
+    def start(self, background=True):
+        """Start loading unless it has already started.
+
+        Args:
+            background (bool): Load on a daemon thread instead of blocking.
+        """
+        with self._lock:
+            if self.state != self.PENDING:
+                return
+            self.state = self.LOADING
+            if background:
+                self._thread = threading.Thread(target=self._load, name="model-loader", daemon=True)
+                self._thread.start()
+                return
+        self._load()
+
+    def get(self, timeout=None):
+        """Return the loaded model, starting the load if it has not begun.
+
+        Args:
+            timeout (float): Seconds to wait for loading, or None to block.
+
+        Returns:
+            The serving model.
+
+        Raises:
+            ModelNotReady: If loading failed or did not finish in time.
+        """
+        self.start()
+        if not self._done.wait(timeout):
+            raise ModelNotReady("Model is still loading")
+        if self.state == self.FAILED:
+            raise ModelNotReady(f"Model failed to load: {self.error}")
+        return self.model
+
+    @property
+    def ready(self):
+        """Whether the model has loaded successfully."""
+        return self.state == self.READY
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Record the wall time of one loading phase under ``name``."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round(time.perf_counter() - started, 4)
+
+    def status(self):
+        """Return the loading state, error and per-phase timings.
+
+        Returns:
+            dict: JSON-serializable loading status.
+        """
+        return {"state": self.state, "error": self.error, "timings_seconds": dict(self.timings)}
+
+    def _load(self):
+        try:
+            with self.phase("total"):
+                self.model = self._build(self)
+            self.state = self.READY
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            # Keep the process alive so /healthz can report what went wrong
+            self.error = f"{type(e).__name__}: {e}"
+            self.state = self.FAILED
+        finally:
+            self._done.set()
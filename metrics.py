@@ -0,0 +1,135 @@
+"""In-process latency histograms and counters exposed in Prometheus text format."""
+
+# Standard library
+import bisect
+import contextlib
+import threading
+import time
+
+# Histogram bucket upper bounds in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        (key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in pairs
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+class Histogram:
+    """Fixed-bucket histogram; recording is one bisect and two additions.
+
+    Args:
+        buckets (tuple): Sorted bucket upper bounds; +Inf is implied.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        """Record one value."""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    @property
+    def count(self):
+        """Total number of recorded values."""
+        return sum(self.counts)
+
+
+class MetricsRegistry:
+    """Thread-safe collection of labelled histograms and counters.
+
+    Args:
+        buckets (tuple): Bucket upper bounds used for every histogram.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._histograms = {}
+        self._counters = {}
+        self._help = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name, help_text):
+        """Set the HELP line printed for metric ``name``."""
+        self._help[name] = help_text
+
+    def observe(self, name, value, **labels):
+        """Record ``value`` in the histogram ``name`` with the given labels."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def inc(self, name, amount=1, **labels):
+        """Add ``amount`` to the counter ``name`` with the given labels."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    @contextlib.contextmanager
+    def time(self, name, **labels):
+        """Record the duration of the ``with`` block in seconds if it completes."""
+        started = time.perf_counter()
+        yield
+        self.observe(name, time.perf_counter() - started, **labels)
+
+    def histogram(self, name, **labels):
+        """Return a copy of one histogram's bucket counts and sum, or None."""
+        with self._lock:
+            histogram = self._histograms.get(name, {}).get(tuple(sorted(labels.items())))
+            if histogram is None:
+                return None
+            return {"counts": list(histogram.counts), "sum": histogram.sum}
+
+    def counter(self, name, **labels):
+        """Return the current value of one counter (0 if never incremented)."""
+        with self._lock:
+            return self._counters.get(name, {}).get(tuple(sorted(labels.items())), 0)
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: Text suitable for a /metrics endpoint.
+        """
+        with self._lock:
+            histograms = {
+                name: {key: (list(h.counts), h.sum) for key, h in series.items()}
+                for name, series in self._histograms.items()
+            }
+            counters = {name: dict(series) for name, series in self._counters.items()}
+
+        lines = []
+        for name, series in sorted(histograms.items()):
+            lines.extend(self._header(name, "histogram"))
+            for key, (counts, total) in sorted(series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{name}_bucket{_format_labels(key, [('le', le)])} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(key)} {total!r}")
+                lines.append(f"{name}_count{_format_labels(key)} {cumulative}")
+        for name, series in sorted(counters.items()):
+            lines.extend(self._header(name, "counter"))
+            for key, value in sorted(series.items()):
+                lines.append(f"{name}{_format_labels(key)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def _header(self, name, kind):
+        if name in self._help:
+            yield f"# HELP {name} {self._help[name]}"
+        yield f"# TYPE {name} {kind}"
@@ -1,38 +1,96 @@
 """Model loading and prediction logic."""
 
+# Standard library
+import importlib
+
 # Third-party
 import numpy as np
-from keras.models import load_model as keras_load_model
-from keras.utils import img_to_array
-from PIL import Image
+
+# Your own modules
+from backends import BACKENDS, backend_for_path
+from preprocessing import MAX_DECODED_PIXELS, decode_image, normalize_into, preprocess_into
 
 
-def load_model(path):
+def load_model(path, backend=None):
     """Load and return the ML model from the given path.
 
+    TensorFlow is imported on first use, so importing this module stays
+    cheap. Keras models are loaded without their training configuration,
+    which serving does not need.
+
     Args:
-        path (str): Path to the saved model file (e.g., 'digit_model.h5').
+        path (str): Path to the saved model file (e.g., 'digit_model.h5'),
+            a '.npz' file written by save_fast_model or a '.tflite' file.
+        backend (str): Backend name from backends.BACKENDS, or None to pick
+            one from the file extension.
 
     Returns:
-        keras.Model: Loaded Keras model.
+        Loaded model exposing ``predict(images)`` (a keras.Model for the
+        'keras' backend).
     """
-    return keras_load_model(path)
+    return BACKENDS[backend or backend_for_path(path)](path)
+
 
+def save_fast_model(model, path):
+    """Save a model as architecture JSON plus raw weight arrays in one '.npz'.
+
+    Loading this format skips HDF5 parsing and optimizer restoration, which
+    dominate load_model time for '.h5' files.
+
+    Args:
+        model (keras.Model): Model to save.
+        path (str): Destination path ending in '.npz'.
+    """
+    weights = model.get_weights()
+    arrays = {f"w{i}": w for i, w in enumerate(weights)}
+    np.savez(path, config=np.array(model.to_json()), num_weights=np.array(len(weights)), **arrays)
 
-def preprocess_image(image):
+
+def save_tflite_model(model, path, quantization=None, representative_images=None):
+    """Convert a Keras model to a '.tflite' flatbuffer, optionally quantized.
+
+    Args:
+        model (keras.Model): Model to convert.
+        path (str): Destination path ending in '.tflite'.
+        quantization (str): None for float32, 'float16' for float16 weights,
+            'dynamic' for int8 weights with float activations, or 'int8' for
+            int8 weights and activations (inputs and outputs stay float32).
+        representative_images (np.ndarray): Preprocessed images used to
+            calibrate activation ranges; required for 'int8'.
+    """
+    tf = importlib.import_module("tensorflow")
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantization is not None:
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == "int8":
+        if representative_images is None:
+            raise ValueError("int8 quantization needs representative_images")
+        converter.representative_dataset = lambda: ([image[np.newaxis]] for image in representative_images)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    elif quantization not in (None, "dynamic"):
+        raise ValueError(f"Unknown quantization: {quantization}")
+    with open(path, "wb") as f:
+        f.write(converter.convert())
+
+
+def preprocess_image(image, out=None, resample="bicubic", draft=True, max_pixels=MAX_DECODED_PIXELS):
     """Prepare an image for model prediction.
 
     Args:
-        image: A file-like object or path to the image.
+        image: A file-like object, path or PIL image.
+        out (np.ndarray): Optional float32 buffer of shape (1, 224, 224, 3)
+            to fill instead of allocating a new array.
+        resample (str): Name of the resample filter (see RESAMPLE_FILTERS).
+        draft (bool): Whether to decode large JPEGs at a reduced scale.
+        max_pixels (int): Largest decoded bitmap allowed; larger images raise
+            preprocessing.ImageTooLarge before their pixels are decoded.
 
     Returns:
         np.ndarray: Preprocessed image array ready for model input.
     """
-    op_img = Image.open(image)
-    img_resize = op_img.resize((224, 224))
-    img2arr = img_to_array(img_resize) / 255.0
-    img_reshape = img2arr.reshape(1, 224, 224, 3)
-    return img_reshape
+    return preprocess_into(image, out, resample, draft, max_pixels).reshape(1, 224, 224, 3)
 
 
 def predict_result(model, image):
@@ -47,3 +105,51 @@ def predict_result(model, image):
     """
     pred = model.predict(image)
     return np.argmax(pred[0], axis=-1)
+
+
+def preprocess_images(images, max_pixels=MAX_DECODED_PIXELS):
+    """Prepare many images for model prediction in one contiguous batch.
+
+    Each image is decoded, converted to RGB, resized and normalized straight
+    into its row of a preallocated float32 array, so no per-image (1, ...)
+    arrays are built and concatenated. Images that cannot be decoded are
+    skipped and reported instead of failing the whole batch.
+
+    Args:
+        images (list): File-like objects or paths to the images.
+        max_pixels (int): Largest decoded bitmap allowed per image.
+
+    Returns:
+        tuple: A (N, 224, 224, 3) float32 array holding the decodable images
+        in input order, the input indices of its rows, and a dict mapping the
+        input index of each failed image to its error.
+    """
+    batch = np.empty((len(images), 224, 224, 3), dtype=np.float32)
+    indices = []
+    errors = {}
+    for i, image in enumerate(images):
+        try:
+            img_resize = decode_image(image, max_pixels=max_pixels)
+        except OSError as e:  # also covers FileNotFoundError, UnidentifiedImageError and ImageTooLarge
+            errors[i] = e
+            continue
+        normalize_into(img_resize, batch[len(indices)])
+        indices.append(i)
+    return batch[:len(indices)], indices, errors
+
+
+def predict_proba(model, images, batch_size=32):
+    """Predict class probabilities for a batch of preprocessed images.
+
+    Args:
+        model (keras.Model): Loaded Keras model.
+        images (np.ndarray): Preprocessed images of shape (N, 224, 224, 3).
+        batch_size (int): Number of images per forward pass.
+
+    Returns:
+        np.ndarray: Class probabilities of shape (N, num_classes).
+    """
+    chunks = [model.predict(images[start:start + batch_size]) for start in range(0, len(images), batch_size)]
+    if not chunks:
+        return np.empty((0, 0), dtype=np.float32)
+    return np.concatenate(chunks, axis=0)
@@ -0,0 +1,186 @@
+"""Fast image decoding and normalization into model-ready buffers."""
+
+# Standard library
+import threading
+
+# Third-party
+import numpy as np
+from PIL import Image
+
+# Spatial size expected by the model
+INPUT_SIZE = (224, 224)
+
+# Resample filters selectable by name
+RESAMPLE_FILTERS = {
+    "nearest": Image.Resampling.NEAREST,
+    "box": Image.Resampling.BOX,
+    "bilinear": Image.Resampling.BILINEAR,
+    "hamming": Image.Resampling.HAMMING,
+    "bicubic": Image.Resampling.BICUBIC,
+    "lanczos": Image.Resampling.LANCZOS,
+}
+
+# Draft decoding keeps at least this multiple of the target size so the
+# resample filter still has real pixels to average over
+DRAFT_OVERSAMPLE = 2
+
+# Background used when flattening transparent images
+ALPHA_BACKGROUND = (255, 255, 255)
+
+# Largest bitmap, after reduced-scale decoding, that open_image will decode
+MAX_DECODED_PIXELS = 25_000_000
+
+
+class ImageTooLarge(OSError):
+    """Raised when an image's header declares more pixels than allowed."""
+
+
+class BufferPool:
+    """Thread-safe pool of reusable float32 image buffers.
+
+    Args:
+        shape (tuple): Shape of each buffer.
+        capacity (int): Maximum number of idle buffers kept for reuse.
+    """
+
+    def __init__(self, shape=(1, *INPUT_SIZE, 3), capacity=32):
+        self.shape = tuple(shape)
+        self.capacity = capacity
+        self._free = []
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Return an idle buffer, allocating a new one if none is available."""
+        with self._lock:
+            if self._free:
+                return self._free.pop()
+        return np.empty(self.shape, dtype=np.float32)
+
+    def release(self, buffer):
+        """Hand a buffer back to the pool once its contents are no longer needed."""
+        if buffer.shape != self.shape or buffer.dtype != np.float32:
+            raise ValueError(f"Buffer must be float32 with shape {self.shape}")
+        with self._lock:
+            if len(self._free) < self.capacity:
+                self._free.append(buffer)
+
+
+def to_rgb(img):
+    """Convert an image of any mode to RGB.
+
+    Palette images are expanded through their palette (keeping transparency),
+    transparent images are flattened onto ``ALPHA_BACKGROUND`` and everything
+    else goes through PIL's standard conversion.
+
+    Args:
+        img (PIL.Image.Image): Image to convert.
+
+    Returns:
+        PIL.Image.Image: RGB image.
+    """
+    if img.mode == "RGB":
+        return img
+    if img.mode == "P":
+        img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+    if img.mode in ("RGBA", "LA", "PA"):
+        rgba = img.convert("RGBA")
+        background = Image.new("RGBA", rgba.size, ALPHA_BACKGROUND + (255,))
+        return Image.alpha_composite(background, rgba).convert("RGB")
+    return img.convert("RGB")
+
+
+def open_image(image, size=INPUT_SIZE, draft=True, max_pixels=MAX_DECODED_PIXELS):
+    """Open and decode an image's pixels without resizing them.
+
+    With ``draft`` enabled, JPEGs much larger than ``size`` are decoded at a
+    reduced DCT scale. The dimensions in the header are checked against
+    ``max_pixels`` before any pixel data is decoded, so decompression bombs
+    are rejected after reading only the header.
+
+    Args:
+        image: A file-like object, a path or an already opened PIL image.
+        size (tuple): Target (width, height) the image will be resized to.
+        draft (bool): Whether to use reduced-scale decoding for large sources.
+        max_pixels (int): Largest decoded bitmap allowed, or None for no limit.
+
+    Returns:
+        PIL.Image.Image: The loaded image in its original mode.
+
+    Raises:
+        ImageTooLarge: If the (draft-reduced) image exceeds ``max_pixels``.
+    """
+    try:
+        img = image if isinstance(image, Image.Image) else Image.open(image)
+    except Image.DecompressionBombError as e:
+        raise ImageTooLarge(str(e)) from e
+    if draft:
+        img.draft(img.mode, (size[0] * DRAFT_OVERSAMPLE, size[1] * DRAFT_OVERSAMPLE))
+    width, height = img.size
+    if max_pixels is not None and width * height > max_pixels:
+        raise ImageTooLarge(f"Image of {width}x{height} pixels exceeds the limit of {max_pixels} pixels")
+    img.load()
+    return img
+
+
+def decode_image(image, size=INPUT_SIZE, resample="bicubic", draft=True, max_pixels=MAX_DECODED_PIXELS):
+    """Decode an image and resize it to ``size`` as an RGB PIL image.
+
+    With ``draft`` enabled, JPEGs much larger than ``size`` are decoded at a
+    reduced DCT scale and other formats are box-reduced before the final
+    resample, so the full-resolution bitmap is never materialized.
+
+    Args:
+        image: A file-like object, a path or an already opened PIL image.
+        size (tuple): Target (width, height).
+        resample (str): Name of the resample filter (see RESAMPLE_FILTERS).
+        draft (bool): Whether to use reduced-scale decoding for large sources.
+        max_pixels (int): Largest decoded bitmap allowed (see open_image).
+
+    Returns:
+        PIL.Image.Image: RGB image of the requested size.
+    """
+    img = open_image(image, size, draft, max_pixels)
+    reducing_gap = float(DRAFT_OVERSAMPLE) if draft else None
+    # Grayscale is cheaper to resize on one channel and expand afterwards
+    if img.mode != "L":
+        img = to_rgb(img)
+    if img.size != tuple(size):
+        img = img.resize(size, RESAMPLE_FILTERS[resample], reducing_gap=reducing_gap)
+    return to_rgb(img)
+
+
+def normalize_into(img, out):
+    """Write an RGB image into ``out`` as float32 values scaled to [0, 1].
+
+    The uint8 pixels are divided straight into ``out`` so no intermediate
+    float arrays are allocated.
+
+    Args:
+        img (PIL.Image.Image): RGB image whose size matches ``out``.
+        out (np.ndarray): float32 array of shape (H, W, 3) or (1, H, W, 3).
+
+    Returns:
+        np.ndarray: ``out``.
+    """
+    pixels = np.asarray(img, dtype=np.uint8)
+    np.divide(pixels, np.float32(255.0), out=out.reshape(pixels.shape))
+    return out
+
+
+def preprocess_into(image, out=None, resample="bicubic", draft=True, max_pixels=MAX_DECODED_PIXELS):
+    """Decode, resize and normalize an image into a float32 buffer.
+
+    Args:
+        image: A file-like object, a path or an already opened PIL image.
+        out (np.ndarray): Optional float32 buffer of shape (1, 224, 224, 3) or
+            (224, 224, 3), e.g. from a BufferPool. Allocated when omitted.
+        resample (str): Name of the resample filter (see RESAMPLE_FILTERS).
+        draft (bool): Whether to use reduced-scale decoding for large sources.
+        max_pixels (int): Largest decoded bitmap allowed (see open_image).
+
+    Returns:
+        np.ndarray: ``out`` filled with the preprocessed image.
+    """
+    if out is None:
+        out = np.empty((1, *INPUT_SIZE, 3), dtype=np.float32)
+    return normalize_into(decode_image(image, INPUT_SIZE, resample, draft, max_pixels), out)
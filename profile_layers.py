@@ -0,0 +1,159 @@
+"""Time each layer of a Keras model and report its FLOPs and activation memory.
+
+The model is run once to record the input of every layer, then each layer
+is timed on its own input as a compiled tf.function (median of --repeats
+calls after a warm-up). Layers of nested models, such as a transfer-learning
+base, are profiled individually under ``<model>/<layer>`` names. FLOPs
+count a multiply-add as two operations and are exact for convolutions and
+dense layers; other layers are estimated as one operation per output value.
+Activation memory is the size of the layer's output for the batch.
+
+Layers with the largest share of the time or FLOPs are the candidates for
+pruning or quantization.
+
+Usage:
+    python profile_layers.py [digit_model.h5] [--batch-size 1] [--repeats 20] [--report layer_report.json]
+"""
+
+# Standard library
+import argparse
+import importlib
+import json
+import statistics
+import time
+
+# Third-party
+import numpy as np
+
+# Your own modules
+from model import load_model
+from preprocessing import INPUT_SIZE
+
+
+def conv_flops(layer, inputs, outputs):
+    """Return 2 x multiply-adds of a Conv2D: each output value sums kh * kw * Cin / groups products."""
+    kernel_h, kernel_w = layer.kernel_size
+    channels_in = inputs.shape[-1] // getattr(layer, "groups", 1)
+    return 2 * int(np.prod(outputs.shape)) * kernel_h * kernel_w * channels_in
+
+
+def depthwise_flops(layer, _inputs, outputs):
+    """Return 2 x multiply-adds of a DepthwiseConv2D: kh * kw products per output value."""
+    kernel_h, kernel_w = layer.kernel_size
+    return 2 * int(np.prod(outputs.shape)) * kernel_h * kernel_w
+
+
+def dense_flops(_layer, inputs, outputs):
+    """Return 2 x multiply-adds of a Dense layer: one product per input feature per output value."""
+    return 2 * int(np.prod(outputs.shape)) * inputs.shape[-1]
+
+
+def pooling_flops(_layer, inputs, _outputs):
+    """Return one operation per input value, each read once by a pooling window."""
+    return int(np.prod(inputs.shape))
+
+
+# Exact counts by layer class; other layers cost one operation per output value
+FLOP_COUNTERS = {
+    "Conv2D": conv_flops,
+    "DepthwiseConv2D": depthwise_flops,
+    "Dense": dense_flops,
+    "GlobalAveragePooling2D": pooling_flops,
+    "GlobalMaxPooling2D": pooling_flops,
+    "AveragePooling2D": pooling_flops,
+    "MaxPooling2D": pooling_flops,
+}
+
+
+def time_layer(tf, layer, inputs, repeats):
+    """Return the output of ``layer`` on ``inputs`` and its median call time in seconds."""
+    call = tf.function(lambda x: layer(x, training=False))
+    outputs = call(inputs)
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        # .numpy() waits for the result, so the timing covers the whole computation
+        call(inputs).numpy()
+        timings.append(time.perf_counter() - started)
+    return outputs, statistics.median(timings)
+
+
+def profile_model(model, inputs, repeats, prefix=""):
+    """Profile every layer of ``model`` on ``inputs``, recursing into nested models.
+
+    Args:
+        model (keras.Model): Built model whose layers are each called once.
+        inputs: Batch fed to the model.
+        repeats (int): Timed calls per layer.
+        prefix (str): Prepended to layer names of nested models.
+
+    Returns:
+        list: One dict per layer with its name, type, output shape, parameter
+        count, FLOPs, activation bytes and median seconds.
+    """
+    tf = importlib.import_module("tensorflow")
+    layers = [layer for layer in model.layers if type(layer).__name__ != "InputLayer"]
+    # One pass records what every layer receives, so each can be timed alone; a
+    # nested model's latest call is the one made inside ``model``
+    recorder = tf.keras.Model(model.inputs, [layer.get_input_at(-1) for layer in layers])
+    layer_inputs = recorder(inputs, training=False)
+    if len(layers) == 1:
+        layer_inputs = [layer_inputs]
+
+    rows = []
+    for layer, layer_input in zip(layers, layer_inputs):
+        if isinstance(layer, tf.keras.Model):
+            rows.extend(profile_model(layer, layer_input, repeats, f"{prefix}{layer.name}/"))
+            continue
+        outputs, seconds = time_layer(tf, layer, layer_input, repeats)
+        kind = type(layer).__name__
+        counter = FLOP_COUNTERS.get(kind)
+        rows.append({
+            "layer": prefix + layer.name,
+            "type": kind,
+            "output_shape": list(outputs.shape),
+            "params": layer.count_params(),
+            "flops": counter(layer, layer_input, outputs) if counter else int(np.prod(outputs.shape)),
+            "activation_bytes": int(np.prod(outputs.shape)) * outputs.dtype.size,
+            "seconds": seconds,
+        })
+    return rows
+
+
+def add_shares(rows):
+    """Add each layer's share of the total time and FLOPs to ``rows`` in place."""
+    total_seconds = sum(row["seconds"] for row in rows) or 1.0
+    total_flops = sum(row["flops"] for row in rows) or 1
+    for row in rows:
+        row["time_share"] = round(row["seconds"] / total_seconds, 4)
+        row["flop_share"] = round(row["flops"] / total_flops, 4)
+    return rows
+
+
+def main():
+    """Profile every layer of a Keras model and print the cost table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("model", nargs="?", default="digit_model.h5", help="Keras model file")
+    parser.add_argument("--batch-size", type=int, default=1, help="Images per call")
+    parser.add_argument("--repeats", type=int, default=20, help="Timed calls per layer")
+    parser.add_argument("--report", default=None, help="Optional JSON file for the table")
+    args = parser.parse_args()
+
+    model = load_model(args.model, backend="keras")
+    # Layer costs do not depend on pixel values, so random images suffice
+    images = np.random.default_rng(0).random((args.batch_size, *INPUT_SIZE, 3), dtype=np.float32)
+    rows = add_shares(profile_model(model, images, args.repeats))
+
+    print(f"{'layer':<32}{'type':<24}{'params':>10}{'MFLOPs':>10}{'act KiB':>10}{'ms':>9}{'time %':>8}")
+    for row in rows:
+        print(f"{row['layer']:<32}{row['type']:<24}{row['params']:>10}{row['flops'] / 1e6:>10.2f}"
+              f"{row['activation_bytes'] / 1024:>10.1f}{row['seconds'] * 1000:>9.3f}{row['time_share'] * 100:>8.1f}")
+    print(f"{'total':<56}{sum(r['params'] for r in rows):>10}{sum(r['flops'] for r in rows) / 1e6:>10.2f}"
+          f"{sum(r['activation_bytes'] for r in rows) / 1024:>10.1f}{sum(r['seconds'] for r in rows) * 1000:>9.3f}")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump({"model": args.model, "batch_size": args.batch_size, "layers": rows}, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
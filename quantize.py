@@ -0,0 +1,192 @@
+"""Produce quantized TFLite variants of the model and report accuracy, size, memory and latency.
+
+Variants:
+    float32  - TFLite conversion without quantization
+    float16  - float16 weights
+    dynamic  - int8 weights, float activations
+    int8     - int8 weights and activations, calibrated on representative images
+
+Each variant (and the float32 Keras baseline) is evaluated in a fresh
+process on every labelled image, so resident memory is measured in
+isolation. The written '.tflite' files are served by setting
+FLASK_MODEL_PATH to one of them.
+
+Usage:
+    python quantize.py digit_model.h5 [--images test_images] [--output-dir .]
+        [--variants float32,float16,dynamic,int8] [--report quantization_report.json]
+        [--cache-dir .cache/test_images]
+
+Calibrating and evaluating on the same folder flatters int8 accuracy; pass
+--calibration-images to calibrate on a separate set. With --cache-dir the
+evaluation images are decoded once into a tensor cache shared by every
+variant's process.
+"""
+
+# Standard library
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import time
+
+# Third-party
+import numpy as np
+
+# Your own modules
+from backends import backend_for_path
+from datasets import list_labelled_images
+from model import load_model, preprocess_images, save_tflite_model
+from sysinfo import child_result, rss_kib
+from tensor_cache import TensorCache, build_cache, normalize_batch
+
+VARIANTS = ("float32", "float16", "dynamic", "int8")
+
+
+def write_variants(source, output_dir, variants, calibration_root):
+    """Convert ``source`` into each requested TFLite variant.
+
+    Args:
+        source (str): Keras model file.
+        output_dir (str): Directory for the '.tflite' files.
+        variants (list): Names from VARIANTS.
+        calibration_root (str): Labelled image folder for int8 calibration.
+
+    Returns:
+        dict: Variant name to written file path.
+    """
+    keras_model = load_model(source)
+    calibration = None
+    if "int8" in variants:
+        calibration, _, _ = preprocess_images([path for path, _ in list_labelled_images(calibration_root)])
+    stem = os.path.splitext(os.path.basename(source))[0]
+    paths = {}
+    for variant in variants:
+        path = os.path.join(output_dir, f"{stem}_{variant}.tflite")
+        save_tflite_model(keras_model, path, None if variant == "float32" else variant, calibration)
+        paths[variant] = path
+    return paths
+
+
+def _evaluation_images(image_root, cache_dir):
+    # Returns images, labels and the function turning a slice of images into
+    # model input: cached uint8 rows are scaled per call, floats pass through
+    if not cache_dir:
+        pairs = list_labelled_images(image_root)
+        images, indices, _ = preprocess_images([p for p, _ in pairs])
+        return images, np.array([pairs[i][1] for i in indices]), lambda batch: batch
+    dataset = TensorCache(cache_dir)
+    buffer = np.empty((1, *dataset.images.shape[1:]), dtype=np.float32)
+    return dataset.images, dataset.labels, lambda batch: normalize_batch(batch, buffer)
+
+
+def evaluate_model(path, image_root, cache_dir=None):
+    """Measure accuracy, memory and single-image latency of one model file.
+
+    Args:
+        path (str): Model file loadable by model.load_model.
+        image_root (str): Labelled image folder.
+        cache_dir (str): Tensor cache of ``image_root`` to read instead of
+            decoding the images, or None.
+
+    Returns:
+        dict: Accuracy overall and per class, size on disk, RSS growth after
+        load and p50/p99 single-image latency in milliseconds.
+    """
+    # Import TensorFlow first so its own footprint is excluded from the memory delta
+    importlib.import_module("tensorflow")
+    images, labels, to_input = _evaluation_images(image_root, cache_dir)
+
+    before = rss_kib()
+    serving_model = load_model(path)
+    if backend_for_path(path) == "keras":
+        # Keras is measured the way it is served, through the compiled engine
+        serving_model = importlib.import_module("engine").InferenceEngine(serving_model, buckets=(1,))
+    serving_model.predict(to_input(images[:1]))
+    loaded_kib = rss_kib() - before
+
+    latencies, predictions = [], []
+    for image in images:
+        started = time.perf_counter()
+        probabilities = serving_model.predict(to_input(image[np.newaxis]))
+        latencies.append((time.perf_counter() - started) * 1000)
+        predictions.append(int(np.argmax(probabilities[0])))
+    predictions = np.array(predictions)
+
+    per_class = {
+        str(label): round(float(np.mean(predictions[labels == label] == label)), 4)
+        for label in sorted(set(labels.tolist()))
+    }
+    return {
+        "path": path,
+        "size_kib": round(os.path.getsize(path) / 1024, 1),
+        "rss_after_load_kib": loaded_kib,
+        "accuracy": round(float(np.mean(predictions == labels)), 4),
+        "per_class_accuracy": per_class,
+        "latency_ms": {
+            "p50": round(float(np.percentile(latencies, 50)), 3),
+            "p99": round(float(np.percentile(latencies, 99)), 3),
+        },
+    }
+
+
+def _evaluate_in_child(path, image_root, cache_dir, results):
+    results.put(evaluate_model(path, image_root, cache_dir))
+
+
+def evaluate_isolated(path, image_root, cache_dir=None):
+    """Run evaluate_model in a fresh process so memory readings are not shared.
+
+    Returns an ``error`` row instead of hanging if the process dies first.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    proc = ctx.Process(target=_evaluate_in_child, args=(path, image_root, cache_dir, results))
+    proc.start()
+    result = child_result(proc, results)
+    proc.join()
+    if result is None:
+        return {"path": path, "error": f"Evaluation process exited with code {proc.exitcode}"}
+    return result
+
+
+def main():
+    """Write the quantized variants, evaluate them and print the report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", help="Keras model file (e.g. digit_model.h5)")
+    parser.add_argument("--images", default="test_images", help="Labelled evaluation images")
+    parser.add_argument("--calibration-images", help="Labelled images for int8 calibration (defaults to --images)")
+    parser.add_argument("--output-dir", default=".", help="Directory for the .tflite variants")
+    parser.add_argument("--variants", default=",".join(VARIANTS), help="Comma-separated variants to produce")
+    parser.add_argument("--report", default="quantization_report.json", help="Where to write the JSON report")
+    parser.add_argument("--cache-dir", help="Keep a tensor cache of --images here and evaluate from it")
+    args = parser.parse_args()
+
+    variants = [v for v in args.variants.split(",") if v]
+    unknown = set(variants) - set(VARIANTS)
+    if unknown:
+        parser.error(f"Unknown variants: {sorted(unknown)}")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    paths = {"keras float32": args.source}
+    paths.update(write_variants(args.source, args.output_dir, variants, args.calibration_images or args.images))
+    if args.cache_dir:
+        build_cache(args.images, args.cache_dir)
+    report = {name: evaluate_isolated(path, args.images, args.cache_dir) for name, path in paths.items()}
+
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{'variant':<16}{'accuracy':>10}{'size KiB':>10}{'RSS KiB':>10}{'p50 ms':>9}{'p99 ms':>9}  per-class")
+    for name, row in report.items():
+        if "error" in row:
+            print(f"{name:<16}failed: {row['error']}")
+            continue
+        per_class = " ".join(f"{label}:{acc:.2f}" for label, acc in row["per_class_accuracy"].items())
+        print(f"{name:<16}{row['accuracy']:>10.3f}{row['size_kib']:>10.0f}{row['rss_after_load_kib']:>10}"
+              f"{row['latency_ms']['p50']:>9.2f}{row['latency_ms']['p99']:>9.2f}  {per_class}")
+    print(f"Report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
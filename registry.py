@@ -0,0 +1,318 @@
+"""Named model versions with background hot swaps, candidate traffic and LRU eviction."""
+
+# Standard library
+import contextlib
+import os
+import random
+import threading
+import time
+
+# Your own modules
+from loading import ModelLoader, ModelNotReady
+
+
+class ModelVersion:
+    """One named model file and the serving objects built from it.
+
+    ``build`` receives the version and its loader, returns the serving model
+    and may set ``scheduler`` (closed on unload) and ``nbytes`` (resident
+    size; defaults to the file size).
+
+    Args:
+        name (str): Version name, e.g. 'default' or 'v2'.
+        path (str): Model file.
+        build (callable): Function taking ``(version, loader)``.
+        on_loaded (callable): Called with the version after a successful load.
+    """
+
+    def __init__(self, name, path, build, on_loaded=None):
+        self.name = name
+        self.path = path
+        self._build = build
+        self._on_loaded = on_loaded
+        self.loader = ModelLoader(self._load)
+        self.scheduler = None
+        self.nbytes = 0
+        self.in_flight = 0
+        self.last_used = 0.0
+
+    @property
+    def ready(self):
+        """Whether the model is loaded and can serve."""
+        return self.loader.ready
+
+    def get(self, timeout=None):
+        """Return the serving model, loading it first if needed (see ModelLoader.get)."""
+        return self.loader.get(timeout)
+
+    def unload(self):
+        """Release the model and its scheduler; the next get loads it again."""
+        if self.scheduler is not None:
+            self.scheduler.close()
+            self.scheduler = None
+        close = getattr(self.loader.model, "close", None)
+        if close is not None:
+            close()
+        self.loader = ModelLoader(self._load)
+        self.nbytes = 0
+
+    def status(self):
+        """Return the loading status, resident size and usage of this version.
+
+        Returns:
+            dict: JSON-serializable version status.
+        """
+        return {
+            "path": self.path,
+            **self.loader.status(),
+            "bytes": self.nbytes,
+            "in_flight": self.in_flight,
+            "idle_seconds": round(time.monotonic() - self.last_used, 3) if self.last_used else None,
+        }
+
+    def _load(self, loader):
+        model = self._build(self, loader)
+        if not self.nbytes:
+            self.nbytes = os.path.getsize(self.path)
+        if self._on_loaded is not None:
+            self._on_loaded(self)
+        return model
+
+
+class ModelRegistry:
+    """Serve one active model version and optionally a candidate taking a share of traffic.
+
+    Activating a version loads and warms it up on a background thread while
+    the current version keeps serving; the swap is a single reference
+    assignment, and requests already holding the old version finish on it.
+    Whenever loaded versions exceed ``memory_budget`` bytes, the least
+    recently used ones that are neither active, candidate nor in use are
+    unloaded.
+
+    Args:
+        build (callable): Function taking ``(version, loader)`` and returning
+            the serving model (see ModelVersion).
+        memory_budget (int): Bytes of loaded models to keep, or None for no limit.
+        choose (callable): Returns a float in [0, 1) per request for candidate
+            routing; defaults to random.random.
+        on_loaded (callable): Called with a version after each of its loads,
+            including reloads after an eviction, before it serves.
+        on_unloaded (callable): Called with a version after eviction unloads it.
+    """
+
+    def __init__(self, build, memory_budget=None, choose=random.random, on_loaded=None, on_unloaded=None):
+        self._build = build
+        self.memory_budget = memory_budget
+        self._choose = choose
+        self._hooks = {"loaded": on_loaded, "unloaded": on_unloaded}
+        self._versions = {}
+        self._active = None
+        self._candidate = None
+        self.candidate_share = 0.0
+        self._lock = threading.Lock()
+        self._evictions = 0
+
+    def register(self, name, path):
+        """Add a version without loading it.
+
+        Args:
+            name (str): Version name.
+            path (str): Model file.
+
+        Returns:
+            ModelVersion: The registered version.
+
+        Raises:
+            ValueError: If ``name`` is already registered with another path.
+        """
+        with self._lock:
+            version = self._versions.get(name)
+            if version is not None:
+                if version.path != path:
+                    raise ValueError(f"Model version {name!r} is already registered for {version.path}")
+                return version
+            version = self._versions[name] = ModelVersion(name, path, self._build, self._loaded)
+            return version
+
+    def version(self, name):
+        """Return the registered version called ``name``.
+
+        Raises:
+            KeyError: If no such version is registered.
+        """
+        with self._lock:
+            if name not in self._versions:
+                raise KeyError(f"Unknown model version {name!r}")
+            return self._versions[name]
+
+    @property
+    def active(self):
+        """The version serving traffic, or None before the first activation."""
+        return self._active
+
+    @property
+    def candidate(self):
+        """The version receiving ``candidate_share`` of traffic, or None."""
+        return self._candidate
+
+    def activate(self, name, background=True, start=True):
+        """Make ``name`` the active version once it has loaded.
+
+        The first activation takes effect immediately, so requests wait for
+        that version to load as they did before any swap. Later activations
+        load the new version first and keep the current one serving until the
+        swap.
+
+        Args:
+            name (str): Registered version name.
+            background (bool): Load and swap on a background thread.
+            start (bool): Start loading the first version now rather than on
+                the first request.
+
+        Returns:
+            ModelVersion: The version being activated.
+        """
+        version = self.version(name)
+        with self._lock:
+            first = self._active is None
+            if first:
+                self._active = version
+        if first:
+            if start:
+                version.loader.start(background)
+            return version
+        if background:
+            threading.Thread(target=self._swap, args=(version,), name=f"model-swap-{name}", daemon=True).start()
+        else:
+            self._swap(version)
+        return version
+
+    def set_candidate(self, name, share):
+        """Route ``share`` of traffic to version ``name`` once it has loaded.
+
+        Args:
+            name (str): Registered version name, or None to stop candidate routing.
+            share (float): Fraction of requests in [0, 1].
+        """
+        if not 0.0 <= share <= 1.0:
+            raise ValueError("share must be between 0 and 1")
+        version = self.version(name) if name is not None else None
+        if version is not None:
+            version.loader.start(background=True)
+        with self._lock:
+            self._candidate = version
+            self.candidate_share = share if version is not None else 0.0
+        self.evict()
+
+    @contextlib.contextmanager
+    def acquire(self, name=None):
+        """Pick the version for one request and keep it from being unloaded until released.
+
+        Without ``name``, the candidate is picked for ``candidate_share`` of
+        requests once it has loaded; otherwise the active version is. The
+        version is not waited on; call its ``get`` for the model.
+
+        Args:
+            name (str): Pin this registered version instead of routing.
+
+        Yields:
+            ModelVersion: The version serving this request.
+
+        Raises:
+            ModelNotReady: If no version has been activated.
+            KeyError: If ``name`` is not registered.
+        """
+        version = self.version(name) if name is not None else None
+        with self._lock:
+            if name is None:
+                version = self._active
+                candidate = self._candidate
+                if candidate is not None and candidate.ready and self._choose() < self.candidate_share:
+                    version = candidate
+            if version is None:
+                raise ModelNotReady("No model version is active")
+            version.in_flight += 1
+            version.last_used = time.monotonic()
+        try:
+            yield version
+        finally:
+            with self._lock:
+                version.in_flight -= 1
+
+    def get(self, timeout=None):
+        """Return the active version's serving model (see ModelVersion.get)."""
+        version = self._active
+        if version is None:
+            raise ModelNotReady("No model version is active")
+        return version.get(timeout)
+
+    def evict(self):
+        """Unload least recently used idle versions until loaded models fit the memory budget.
+
+        Returns:
+            list: Names of the unloaded versions.
+        """
+        if self.memory_budget is None:
+            return []
+        with self._lock:
+            loaded = [v for v in self._versions.values() if v.nbytes]
+            total = sum(v.nbytes for v in loaded)
+            evicted = []
+            for version in sorted(loaded, key=lambda v: v.last_used):
+                if total <= self.memory_budget:
+                    break
+                if version in (self._active, self._candidate) or version.in_flight or not version.ready:
+                    continue
+                total -= version.nbytes
+                evicted.append(version)
+            self._evictions += len(evicted)
+        # Evicted versions are neither active nor candidate, so acquire can no
+        # longer hand them out
+        for version in evicted:
+            version.unload()
+            if self._hooks["unloaded"] is not None:
+                self._hooks["unloaded"](version)
+        return [version.name for version in evicted]
+
+    def status(self):
+        """Return the active and candidate names and every version's status.
+
+        Returns:
+            dict: JSON-serializable registry status.
+        """
+        with self._lock:
+            versions = dict(self._versions)
+            active, candidate = self._active, self._candidate
+        return {
+            "active": active.name if active else None,
+            "candidate": candidate.name if candidate else None,
+            "candidate_share": self.candidate_share,
+            "memory_budget_bytes": self.memory_budget,
+            "resident_bytes": sum(v.nbytes for v in versions.values()),
+            "evictions": self._evictions,
+            "versions": {name: version.status() for name, version in versions.items()},
+        }
+
+    def _loaded(self, version):
+        if self._hooks["loaded"] is not None:
+            self._hooks["loaded"](version)
+        # A fresh load may push the resident total over the budget
+        version.last_used = time.monotonic()
+        self.evict()
+
+    def _swap(self, version):
+        if version.loader.state == ModelLoader.FAILED:
+            # Retry a version whose earlier load failed
+            version.unload()
+        version.loader.start(background=False)
+        try:
+            version.get()
+        except ModelNotReady:
+            # The current version keeps serving; the error is in the version status
+            return
+        with self._lock:
+            self._active = version
+            if self._candidate is version:
+                self._candidate = None
+                self.candidate_share = 0.0
+        self.evict()
@@ -0,0 +1,93 @@
+"""Opt-in cProfile capture of single requests, saved to a dump directory.
+
+A request is profiled when it is picked by the sample rate or carries the
+trigger header with the right token. Only one request is profiled at a
+time, so concurrent requests never share a profiler and the overhead stays
+bounded; a request that would be profiled while another one is skips it.
+Dumps are standard ``.prof`` files for ``python -m pstats`` or snakeviz.
+"""
+
+# Standard library
+import cProfile
+import hmac
+import os
+import random
+import re
+import threading
+import time
+
+
+class RequestProfiler:
+    """Decide which requests to profile and write their profiles to disk.
+
+    Args:
+        dump_dir (str): Directory the ``.prof`` files are written to.
+        sample_rate (float): Share of eligible requests profiled at random.
+        token (str): Value of the trigger header that forces profiling, or
+            None to disable header-triggered profiling.
+        max_dumps (int): Most dumps kept; the oldest are deleted beyond it.
+        choose: Callable returning a float in [0, 1), used for sampling.
+    """
+
+    def __init__(self, dump_dir, sample_rate=0.0, token=None, max_dumps=100, choose=random.random):
+        self.dump_dir = dump_dir
+        self.sample_rate = sample_rate
+        self.token = token
+        self.max_dumps = max_dumps
+        self._choose = choose
+        self._busy = threading.Lock()
+
+    def wanted(self, header_value=None):
+        """Return whether a request with trigger header ``header_value`` should be profiled."""
+        if self.token and header_value and hmac.compare_digest(header_value, self.token):
+            return True
+        return self.sample_rate > 0 and self._choose() < self.sample_rate
+
+    def start(self):
+        """Start profiling the calling thread.
+
+        Returns:
+            cProfile.Profile: The running profiler, or None if another
+            request is being profiled.
+        """
+        if not self._busy.acquire(blocking=False):  # pylint: disable=consider-using-with
+            return None
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile
+
+    def stop(self, profile, name):
+        """Stop ``profile`` and write it to the dump directory.
+
+        Args:
+            profile (cProfile.Profile): Profiler returned by start.
+            name (str): Label included in the file name, such as the route.
+
+        Returns:
+            str: Name of the written dump file.
+        """
+        try:
+            profile.disable()
+            os.makedirs(self.dump_dir, exist_ok=True)
+            filename = f"{time.time_ns()}-{re.sub(r'[^A-Za-z0-9]+', '_', name).strip('_')}.prof"
+            profile.dump_stats(os.path.join(self.dump_dir, filename))
+            self._prune()
+            return filename
+        finally:
+            self._busy.release()
+
+    def discard(self, profile):
+        """Stop ``profile`` without saving it, e.g. when the request failed."""
+        profile.disable()
+        self._busy.release()
+
+    def dumps(self):
+        """Return the names of the saved dumps, oldest first."""
+        if not os.path.isdir(self.dump_dir):
+            return []
+        return sorted(name for name in os.listdir(self.dump_dir) if name.endswith(".prof"))
+
+    def _prune(self):
+        # Names start with a nanosecond timestamp, so sorting orders them by age
+        for name in self.dumps()[:-self.max_dumps or None]:
+            os.remove(os.path.join(self.dump_dir, name))
@@ -0,0 +1,112 @@
+"""Thread-pool sizes and CPU affinity of the inference runtime.
+
+TensorFlow sizes its intra-op and inter-op thread pools once, when it runs
+its first operation, and by default uses every core it can see. With
+several serving processes per host those pools oversubscribe the cores.
+apply_runtime_config pins the process and records the pool sizes in the
+environment, where worker processes spawned later inherit them, and
+configure_tensorflow applies them right after TensorFlow is imported.
+"""
+
+# Standard library
+import importlib
+import os
+
+INTRA_OP_ENV = "TF_NUM_INTRAOP_THREADS"
+INTER_OP_ENV = "TF_NUM_INTEROP_THREADS"
+
+
+def parse_cpus(spec):
+    """Parse a CPU list such as '0-3,6' or [0, 1] into a sorted list of CPU ids.
+
+    Args:
+        spec: String of comma-separated ids and ranges, an iterable of ids,
+            or None/'' for no pinning.
+
+    Returns:
+        list: CPU ids, or None when ``spec`` is empty.
+    """
+    if spec is None or spec == "" or spec == []:
+        return None
+    if not isinstance(spec, str):
+        return sorted({int(cpu) for cpu in spec})
+    cpus = set()
+    for part in spec.split(","):
+        start, _, end = part.strip().partition("-")
+        cpus.update(range(int(start), int(end or start) + 1))
+    return sorted(cpus)
+
+
+def format_cpus(cpus):
+    """Return ``cpus`` as a compact '0-3,6' string (the inverse of parse_cpus)."""
+    ranges = []
+    for cpu in sorted(cpus):
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ",".join(str(a) if a == b else f"{a}-{b}" for a, b in ranges)
+
+
+def available_cpus():
+    """Return the CPU ids this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def apply_runtime_config(intra_op_threads=None, inter_op_threads=None, cpus=None):
+    """Pin this process and set the thread-pool sizes TensorFlow will use.
+
+    Must run before TensorFlow executes its first operation.
+
+    Args:
+        intra_op_threads (int): Threads used inside one operation, or None for
+            TensorFlow's default.
+        inter_op_threads (int): Operations run in parallel, or None for the default.
+        cpus: CPUs to pin the process (and the processes it spawns) to, in any
+            form parse_cpus accepts, or None to leave the affinity alone.
+
+    Raises:
+        OSError: If pinning is requested on a platform without sched_setaffinity.
+    """
+    cpus = parse_cpus(cpus)
+    if cpus is not None:
+        if not hasattr(os, "sched_setaffinity"):
+            raise OSError("CPU pinning is not supported on this platform")
+        os.sched_setaffinity(0, cpus)
+    for name, value in ((INTRA_OP_ENV, intra_op_threads), (INTER_OP_ENV, inter_op_threads)):
+        if value:
+            os.environ[name] = str(int(value))
+
+
+def configured_intra_op_threads():
+    """Return the configured intra-op thread count, or None for the default."""
+    return int(os.environ[INTRA_OP_ENV]) if os.environ.get(INTRA_OP_ENV) else None
+
+
+def configure_tensorflow():
+    """Import TensorFlow and size its thread pools from the environment.
+
+    Setting the sizes TensorFlow already uses is a no-op, so this is safe to
+    call for every model load.
+
+    Returns:
+        dict: The intra-op and inter-op thread counts in effect (0 means default).
+
+    Raises:
+        RuntimeError: If TensorFlow already started with different sizes.
+    """
+    threading_config = importlib.import_module("tensorflow").config.threading
+    intra, inter = configured_intra_op_threads(), os.environ.get(INTER_OP_ENV)
+    try:
+        if intra:
+            threading_config.set_intra_op_parallelism_threads(intra)
+        if inter:
+            threading_config.set_inter_op_parallelism_threads(int(inter))
+    except RuntimeError as e:
+        raise RuntimeError("TensorFlow thread pools must be sized before its first operation") from e
+    return {
+        "intra_op_threads": threading_config.get_intra_op_parallelism_threads(),
+        "inter_op_threads": threading_config.get_inter_op_parallelism_threads(),
+    }
@@ -31,3 +31,64 @@ function showFileName( event ) {
   var fileName = input.files[0].name;
   infoArea.textContent = 'File name: ' + fileName;
 }
+
+/*  ==========================================
+    RESIZE TO MODEL INPUT SIZE BEFORE UPLOAD
+* ========================================== */
+// Must match preprocessing.INPUT_SIZE; the server skips resampling for
+// uploads that already have this size in RGB
+var MODEL_INPUT_SIZE = 224;
+var RESIZED_JPEG_QUALITY = 0.95;
+
+// Resolve with a 224x224 JPEG File made from the chosen file, or reject when
+// the browser cannot decode or re-encode it. EXIF orientation is ignored, as
+// the server ignores it, so a rotated phone photo is classified the same way
+// whether the resized copy or the original file is sent
+function resizeForModel(file) {
+    return createImageBitmap(file, {imageOrientation: 'none'}).then(function (bitmap) {
+        var canvas = document.createElement('canvas');
+        canvas.width = MODEL_INPUT_SIZE;
+        canvas.height = MODEL_INPUT_SIZE;
+        var context = canvas.getContext('2d');
+        context.imageSmoothingEnabled = true;
+        context.imageSmoothingQuality = 'high';
+        // Stretch like the server does; white matches its alpha background
+        context.fillStyle = '#ffffff';
+        context.fillRect(0, 0, MODEL_INPUT_SIZE, MODEL_INPUT_SIZE);
+        context.drawImage(bitmap, 0, 0, MODEL_INPUT_SIZE, MODEL_INPUT_SIZE);
+        bitmap.close();
+        return new Promise(function (resolve, reject) {
+            canvas.toBlob(function (blob) {
+                if (blob) {
+                    resolve(new File([blob], file.name.replace(/\.[^.]*$/, '') + '.jpeg', {type: 'image/jpeg'}));
+                } else {
+                    reject(new Error('Canvas could not be encoded'));
+                }
+            }, 'image/jpeg', RESIZED_JPEG_QUALITY);
+        });
+    });
+}
+
+// Replace the chosen file with its resized copy before the form is sent.
+// Anything unsupported (older browsers, animated or undecodable files) falls
+// back to uploading the original file unchanged.
+var uploadForm = input.form;
+uploadForm.addEventListener('submit', function (event) {
+    var file = input.files && input.files[0];
+    if (!file || file.type === 'image/gif' || !window.createImageBitmap || !window.DataTransfer) {
+        return;
+    }
+    event.preventDefault();
+    resizeForModel(file).then(function (resized) {
+        if (resized.size < file.size) {
+            var transfer = new DataTransfer();
+            transfer.items.add(resized);
+            input.files = transfer.files;
+        }
+    }).catch(function () {
+        // Keep the original file
+    }).then(function () {
+        // form.submit() does not fire this handler again
+        uploadForm.submit();
+    });
+});
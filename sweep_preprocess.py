@@ -0,0 +1,185 @@
+"""Sweep preprocessing configurations for accuracy against per-image cost.
+
+Every labelled image is preprocessed under each combination of:
+
+- resample filter: any of preprocessing.RESAMPLE_FILTERS
+- decode reduction: 'auto' (the current draft decoding, which keeps at least
+  twice the target size), or a fixed factor of 1 (full decode), 2, 4 or 8,
+  applied through JPEG DCT scaling or Image.reduce for other formats
+- dtype: 'float32' (current) or 'float16' normalization, widened back to
+  float32 only for the model call
+
+and then classified. Accuracy, the confusion matrix, agreement with the
+current configuration and the median per-image preprocessing time are
+recorded. The table is ranked fastest first among configurations whose
+accuracy is within --tolerance of the current one (bicubic, auto, float32),
+followed by the rest.
+
+Usage:
+    python sweep_preprocess.py [--model digit_model.h5] [--images test_images]
+        [--filters bicubic,bilinear,nearest] [--reductions auto,1,2,4]
+        [--dtypes float32,float16] [--tolerance 0.01] [--report sweep_report.json]
+"""
+
+# Standard library
+import argparse
+import itertools
+import json
+import statistics
+import time
+
+# Third-party
+import numpy as np
+from PIL import Image
+
+# Your own modules
+from classify_dir import load_serving_model
+from datasets import list_labelled_images
+from model import predict_proba
+from preprocessing import INPUT_SIZE, RESAMPLE_FILTERS, decode_image
+
+BASELINE = ("bicubic", "auto", "float32")
+REDUCTIONS = ("auto", "1", "2", "4", "8")
+DTYPES = ("float32", "float16")
+
+
+def preprocess_config(path, resample, reduction, dtype):
+    """Preprocess one image under a sweep configuration.
+
+    Args:
+        path (str): Image file.
+        resample (str): Name from RESAMPLE_FILTERS.
+        reduction (str): 'auto' or a decode reduction factor such as '2'.
+        dtype (str): 'float32' or 'float16'.
+
+    Returns:
+        np.ndarray: Array of shape (224, 224, 3) in the requested dtype.
+    """
+    if reduction == "auto":
+        img = decode_image(path, INPUT_SIZE, resample, draft=True)
+    else:
+        factor = int(reduction)
+        img = Image.open(path)
+        if factor > 1:
+            width, height = img.size
+            # JPEGs decode straight at the reduced DCT scale; other formats
+            # report no draft support and are reduced after decoding
+            if img.draft(img.mode, (width // factor, height // factor)) is None:
+                img = img.reduce(factor)
+        img = decode_image(img, INPUT_SIZE, resample, draft=False)
+    pixels = np.asarray(img, dtype=np.uint8)
+    return np.divide(pixels, np.dtype(dtype).type(255.0), dtype=dtype)
+
+
+def evaluate_config(serving_model, pairs, config, batch_size=32):
+    """Preprocess and classify every image under one configuration.
+
+    Args:
+        serving_model: Object exposing ``predict(images)``.
+        pairs (list): ``(path, label)`` pairs with integer labels.
+        config (tuple): ``(resample, reduction, dtype)``.
+        batch_size (int): Images per forward pass.
+
+    Returns:
+        dict: Accuracy, confusion matrix, median and mean preprocessing
+        milliseconds per image, and the predictions in input order.
+    """
+    images = np.empty((len(pairs), *INPUT_SIZE, 3), dtype=config[2])
+    timings = []
+    for i, (path, _) in enumerate(pairs):
+        started = time.perf_counter()
+        images[i] = preprocess_config(path, *config)
+        timings.append((time.perf_counter() - started) * 1000)
+    probabilities = predict_proba(serving_model, images.astype(np.float32, copy=False), batch_size)
+    predictions = np.argmax(probabilities, axis=-1)
+    labels = np.array([label for _, label in pairs])
+    num_classes = probabilities.shape[1]
+    confusion = np.zeros((num_classes, num_classes), dtype=int)
+    np.add.at(confusion, (labels, predictions), 1)
+    return {
+        "resample": config[0],
+        "reduction": config[1],
+        "dtype": config[2],
+        "accuracy": round(float(np.mean(predictions == labels)), 4),
+        "preprocess_ms": {
+            "median": round(statistics.median(timings), 3),
+            "mean": round(statistics.fmean(timings), 3),
+        },
+        "confusion": confusion.tolist(),
+        "predictions": predictions.tolist(),
+    }
+
+
+def rank_results(results, baseline, tolerance):
+    """Order sweep results fastest first, those within tolerance of the baseline on top.
+
+    Args:
+        results (list): Dicts from evaluate_config.
+        baseline (dict): The result of the current configuration.
+        tolerance (float): Accuracy drop still considered acceptable.
+
+    Returns:
+        list: The results, each with ``within_tolerance`` and
+        ``agreement`` (share of predictions equal to the baseline's) set.
+    """
+    for result in results:
+        result["within_tolerance"] = result["accuracy"] >= baseline["accuracy"] - tolerance
+        result["agreement"] = round(
+            float(np.mean(np.array(result["predictions"]) == np.array(baseline["predictions"]))), 4
+        )
+    return sorted(results, key=lambda r: (not r["within_tolerance"], r["preprocess_ms"]["median"]))
+
+
+def print_table(ranked):
+    """Print ranked sweep results, marking the current configuration."""
+    print(f"{'filter':<10}{'reduce':>8}{'dtype':>9}{'accuracy':>10}{'agree':>8}{'ms/img':>9}  within")
+    for result in ranked:
+        marker = " (current)" if (result["resample"], result["reduction"], result["dtype"]) == BASELINE else ""
+        print(f"{result['resample']:<10}{result['reduction']:>8}{result['dtype']:>9}{result['accuracy']:>10.3f}"
+              f"{result['agreement']:>8.3f}{result['preprocess_ms']['median']:>9.2f}  "
+              f"{'yes' if result['within_tolerance'] else 'no'}{marker}")
+
+
+def main():
+    """Run the sweep, print the ranked table and write the JSON report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="digit_model.h5", help="Model file to classify with")
+    parser.add_argument("--images", default="test_images", help="Directory of <label>/<image> files")
+    parser.add_argument("--filters", default=",".join(RESAMPLE_FILTERS), help="Comma-separated resample filters")
+    parser.add_argument("--reductions", default=",".join(REDUCTIONS), help="Comma-separated decode reductions")
+    parser.add_argument("--dtypes", default=",".join(DTYPES), help="Comma-separated normalization dtypes")
+    parser.add_argument("--tolerance", type=float, default=0.01, help="Accepted accuracy drop vs the baseline")
+    parser.add_argument("--report", default="sweep_report.json", help="Where to write the JSON report")
+    args = parser.parse_args()
+
+    axes = [
+        [v for v in args.filters.split(",") if v],
+        [v for v in args.reductions.split(",") if v],
+        [v for v in args.dtypes.split(",") if v],
+    ]
+    for values, known, name in zip(axes, (RESAMPLE_FILTERS, REDUCTIONS, DTYPES), ("filters", "reductions", "dtypes")):
+        unknown = set(values) - set(known)
+        if unknown:
+            parser.error(f"Unknown {name}: {sorted(unknown)}")
+    configs = list(itertools.product(*axes))
+    if BASELINE not in configs:
+        configs.insert(0, BASELINE)
+
+    serving_model = load_serving_model(args.model)
+    pairs = list_labelled_images(args.images)
+    # An untimed pass pays for tracing and first-call costs, which would
+    # otherwise land on whichever configuration is timed first
+    evaluate_config(serving_model, pairs, BASELINE)
+    results = [evaluate_config(serving_model, pairs, config) for config in configs]
+    baseline = results[configs.index(BASELINE)]
+    ranked = rank_results(results, baseline, args.tolerance)
+
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump({"baseline": list(BASELINE), "tolerance": args.tolerance, "results": ranked}, f, indent=1)
+
+    print_table(ranked)
+    print(f"Report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Process memory readings and child-process helpers used by the benchmarks and reports."""
+
+# Standard library
+import queue
+import resource
+
+
+def _read_status_kib(field):
+    try:
+        with open("/proc/self/status", encoding="ascii") as status:
+            for line in status:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def rss_kib():
+    """Return this process's current resident set size in KiB (peak if unavailable)."""
+    current = _read_status_kib("VmRSS")
+    return current if current is not None else peak_rss_kib()
+
+
+def peak_rss_kib():
+    """Return this process's peak resident set size in KiB.
+
+    /proc's VmHWM is preferred because ru_maxrss survives exec on Linux and
+    would report the parent's peak in spawned children.
+    """
+    peak = _read_status_kib("VmHWM")
+    return peak if peak is not None else resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def child_result(process, results, poll_interval=1.0):
+    """Wait for the single result ``process`` puts on the ``results`` queue.
+
+    Args:
+        process (multiprocessing.Process): Started child process.
+        results (multiprocessing.Queue): Queue the child puts its result on.
+        poll_interval (float): Seconds between checks that the child is alive.
+
+    Returns:
+        The child's result, or None if it exited without one (e.g. killed
+        for running out of memory); its exitcode then says why.
+    """
+    while True:
+        try:
+            return results.get(timeout=poll_interval)
+        except queue.Empty:
+            if not process.is_alive():
+                break
+    # A result put just before the child exited may still be in the pipe
+    try:
+        return results.get(timeout=poll_interval)
+    except queue.Empty:
+        return None
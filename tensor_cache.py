@@ -0,0 +1,275 @@
+"""On-disk cache of preprocessed labelled images as a memory-mapped uint8 tensor.
+
+A cache directory holds three files:
+
+- ``images.u8``: raw (N, 224, 224, 3) uint8 pixels, resized exactly as
+  preprocess_image does before its division by 255
+- ``labels.npy``: the N labels (folder names) in the same order
+- ``manifest.json``: the preprocessing parameters and, per source file, its
+  mtime, size, content hash and row (or decode error)
+
+build_cache only decodes files that are new or whose contents changed;
+unchanged rows are copied from the previous tensor. Changing the
+preprocessing parameters rebuilds everything. TensorCache maps the tensor
+read-only and yields zero-copy batches.
+
+Usage:
+    python tensor_cache.py test_images .cache/test_images [--resample bicubic] [--no-draft]
+"""
+
+# Standard library
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Third-party
+import numpy as np
+
+# Your own modules
+from cache import content_key
+from datasets import list_labelled_images
+from preprocessing import INPUT_SIZE, decode_image
+
+FORMAT_VERSION = 1
+IMAGES_FILE = "images.u8"
+LABELS_FILE = "labels.npy"
+MANIFEST_FILE = "manifest.json"
+ROW_SHAPE = (INPUT_SIZE[1], INPUT_SIZE[0], 3)
+
+
+def _read_manifest(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, MANIFEST_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _file_hash(path):
+    with open(path, "rb") as f:
+        return content_key(f)
+
+
+def _plan(pairs, previous):
+    # Decide per source file whether its previous row can be reused
+    old_entries = {entry["path"]: entry for entry in previous["entries"]} if previous else {}
+    entries, reuse = [], {}
+    for path, label in pairs:
+        stat = os.stat(path)
+        entry = {"path": path, "label": label, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+        old = old_entries.get(path)
+        if old is not None and (old["mtime_ns"], old["size"]) == (entry["mtime_ns"], entry["size"]):
+            entry["hash"] = old["hash"]
+        else:
+            entry["hash"] = _file_hash(path)
+        if old is not None and old["hash"] == entry["hash"]:
+            if old.get("row") is None:
+                entry["error"] = old["error"]
+            else:
+                reuse[len(entries)] = old["row"]
+        entries.append(entry)
+    return entries, reuse
+
+
+def _rows_in_place(previous, entries, candidates, reuse):
+    # When every previous row is reused at the same position, record the rows
+    # and report that the tensor file can stay as it is
+    if previous is None or [reuse.get(i) for i in candidates] != list(range(previous["rows"])):
+        return False
+    for row, i in enumerate(candidates):
+        entries[i]["row"] = row
+    return True
+
+
+def _copy_reused_rows(images_path, previous, new, candidates, reuse):
+    old = np.memmap(images_path, dtype=np.uint8, mode="r", shape=(previous["rows"], *ROW_SHAPE))
+    for row, i in enumerate(candidates):
+        if i in reuse:
+            new[row] = old[reuse[i]]
+
+
+def _compact(new, entries, candidates, failures):
+    # Close the gaps left by files that failed to decode; returns the row count
+    rows = 0
+    for row, i in enumerate(candidates):
+        if i in failures:
+            entries[i]["error"] = failures[i]
+            continue
+        if rows != row:
+            new[rows] = new[row]
+        entries[i]["row"] = rows
+        rows += 1
+    return rows
+
+
+def _write_tensor(cache_dir, entries, candidates, reuse, previous, *, decode_params, threads):
+    # Write the rows of ``candidates`` to a new tensor, copying reused rows and
+    # decoding the rest; returns how many were decoded successfully
+    images_path = os.path.join(cache_dir, IMAGES_FILE)
+    tmp_path = images_path + ".tmp"
+    new = np.memmap(tmp_path, dtype=np.uint8, mode="w+", shape=(max(len(candidates), 1), *ROW_SHAPE))
+    if reuse:
+        _copy_reused_rows(images_path, previous, new, candidates, reuse)
+
+    def decode(job):
+        row, i = job
+        try:
+            new[row] = np.asarray(decode_image(entries[i]["path"], INPUT_SIZE, *decode_params))
+        except OSError as e:  # also covers UnidentifiedImageError and ImageTooLarge
+            return str(e)
+        return None
+
+    todo = [(row, i) for row, i in enumerate(candidates) if i not in reuse]
+    with ThreadPoolExecutor(threads) as executor:
+        failures = {i: error for (_, i), error in zip(todo, executor.map(decode, todo)) if error}
+
+    rows = _compact(new, entries, candidates, failures)
+    new.flush()
+    del new
+    os.truncate(tmp_path, rows * int(np.prod(ROW_SHAPE)))
+    os.replace(tmp_path, images_path)
+    return len(todo) - len(failures)
+
+
+def build_cache(root, cache_dir, *, resample="bicubic", draft=True, threads=None):
+    """Create or incrementally update the tensor cache of a labelled image folder.
+
+    Args:
+        root (str): Directory laid out as ``<root>/<label>/<image>``.
+        cache_dir (str): Directory holding the cache files.
+        resample (str): Resample filter name (see preprocessing.RESAMPLE_FILTERS).
+        draft (bool): Whether large JPEGs are decoded at a reduced scale.
+        threads (int): Decoding threads, or None for the executor default.
+
+    Returns:
+        dict: Counts of images reused, decoded and failed, and the seconds taken.
+    """
+    started = time.perf_counter()
+    os.makedirs(cache_dir, exist_ok=True)
+    params = {"version": FORMAT_VERSION, "size": list(INPUT_SIZE), "resample": resample, "draft": draft}
+    previous = _read_manifest(cache_dir)
+    if previous is not None and previous["params"] != params:
+        previous = None
+    entries, reuse = _plan(list_labelled_images(root), previous)
+    candidates = [i for i, entry in enumerate(entries) if "error" not in entry]
+
+    decoded = 0
+    manifest_path = os.path.join(cache_dir, MANIFEST_FILE)
+    # Unless every row is still valid and in place, a new tensor is written
+    if not _rows_in_place(previous, entries, candidates, reuse):
+        # Drop the old manifest first so an interrupted build can never pair
+        # it with a new tensor
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)
+        decoded = _write_tensor(
+            cache_dir, entries, candidates, reuse, previous, decode_params=(resample, draft), threads=threads
+        )
+
+    labels = [entry["label"] for entry in entries if "row" in entry]
+    np.save(os.path.join(cache_dir, LABELS_FILE), np.array(labels))
+    # The manifest is written last, so a cache interrupted mid-build is rebuilt
+    with open(manifest_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"params": params, "root": root, "rows": len(labels), "entries": entries}, f, indent=1)
+    os.replace(manifest_path + ".tmp", manifest_path)
+    return {
+        "reused": len(reuse),
+        "decoded": decoded,
+        "failed": sum(1 for entry in entries if "error" in entry),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def normalize_batch(images, out=None):
+    """Scale uint8 cache rows to the float32 [0, 1] input the model expects.
+
+    Args:
+        images (np.ndarray): uint8 array of shape (N, 224, 224, 3).
+        out (np.ndarray): Optional float32 buffer of at least N rows to reuse.
+
+    Returns:
+        np.ndarray: float32 array of shape (N, 224, 224, 3).
+    """
+    if out is not None:
+        out = out[:len(images)]
+    return np.divide(images, np.float32(255.0), out=out, dtype=np.float32)
+
+
+class TensorCache:
+    """Read-only view of a cache written by build_cache.
+
+    Args:
+        cache_dir (str): Directory holding the cache files.
+
+    Attributes:
+        images (np.memmap): uint8 pixels of shape (N, 224, 224, 3).
+        labels (np.ndarray): The N labels.
+        paths (list): Source file of each row.
+        params (dict): Preprocessing parameters the cache was built with.
+    """
+
+    def __init__(self, cache_dir):
+        manifest = _read_manifest(cache_dir)
+        if manifest is None:
+            raise FileNotFoundError(f"No tensor cache in {cache_dir}")
+        self.params = manifest["params"]
+        rows = manifest["rows"]
+        self.paths = [None] * rows
+        for entry in manifest["entries"]:
+            if "row" in entry:
+                self.paths[entry["row"]] = entry["path"]
+        self.images = np.memmap(
+            os.path.join(cache_dir, IMAGES_FILE), dtype=np.uint8, mode="r", shape=(rows, *ROW_SHAPE)
+        ) if rows else np.empty((0, *ROW_SHAPE), dtype=np.uint8)
+        self.labels = np.load(os.path.join(cache_dir, LABELS_FILE))
+
+    def __len__(self):
+        return len(self.paths)
+
+    def batches(self, batch_size=32):
+        """Yield ``(images, labels)`` slices of the mapped arrays without copying.
+
+        Args:
+            batch_size (int): Rows per batch; the last batch may be shorter.
+
+        Yields:
+            tuple: uint8 images of shape (n, 224, 224, 3) and their n labels.
+        """
+        for start in range(0, len(self), batch_size):
+            yield self.images[start:start + batch_size], self.labels[start:start + batch_size]
+
+
+def open_cache(root, cache_dir, **params):
+    """Bring the cache of ``root`` up to date and return it opened.
+
+    Args:
+        root (str): Labelled image folder.
+        cache_dir (str): Directory holding the cache files.
+        **params: Preprocessing parameters passed to build_cache.
+
+    Returns:
+        TensorCache: The refreshed cache.
+    """
+    build_cache(root, cache_dir, **params)
+    return TensorCache(cache_dir)
+
+
+def main():
+    """Build or refresh a cache and print what was reused and decoded."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("root", help="Directory of <label>/<image> files")
+    parser.add_argument("cache_dir", help="Directory for the cache files")
+    parser.add_argument("--resample", default="bicubic", help="Resample filter name")
+    parser.add_argument("--no-draft", action="store_true", help="Decode JPEGs at full resolution")
+    parser.add_argument("--threads", type=int, default=None, help="Decoding threads")
+    args = parser.parse_args()
+
+    stats = build_cache(args.root, args.cache_dir, resample=args.resample, draft=not args.no_draft,
+                        threads=args.threads)
+    print(f"Reused {stats['reused']}, decoded {stats['decoded']}, failed {stats['failed']} "
+          f"in {stats['seconds']:.2f} s -> {args.cache_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Unit tests for admission control and load shedding."""
+
+# Standard library
+import threading
+import time
+
+# Third-party
+import pytest
+
+# Your own modules
+from admission import AdmissionController, DeadlineExceeded, Overloaded
+
+
+def hold_slot(controller, entered, release):
+    """Occupy one in-flight slot until ``release`` is set."""
+    with controller.admit():
+        entered.set()
+        release.wait(5)
+
+
+def test_requests_within_limit_are_served():
+    """Admitted requests are counted as served once they finish."""
+    controller = AdmissionController(max_in_flight=2, max_queue=0)
+    with controller.admit():
+        assert controller.stats()["in_flight"] == 1
+    stats = controller.stats()
+    assert stats["in_flight"] == 0
+    assert stats["served"] == 1
+
+
+def test_full_queue_sheds_immediately():
+    """With every slot busy and no queue room, new requests are rejected."""
+    controller = AdmissionController(max_in_flight=1, max_queue=0)
+    entered, release = threading.Event(), threading.Event()
+    holder = threading.Thread(target=hold_slot, args=(controller, entered, release))
+    holder.start()
+    entered.wait(5)
+    started = time.perf_counter()
+    with pytest.raises(Overloaded):
+        with controller.admit():
+            pass
+    assert time.perf_counter() - started < 0.5
+    release.set()
+    holder.join()
+    assert controller.stats()["shed"] == 1
+
+
+def test_queued_request_runs_when_slot_frees():
+    """A waiting request is admitted as soon as the running one finishes."""
+    controller = AdmissionController(max_in_flight=1, max_queue=1)
+    entered, release = threading.Event(), threading.Event()
+    holder = threading.Thread(target=hold_slot, args=(controller, entered, release))
+    holder.start()
+    entered.wait(5)
+    threading.Timer(0.05, release.set).start()
+    with controller.admit():
+        pass
+    holder.join()
+    assert controller.stats()["served"] == 2
+
+
+def test_queue_timeout_sheds_waiting_request():
+    """Requests that wait longer than queue_timeout are shed."""
+    controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=0.05)
+    entered, release = threading.Event(), threading.Event()
+    holder = threading.Thread(target=hold_slot, args=(controller, entered, release))
+    holder.start()
+    entered.wait(5)
+    with pytest.raises(Overloaded):
+        with controller.admit():
+            pass
+    release.set()
+    holder.join()
+    assert controller.stats()["shed"] == 1
+
+
+def test_expired_deadline_is_dropped():
+    """Requests whose deadline already passed never take a slot."""
+    controller = AdmissionController()
+    with pytest.raises(DeadlineExceeded):
+        with controller.admit(deadline=time.time() - 1):
+            pass
+    stats = controller.stats()
+    assert stats["expired"] == 1
+    assert stats["served"] == 0
+
+
+def test_deadline_passing_in_queue_is_expired():
+    """A deadline reached while queued counts as expired, not shed."""
+    controller = AdmissionController(max_in_flight=1, max_queue=1)
+    entered, release = threading.Event(), threading.Event()
+    holder = threading.Thread(target=hold_slot, args=(controller, entered, release))
+    holder.start()
+    entered.wait(5)
+    with pytest.raises(DeadlineExceeded):
+        with controller.admit(deadline=time.time() + 0.05):
+            pass
+    release.set()
+    holder.join()
+    stats = controller.stats()
+    assert (stats["expired"], stats["shed"]) == (1, 0)
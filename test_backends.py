@@ -0,0 +1,87 @@
+"""Unit tests for the pluggable inference backends."""
+
+# Standard library
+import glob
+
+# Third-party
+import numpy as np
+import pytest
+
+# Your own modules
+from backends import TFLiteModel, backend_for_path
+from check_parity import compare_backends
+from model import load_model, predict_result, preprocess_image, preprocess_images, save_tflite_model
+
+
+@pytest.fixture(scope="module")
+def model_instance():
+    """Load the ML model once before running tests."""
+    return load_model("digit_model.h5")
+
+
+@pytest.fixture(scope="module")
+def tflite_model(model_instance, tmp_path_factory):
+    """Convert the Keras model to TFLite once and load it through load_model."""
+    path = tmp_path_factory.mktemp("models") / "digit_model.tflite"
+    save_tflite_model(model_instance, str(path))
+    return load_model(str(path))
+
+
+def test_backend_chosen_from_extension():
+    """File extensions map to their backends, defaulting to Keras."""
+    assert backend_for_path("digit_model.h5") == "keras"
+    assert backend_for_path("digit_model.npz") == "keras"
+    assert backend_for_path("models/digit_model.TFLITE") == "tflite"
+    assert backend_for_path("digit_model") == "keras"
+
+
+def test_tflite_backend_loaded_for_tflite_files(tflite_model):
+    """load_model returns the TFLite interpreter wrapper for '.tflite' files."""
+    assert isinstance(tflite_model, TFLiteModel)
+
+
+def test_tflite_predict_result(tflite_model):
+    """predict_result works unchanged on the TFLite backend."""
+    processed_img_local = preprocess_image("test_images/4/Sign 4 (92).jpeg")
+    assert isinstance(predict_result(tflite_model, processed_img_local), (int, np.integer))
+
+
+def test_tflite_handles_changing_batch_sizes(tflite_model):
+    """The interpreter input is resized for each new batch size."""
+    processed_img_local = preprocess_image("test_images/5/Sign 5 (86).jpeg")
+    for size in (1, 3, 1):
+        assert tflite_model.predict(np.repeat(processed_img_local, size, axis=0)).shape[0] == size
+
+
+def test_backends_agree_on_all_test_images(model_instance, tflite_model):
+    """Keras and TFLite predict the same label for every image in test_images."""
+    paths = sorted(glob.glob("test_images/*/*"))
+    mismatches, _ = compare_backends(model_instance, tflite_model, paths)
+    assert not mismatches
+
+
+@pytest.mark.parametrize("quantization", ["float16", "dynamic", "int8"])
+def test_quantized_variants_are_servable(model_instance, tmp_path, quantization):
+    """Quantized TFLite files load through load_model and mostly agree with Keras."""
+    paths = sorted(glob.glob("test_images/*/*"))[::10]
+    images, _, _ = preprocess_images(paths)
+    path = tmp_path / f"digit_model_{quantization}.tflite"
+    save_tflite_model(model_instance, str(path), quantization, representative_images=images)
+
+    quantized = load_model(str(path))
+    probabilities = quantized.predict(images)
+    assert probabilities.shape == (len(paths), 10)
+    agreement = np.mean(np.argmax(probabilities, axis=1) == np.argmax(model_instance.predict(images), axis=1))
+    assert agreement >= 0.8
+
+
+def test_int8_requires_representative_images(model_instance, tmp_path):
+    """Full-integer quantization refuses to run without calibration data."""
+    with pytest.raises(ValueError):
+        save_tflite_model(model_instance, str(tmp_path / "m.tflite"), "int8")
+
+
+def test_unknown_quantization_rejected(model_instance, tmp_path):
+    """Unsupported quantization names raise ValueError."""
+    with pytest.raises(ValueError):
+        save_tflite_model(model_instance, str(tmp_path / "m.tflite"), "int4")
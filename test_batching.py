@@ -0,0 +1,123 @@
+"""Unit tests for the dynamic micro-batching scheduler."""
+
+# Standard library
+import threading
+
+# Third-party
+import numpy as np
+import pytest
+
+# Your own modules
+from batching import BatchScheduler
+
+
+class RecordingModel:
+    """Fake model that labels each image by its first pixel and records batch sizes."""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def predict(self, batch):
+        self.batch_sizes.append(batch.shape[0])
+        return np.eye(10)[batch[:, 0, 0, 0].astype(int) % 10]
+
+
+def make_image(label):
+    """Build a preprocessed-shaped image that RecordingModel labels as `label`."""
+    img = np.zeros((1, 224, 224, 3), dtype=np.float32)
+    img[0, 0, 0, 0] = label
+    return img
+
+
+def test_single_request_returns_argmax():
+    """A lone request is served once the wait window closes."""
+    scheduler = BatchScheduler(RecordingModel(), max_batch_size=4, max_wait_ms=1)
+    assert scheduler.predict(make_image(7), timeout=5) == 7
+    scheduler.close()
+
+
+def test_submit_can_return_probabilities():
+    """Callers asking for probabilities get their own row of the batch output."""
+    scheduler = BatchScheduler(RecordingModel(), max_batch_size=4, max_wait_ms=1)
+    row = scheduler.submit(make_image(3), probabilities=True).result(timeout=5)
+    np.testing.assert_array_equal(row, np.eye(10)[3])
+    scheduler.close()
+
+
+def test_concurrent_requests_share_forward_pass():
+    """Concurrent submissions are grouped and each caller gets its own label."""
+    fake = RecordingModel()
+    scheduler = BatchScheduler(fake, max_batch_size=8, max_wait_ms=200)
+    results = {}
+    barrier = threading.Barrier(8)
+
+    def worker(label):
+        barrier.wait()
+        results[label] = scheduler.predict(make_image(label), timeout=5)
+
+    threads = [threading.Thread(target=worker, args=(label,)) for label in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    scheduler.close()
+
+    assert results == {label: label for label in range(8)}
+    assert len(fake.batch_sizes) < 8
+    assert max(fake.batch_sizes) <= 8
+
+
+def test_batch_size_is_bounded():
+    """No forward pass exceeds max_batch_size."""
+    fake = RecordingModel()
+    scheduler = BatchScheduler(fake, max_batch_size=3, max_wait_ms=50)
+    futures = [scheduler.submit(make_image(i)) for i in range(10)]
+    assert [f.result(timeout=5) for f in futures] == [i % 10 for i in range(10)]
+    scheduler.close()
+    assert max(fake.batch_sizes) <= 3
+    assert sum(fake.batch_sizes) == 10
+
+
+def test_stats_report_batches_and_waits():
+    """Statistics count every request and report queue-wait percentiles."""
+    scheduler = BatchScheduler(RecordingModel(), max_batch_size=4, max_wait_ms=1)
+    for i in range(5):
+        scheduler.predict(make_image(i), timeout=5)
+    stats = scheduler.stats()
+    scheduler.close()
+    assert stats["requests"] == 5
+    assert stats["batches"] == sum(stats["batch_size_histogram"].values())
+    assert set(stats["queue_wait_ms"]) == {"p50", "p95", "p99", "max"}
+
+
+def test_model_error_propagates_to_callers():
+    """A failing forward pass raises in the caller instead of hanging it."""
+
+    class BrokenModel:
+        def predict(self, batch):
+            raise ValueError("boom")
+
+    scheduler = BatchScheduler(BrokenModel(), max_batch_size=2, max_wait_ms=1)
+    with pytest.raises(ValueError):
+        scheduler.predict(make_image(1), timeout=5)
+    scheduler.close()
+
+
+def test_invalid_limits_rejected():
+    """Non-positive batch sizes and negative waits are refused."""
+    with pytest.raises(ValueError):
+        BatchScheduler(RecordingModel(), max_batch_size=0)
+    with pytest.raises(ValueError):
+        BatchScheduler(RecordingModel(), max_wait_ms=-1)
+
+
+def test_multiple_dispatch_threads_close_cleanly():
+    """Every dispatch thread stops on close, even right after serving requests."""
+    fake = RecordingModel()
+    scheduler = BatchScheduler(fake, max_batch_size=2, max_wait_ms=1, num_threads=3)
+    futures = [scheduler.submit(make_image(i)) for i in range(9)]
+    assert [f.result(timeout=5) for f in futures] == list(range(9))
+    closer = threading.Thread(target=scheduler.close)
+    closer.start()
+    closer.join(timeout=5)
+    assert not closer.is_alive()
@@ -0,0 +1,30 @@
+"""Unit tests for the benchmark suite's baseline comparison."""
+
+# Your own modules
+from bench_suite import compare_results
+
+
+def summary(rps, p95, p99):
+    """Build a layer summary with the fields compare_results reads."""
+    return {"throughput_rps": rps, "latency_ms": {"p50": 1.0, "p95": p95, "p99": p99}}
+
+
+def test_changes_within_tolerance_pass():
+    """Small fluctuations are not reported as regressions."""
+    baseline = {"route": summary(100.0, 20.0, 30.0)}
+    assert not compare_results({"route": summary(95.0, 21.0, 32.0)}, baseline, 0.1)
+
+
+def test_slower_layer_is_flagged():
+    """Lower throughput and higher tail latency are both reported."""
+    baseline = {"route": summary(100.0, 20.0, 30.0), "preprocess": summary(500.0, 3.0, 4.0)}
+    regressions = compare_results(
+        {"route": summary(80.0, 25.0, 30.0), "preprocess": summary(500.0, 3.0, 4.0)}, baseline, 0.1
+    )
+    assert len(regressions) == 2
+    assert all(r.startswith("route:") for r in regressions)
+
+
+def test_layers_missing_from_baseline_are_skipped():
+    """A layer that was not benchmarked before has nothing to regress against."""
+    assert not compare_results({"predict": summary(1.0, 999.0, 999.0)}, {}, 0.1)
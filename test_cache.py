@@ -0,0 +1,86 @@
+"""Unit tests for the content-addressed prediction cache."""
+
+# Standard library
+import os
+import time
+from io import BytesIO
+
+# Your own modules
+from cache import PredictionCache, content_key
+
+
+def test_content_key_is_stable_and_content_sensitive():
+    """Identical bytes share a key and different bytes do not."""
+    assert content_key(b"abc") == content_key(b"abc")
+    assert content_key(b"abc") != content_key(b"abd")
+
+
+def test_content_key_of_stream_matches_bytes():
+    """Streams are hashed in chunks to the same key and rewound afterwards."""
+    data = os.urandom(200_000)
+    stream = BytesIO(data)
+    assert content_key(stream) == content_key(data)
+    assert stream.tell() == 0
+
+
+def test_hit_after_put():
+    """A stored prediction is returned and counted as a hit."""
+    cache = PredictionCache()
+    assert cache.get("k") is None
+    cache.put("k", 3)
+    assert cache.get("k") == 3
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_lru_eviction():
+    """The least recently used entry is evicted once the cache is full."""
+    cache = PredictionCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expiry():
+    """Entries older than the TTL are treated as misses."""
+    cache = PredictionCache(ttl=0.01)
+    cache.put("k", 5)
+    time.sleep(0.02)
+    assert cache.get("k") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_zero_capacity_disables_caching():
+    """A cache with no capacity never stores anything."""
+    cache = PredictionCache(max_entries=0)
+    cache.put("k", 1)
+    assert cache.get("k") is None
+
+
+def test_model_file_change_invalidates(tmp_path):
+    """Rewriting the model file drops every cached prediction."""
+    model_file = tmp_path / "model.h5"
+    model_file.write_bytes(b"v1")
+    cache = PredictionCache(model_path=str(model_file))
+    cache.put("k", 1)
+    assert cache.get("k") == 1
+
+    model_file.write_bytes(b"version2")
+    os.utime(model_file, ns=(time.time_ns() + 10**9, time.time_ns() + 10**9))
+    assert cache.get("k") is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_invalidate_drops_only_matching_prefix():
+    """Invalidating one model version keeps the other versions' entries."""
+    cache = PredictionCache()
+    cache.put("v1:a", 1)
+    cache.put("v2:a", 2)
+    assert cache.invalidate("v1:") == 1
+    assert cache.get("v1:a") is None
+    assert cache.get("v2:a") == 2
+    assert cache.stats()["invalidations"] == 1
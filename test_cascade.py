@@ -0,0 +1,58 @@
+"""Unit tests for the confidence-gated model cascade and its threshold evaluation."""
+
+# Third-party
+import numpy as np
+
+# Your own modules
+from cascade import CascadeModel
+from eval_cascade import evaluate_thresholds
+
+
+class FixedModel:
+    """Returns preset probability rows indexed by the first pixel of each image."""
+
+    def __init__(self, rows):
+        self.rows = np.asarray(rows, dtype=np.float32)
+        self.calls = []
+
+    def predict(self, images):
+        ids = images[:, 0, 0, 0].astype(int)
+        self.calls.append(ids.tolist())
+        return self.rows[ids]
+
+
+def images_with_ids(n):
+    images = np.zeros((n, 224, 224, 3), dtype=np.float32)
+    images[:, 0, 0, 0] = np.arange(n)
+    return images
+
+
+def test_only_uncertain_images_escalate():
+    first = FixedModel([[0.95, 0.05], [0.6, 0.4], [0.1, 0.9], [0.45, 0.55]])
+    full = FixedModel([[0.0, 1.0]] * 4)
+    cascade = CascadeModel(first, full, threshold=0.8)
+    probabilities = cascade.predict(images_with_ids(4))
+    assert full.calls == [[1, 3]]
+    np.testing.assert_allclose(probabilities, [[0.95, 0.05], [0.0, 1.0], [0.1, 0.9], [0.0, 1.0]])
+    assert cascade.stats() == {"threshold": 0.8, "images": 4, "escalated": 2, "escalation_rate": 0.5}
+
+
+def test_threshold_zero_never_calls_full_model():
+    first = FixedModel([[0.5, 0.5], [0.3, 0.7]])
+    full = FixedModel([[1.0, 0.0]] * 2)
+    CascadeModel(first, full, threshold=0.0).predict(images_with_ids(2))
+    assert not full.calls
+
+
+def test_threshold_table_combines_stage_results():
+    labels = np.array([0, 1, 1, 0])
+    first = (np.array([[0.9, 0.1], [0.6, 0.4], [0.2, 0.8], [0.55, 0.45]]), np.full(4, 0.001))
+    full = (np.array([[1.0, 0.0], [0.0, 1.0], [0.0, 1.0], [1.0, 0.0]]), np.full(4, 0.010))
+    rows = {row["config"]: row for row in evaluate_thresholds(first, full, labels, [0.7])}
+    assert rows["first only"]["accuracy"] == 0.75
+    assert rows["full only"]["accuracy"] == 1.0
+    cascade = rows["cascade@0.7"]
+    assert cascade["escalation_rate"] == 0.5
+    assert cascade["accuracy"] == 1.0
+    assert cascade["mean_ms"] == 6.0
+    assert cascade["p99_ms"] == 11.0
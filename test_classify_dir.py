@@ -0,0 +1,63 @@
+"""Unit tests for the offline directory classifier."""
+
+# Standard library
+import json
+import shutil
+
+# Third-party
+import numpy as np
+
+# Your own modules
+from classify_dir import ResultWriter, Tally, classify_tree, read_completed
+from datasets import iter_images
+
+
+class ConstantModel:
+    """Fake model that predicts class 3 for every image."""
+
+    def predict(self, batch):
+        return np.tile(np.eye(10)[3], (len(batch), 1))
+
+
+def make_tree(root):
+    """Lay out two labelled images and one unreadable file under ``root``."""
+    for label, name in ((3, "Sign 3 (122).jpeg"), (6, "Sign 6 (103).jpeg")):
+        (root / str(label)).mkdir(parents=True)
+        shutil.copy(f"test_images/{label}/{name}", root / str(label) / name)
+    (root / "6" / "broken.jpg").write_bytes(b"not an image")
+
+
+def run(root, output, fmt="jsonl", append=False, done=()):
+    """Classify ``root`` into ``output`` and return the tally."""
+    tally = Tally()
+    writer = ResultWriter(str(output), fmt, append)
+    items = ((p, label) for p, label in iter_images(str(root)) if p not in done)
+    classify_tree(ConstantModel(), items, writer, tally, batch_size=2, threads=2, prefetch=1)
+    writer.close()
+    return tally
+
+
+def test_streams_rows_and_reports_accuracy(tmp_path):
+    """Every image gets a row, errors are recorded and accuracy uses folder labels."""
+    make_tree(tmp_path / "images")
+    tally = run(tmp_path / "images", tmp_path / "out.jsonl")
+    rows = [json.loads(line) for line in (tmp_path / "out.jsonl").read_text().splitlines()]
+    assert len(rows) == 3
+    assert sum(1 for row in rows if row["error"]) == 1
+    assert tally.accuracy() == 0.5
+
+
+def test_resume_skips_completed_images_and_drops_partial_line(tmp_path):
+    """A rerun appends only the missing images after cutting a torn last line."""
+    make_tree(tmp_path / "images")
+    output = tmp_path / "out.csv"
+    run(tmp_path / "images", output, fmt="csv")
+    lines = output.read_text().splitlines(keepends=True)
+    # Simulate an interruption halfway through writing the last row
+    output.write_text("".join(lines[:-1]) + lines[-1][:5])
+    completed = read_completed(str(output), "csv")
+    assert len(completed) == 2
+    run(tmp_path / "images", output, fmt="csv", append=True, done={row["path"] for row in completed})
+    rows = read_completed(str(output), "csv")
+    assert len(rows) == 3
+    assert len({row["path"] for row in rows}) == 3
@@ -0,0 +1,34 @@
+"""Unit tests for labelled image folder discovery."""
+
+# Your own modules
+from datasets import iter_images, list_labelled_images
+
+
+def test_lists_every_test_image_with_its_digit():
+    """All 100 test images are found with integer labels matching their folder."""
+    pairs = list_labelled_images("test_images")
+    assert len(pairs) == 100
+    assert {label for _, label in pairs} == set(range(10))
+    assert all(f"/{label}/" in path.replace("\\", "/") for path, label in pairs)
+
+
+def test_ignores_non_images_and_loose_files(tmp_path):
+    """Only image files inside label folders are listed."""
+    (tmp_path / "cat").mkdir()
+    (tmp_path / "cat" / "a.JPG").write_bytes(b"")
+    (tmp_path / "cat" / "notes.txt").write_bytes(b"")
+    (tmp_path / "loose.jpg").write_bytes(b"")
+    assert list_labelled_images(str(tmp_path)) == [(str(tmp_path / "cat" / "a.JPG"), "cat")]
+
+
+def test_iter_images_walks_nested_folders(tmp_path):
+    """Images at any depth are yielded with their parent folder as label."""
+    (tmp_path / "7" / "more").mkdir(parents=True)
+    (tmp_path / "7" / "a.png").write_bytes(b"")
+    (tmp_path / "7" / "more" / "b.png").write_bytes(b"")
+    (tmp_path / "loose.jpg").write_bytes(b"")
+    assert list(iter_images(str(tmp_path))) == [
+        (str(tmp_path / "loose.jpg"), None),
+        (str(tmp_path / "7" / "a.png"), 7),
+        (str(tmp_path / "7" / "more" / "b.png"), "more"),
+    ]
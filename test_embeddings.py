@@ -0,0 +1,101 @@
+"""Unit tests for penultimate-layer embeddings and the cosine nearest-neighbour index."""
+
+# Third-party
+import numpy as np
+import pytest
+
+# Your own modules
+from embeddings import EmbeddingIndex, Embedder, build_index
+from loading import ModelNotReady
+from model import load_model, preprocess_images
+
+IMAGE_PATHS = [
+    "test_images/0/Sign 0 (116).jpeg",
+    "test_images/2/Sign 2 (97).jpeg",
+    "test_images/6/Sign 6 (103).jpeg",
+]
+
+
+@pytest.fixture(scope="module")
+def embedder():
+    """Load the model once and trace its embedding function."""
+    return Embedder(load_model("digit_model.h5"), buckets=(1, 4))
+
+
+def brute_force(vectors, queries, k):
+    vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    return np.argsort(-(queries @ vectors.T), axis=1, kind="stable")[:, :k]
+
+
+def test_search_matches_brute_force():
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(500, 16)).astype(np.float32)
+    queries = rng.normal(size=(37, 16)).astype(np.float32)
+    index = EmbeddingIndex(16, capacity=8)
+    index.add(vectors[:200], list(range(200)))
+    index.add(vectors[200:], list(range(200, 500)))
+    indices, scores = index.search(queries, k=5, batch_size=10)
+    np.testing.assert_array_equal(indices, brute_force(vectors, queries, 5))
+    assert np.all(np.diff(scores, axis=1) <= 0)
+    assert len(index) == 500
+
+
+def test_search_with_k_over_size_returns_every_row():
+    index = EmbeddingIndex(2)
+    index.add(np.array([[1, 0], [0, 1], [1, 1]], dtype=np.float32), ["x", "y", "xy"])
+    indices, scores = index.search(np.array([[1, 0.1]], dtype=np.float32), k=10)
+    assert [index.ids[i] for i in indices[0]] == ["x", "xy", "y"]
+    assert scores[0, 0] == pytest.approx(1 / np.sqrt(1.01), rel=1e-5)
+
+
+def test_add_rejects_mismatched_ids():
+    with pytest.raises(ValueError):
+        EmbeddingIndex(2).add(np.ones((2, 2)), ["only one"])
+
+
+def test_save_and_memory_mapped_load(tmp_path):
+    rng = np.random.default_rng(1)
+    index = EmbeddingIndex(8)
+    index.add(rng.normal(size=(50, 8)), [f"img{i}" for i in range(50)])
+    index.save(tmp_path / "index")
+
+    loaded = EmbeddingIndex.load(tmp_path / "index")
+    assert isinstance(loaded.vectors, np.memmap)
+    assert loaded.ids == index.ids
+    queries = rng.normal(size=(3, 8))
+    np.testing.assert_array_equal(loaded.search(queries, 4)[0], index.search(queries, 4)[0])
+
+    # Adding to a mapped index copies it into memory first
+    loaded.add(np.ones((1, 8)), ["ones"])
+    assert len(loaded) == 51
+    assert loaded.search(np.ones((1, 8)), 1)[0][0, 0] == 50
+
+
+def test_embedder_without_model_is_not_ready():
+    embedder = Embedder()
+    assert not embedder.ready
+    with pytest.raises(ModelNotReady):
+        embedder.embed(np.zeros((1, 224, 224, 3), dtype=np.float32))
+
+
+def test_embeddings_are_penultimate_activations(embedder):
+    model = load_model("digit_model.h5")
+    images, _, _ = preprocess_images(IMAGE_PATHS)
+    vectors = embedder.embed(images)
+    assert vectors.shape == (len(IMAGE_PATHS), model.layers[-1].input.shape[-1])
+    # Applying the last layer to the embeddings reproduces the model output
+    np.testing.assert_allclose(model.layers[-1](vectors).numpy(), model.predict(images, verbose=0), atol=1e-5)
+
+
+def test_image_is_its_own_nearest_neighbour(embedder):
+    index = build_index(embedder, IMAGE_PATHS, batch_size=2)
+    images, _, _ = preprocess_images(IMAGE_PATHS)
+    indices, scores = index.search(embedder.embed(images), k=1)
+    assert indices[:, 0].tolist() == [0, 1, 2]
+    np.testing.assert_allclose(scores[:, 0], 1, atol=1e-5)
+
+
+def test_build_index_without_decodable_images_raises(embedder):
+    with pytest.raises(ValueError, match="Nothing was indexed"):
+        build_index(embedder, ["invalid_file.txt"])
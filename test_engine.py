@@ -0,0 +1,61 @@
+"""Unit tests for the compiled inference engine."""
+
+# Third-party
+import numpy as np
+import pytest
+
+# Your own modules
+from engine import InferenceEngine
+from model import load_model, predict_result, preprocess_images
+
+IMAGE_PATHS = [
+    "test_images/0/Sign 0 (21).jpeg",
+    "test_images/2/Sign 2 (97).jpeg",
+    "test_images/4/Sign 4 (92).jpeg",
+    "test_images/7/Sign 7 (54).jpeg",
+    "test_images/9/Sign 9 (1).jpeg",
+]
+
+
+@pytest.fixture(scope="module")
+def model_instance():
+    """Load the ML model once before running tests."""
+    return load_model("digit_model.h5")
+
+
+@pytest.fixture(scope="module")
+def engine(model_instance):
+    """Build an engine with small buckets so padding and chunking are exercised."""
+    return InferenceEngine(model_instance, buckets=(1, 4))
+
+
+def test_engine_matches_predict_result(model_instance, engine):
+    """The engine's argmax equals predict_result for every image."""
+    images, _, _ = preprocess_images(IMAGE_PATHS)
+    probabilities = engine.predict(images)
+    for row, image in zip(probabilities, images):
+        assert np.argmax(row) == predict_result(model_instance, image[np.newaxis])
+
+
+def test_engine_returns_logits_and_probabilities(engine):
+    """Probabilities sum to one and share the logits' argmax."""
+    images, _, _ = preprocess_images(IMAGE_PATHS[:3])
+    logits, probabilities = engine.infer(images)
+    assert logits.shape == probabilities.shape == (3, probabilities.shape[1])
+    np.testing.assert_allclose(probabilities.sum(axis=1), 1.0, atol=1e-4)
+    np.testing.assert_array_equal(np.argmax(logits, axis=1), np.argmax(probabilities, axis=1))
+
+
+def test_engine_does_not_retrace(engine):
+    """Odd batch sizes are padded to buckets instead of triggering new traces."""
+    traces = engine.tracing_count()
+    images, _, _ = preprocess_images(IMAGE_PATHS)
+    for count in (1, 2, 3, 5):
+        assert engine.predict(images[:count]).shape[0] == count
+    assert engine.tracing_count() == traces
+
+
+def test_engine_rejects_invalid_buckets(model_instance):
+    """Bucket sizes must be positive."""
+    with pytest.raises(ValueError):
+        InferenceEngine(model_instance, buckets=(0,), warmup=False)
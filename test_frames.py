@@ -0,0 +1,95 @@
+"""Unit tests for lazy multi-frame classification."""
+
+# Third-party
+import numpy as np
+import pytest
+from PIL import Image
+
+# Your own modules
+from frames import FrameSmoother, classify_frames, iter_frames
+
+
+class ScriptedModel:
+    """Returns the next scripted probability rows and records batch sizes."""
+
+    def __init__(self, rows):
+        self.rows = [np.asarray(row, dtype=np.float32) for row in rows]
+        self.batches = []
+
+    def predict(self, images):
+        self.batches.append(len(images))
+        start = sum(self.batches[:-1])
+        return np.stack(self.rows[start:start + len(images)])
+
+
+def one_hot(label, confidence=0.95):
+    row = np.full(10, (1 - confidence) / 9, dtype=np.float32)
+    row[label] = confidence
+    return row
+
+
+def make_animation(path, count, fmt="GIF"):
+    """Write ``count`` frames of distinct grey levels and return the path."""
+    frames = [Image.new("RGB", (64, 48), (i * 20 % 256,) * 3) for i in range(count)]
+    frames[0].save(path, format=fmt, save_all=True, append_images=frames[1:])
+    return path
+
+
+def test_iter_frames_applies_stride_and_limit(tmp_path):
+    path = make_animation(tmp_path / "clip.gif", 10)
+    assert [index for index, _ in iter_frames(path, stride=3)] == [0, 3, 6, 9]
+    assert [index for index, _ in iter_frames(path, stride=2, max_frames=2)] == [0, 2]
+
+
+def test_iter_frames_of_single_frame_image():
+    assert [index for index, _ in iter_frames("test_images/3/Sign 3 (122).jpeg")] == [0]
+
+
+def test_iter_frames_rejects_bad_stride(tmp_path):
+    with pytest.raises(ValueError):
+        next(iter_frames(make_animation(tmp_path / "clip.gif", 2), stride=0))
+
+
+def test_smoother_settles_after_stable_confident_frames():
+    smoother = FrameSmoother(smoothing=0.5, confidence=0.9, stable_frames=2)
+    smoother.update(one_hot(4))
+    assert smoother.streak == 1
+    smoother.update(one_hot(7))
+    assert smoother.label in (4, 7) and smoother.streak == 0
+    # The average needs a few frames to get back above the confidence threshold
+    for _ in range(4):
+        smoother.update(one_hot(7))
+    assert smoother.label == 7 and not smoother.settled
+    smoother.update(one_hot(7))
+    assert smoother.settled
+
+
+def test_classify_frames_stops_early_once_settled(tmp_path):
+    path = make_animation(tmp_path / "clip.gif", 40)
+    model = ScriptedModel([one_hot(5)] * 40)
+    result = classify_frames(model, path, batch_size=4, smoother=FrameSmoother(stable_frames=3))
+    assert result["settled"]
+    assert result["label"] == 5
+    assert [frame["index"] for frame in result["frames"]] == [0, 1, 2]
+    # Only the first batch was decoded and run through the model
+    assert model.batches == [4]
+
+
+def test_classify_frames_smooths_over_noisy_frames(tmp_path):
+    path = make_animation(tmp_path / "clip.tiff", 6, fmt="TIFF")
+    rows = [one_hot(2), one_hot(2), one_hot(8, 0.6), one_hot(2), one_hot(2), one_hot(2)]
+    model = ScriptedModel(rows)
+    result = classify_frames(model, path, batch_size=4, smoother=FrameSmoother(stable_frames=10))
+    assert not result["settled"]
+    assert result["label"] == 2
+    assert [frame["label"] for frame in result["frames"]] == [2, 2, 8, 2, 2, 2]
+    assert model.batches == [4, 2]
+    assert sum(result["probabilities"]) == pytest.approx(1.0, abs=1e-5)
+
+
+def test_classify_frames_with_stride(tmp_path):
+    path = make_animation(tmp_path / "clip.gif", 9)
+    model = ScriptedModel([one_hot(1)] * 3)
+    result = classify_frames(model, path, stride=4, batch_size=8, smoother=FrameSmoother(stable_frames=5))
+    assert [frame["index"] for frame in result["frames"]] == [0, 4, 8]
+    assert model.batches == [3]
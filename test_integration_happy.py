@@ -1,8 +1,20 @@
 # test_integration_happy.py
 
 from io import BytesIO
+import json
+import os
 import pytest
 import time
+import zipfile
+import numpy as np
+from PIL import Image
+
+from app import get_model
+import app as app_module
+from cascade import CascadeModel
+from embeddings import build_index
+from jobs import JobRunner, JobStore
+from registry import ModelVersion
 
 def test_integration_repeat_same_image_consistent(client):
     # Ensures predictions for the same image across requests are consistent.
@@ -53,3 +65,227 @@ def test_successful_prediction(client):
     # Assertions
     assert response.status_code == 200
     assert b"Prediction" in response.data  # Modify this check based on your output
+
+def test_batch_prediction_returns_results_in_order(client):
+    # Ensures the batch endpoint classifies every file and keeps input order.
+    paths = ["test_images/0/Sign 0 (21).jpeg", "test_images/9/Sign 9 (1).jpeg"]
+    files = []
+    for path in paths:
+        with open(path, "rb") as f:
+            files.append((BytesIO(f.read()), path.rsplit("/", 1)[-1]))
+    resp = client.post(
+        "/prediction/batch",
+        data={"files": files},
+        content_type="multipart/form-data",
+    )
+    assert resp.status_code == 200
+    results = resp.get_json()["results"]
+    assert [r["filename"] for r in results] == [name for _, name in files]
+    assert all(isinstance(r["label"], int) and len(r["probabilities"]) == 10 for r in results)
+
+def test_repeated_upload_served_from_cache(client):
+    # Ensures a repeated upload of identical bytes is answered from the cache.
+    with open("test_images/3/Sign 3 (122).jpeg", "rb") as f:
+        data = f.read()
+    hits_before = client.get("/stats/cache").get_json()["hits"]
+    responses = [
+        client.post(
+            "/prediction",
+            data={"file": (BytesIO(data), "repeat.jpeg")},
+            content_type="multipart/form-data",
+        )
+        for _ in range(2)
+    ]
+    assert responses[0].data == responses[1].data
+    assert client.get("/stats/cache").get_json()["hits"] == hits_before + 1
+
+def test_health_and_readiness_endpoints(client):
+    # Ensures liveness is reported immediately and readiness once the model is loaded.
+    assert client.get("/healthz").status_code == 200
+    get_model()
+    resp = client.get("/readyz")
+    assert resp.status_code == 200
+    assert resp.get_json()["state"] == "ready"
+
+def test_json_prediction_returns_top_k(client):
+    # Ensures the JSON API returns the top-k classes, probabilities and stage timings.
+    with open("test_images/6/Sign 6 (103).jpeg", "rb") as f:
+        img = BytesIO(f.read())
+    resp = client.post(
+        "/api/predict?k=3",
+        data={"file": (img, "img.jpeg")},
+        content_type="multipart/form-data",
+    )
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body["label"] == body["classes"][0]
+    assert len(body["classes"]) == len(body["probabilities"]) == 3
+    assert body["probabilities"] == sorted(body["probabilities"], reverse=True)
+    assert set(body["timings_ms"]) == {"decode", "preprocess", "inference"}
+
+def test_json_prediction_without_probabilities(client):
+    # Ensures the probabilities-off mode keeps only the class labels.
+    with open("test_images/6/Sign 6 (103).jpeg", "rb") as f:
+        img = BytesIO(f.read())
+    resp = client.post(
+        "/api/predict",
+        data={"file": (img, "img.jpeg"), "k": "1", "probabilities": "0"},
+        content_type="multipart/form-data",
+    )
+    body = resp.get_json()
+    assert len(body["classes"]) == 1
+    assert "probabilities" not in body
+
+def test_metrics_endpoint_reports_stage_latencies(client):
+    # Ensures each /prediction stage is timed and exposed in Prometheus format.
+    with open("test_images/4/Sign 4 (130).jpeg", "rb") as f:
+        # Trailing bytes keep the upload distinct from cached ones
+        img = BytesIO(f.read() + b"metrics")
+    client.post("/prediction", data={"file": (img, "img.jpeg")}, content_type="multipart/form-data")
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.content_type.startswith("text/plain")
+    text = resp.get_data(as_text=True)
+    for stage in ("parse", "preprocess", "inference", "render"):
+        assert f'prediction_stage_seconds_count{{route="/prediction",stage="{stage}"}}' in text
+    assert 'prediction_requests_total{route="/prediction",status="200"}' in text
+
+def test_similar_images_returns_nearest_stored_images(client, monkeypatch):
+    # Ensures an upload of a stored image finds itself first with cosine similarity 1.
+    paths = ["test_images/0/Sign 0 (116).jpeg", "test_images/3/Sign 3 (122).jpeg", "test_images/6/Sign 6 (103).jpeg"]
+    get_model()
+    monkeypatch.setattr(app_module, "embedding_index", build_index(app_module.embedder, paths))
+    with open(paths[1], "rb") as f:
+        img = BytesIO(f.read())
+    resp = client.post("/similar?k=2", data={"file": (img, "img.jpeg")}, content_type="multipart/form-data")
+    assert resp.status_code == 200
+    neighbours = resp.get_json()["neighbours"]
+    assert len(neighbours) == 2
+    assert neighbours[0]["id"] == paths[1]
+    assert neighbours[0]["score"] == pytest.approx(1.0, abs=1e-4)
+    assert neighbours[0]["score"] >= neighbours[1]["score"]
+
+def test_frame_prediction_classifies_animated_gif(client):
+    # Ensures every kept frame of a GIF is classified and a smoothed label is returned.
+    frames = [Image.open("test_images/3/Sign 3 (122).jpeg").convert("RGB") for _ in range(5)]
+    gif = BytesIO()
+    frames[0].save(gif, format="GIF", save_all=True, append_images=frames[1:])
+    gif.seek(0)
+    resp = client.post(
+        "/api/predict/frames?stride=2",
+        data={"file": (gif, "clip.gif")},
+        content_type="multipart/form-data",
+    )
+    assert resp.status_code == 200
+    body = resp.get_json()
+    indices = [frame["index"] for frame in body["frames"]]
+    assert indices == [0, 2, 4][:len(indices)]
+    assert body["label"] == max(range(10), key=lambda c: body["probabilities"][c])
+    assert isinstance(body["settled"], bool)
+
+def test_model_hot_swap_through_admin_routes(client, monkeypatch):
+    # Ensures a registered version is loaded in the background and swapped in without downtime.
+    monkeypatch.setitem(app_module.app.config, "MODEL_ADMIN_TOKEN", "secret")
+    auth = {"Authorization": "Bearer secret"}
+    get_model()
+    resp = client.post("/models", data={"name": "retrained", "path": "digit_model.h5"}, headers=auth)
+    assert resp.status_code == 201
+    try:
+        assert client.post("/models/retrained/activate", headers=auth).status_code == 202
+        with open("test_images/0/Sign 0 (116).jpeg", "rb") as f:
+            payload = f.read()
+        deadline = time.monotonic() + 60
+        while client.get("/models").get_json()["active"] != "retrained":
+            # Requests keep being served by the previous version during the load
+            resp = client.post("/api/predict", data={"file": (BytesIO(payload), "img.jpeg")},
+                               content_type="multipart/form-data")
+            assert resp.status_code == 200
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+        resp = client.post("/api/predict", data={"file": (BytesIO(payload), "img.jpeg")},
+                           content_type="multipart/form-data")
+        assert resp.get_json()["version"] == "retrained"
+        assert client.get("/readyz").get_json()["version"] == "retrained"
+    finally:
+        app_module.registry.activate("default", background=False)
+
+def test_prediction_profile_is_saved_when_requested(client, monkeypatch, tmp_path):
+    # Ensures the profile header with the admin token saves a cProfile dump of the request.
+    monkeypatch.setitem(app_module.app.config, "MODEL_ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(app_module.profiler, "token", "secret")
+    monkeypatch.setattr(app_module.profiler, "dump_dir", str(tmp_path))
+    get_model()
+    with open("test_images/2/Sign 2 (97).jpeg", "rb") as f:
+        payload = f.read()
+    resp = client.post("/prediction", data={"file": (BytesIO(payload), "img.jpeg")},
+                       content_type="multipart/form-data")
+    assert "X-Profile-Dump" not in resp.headers
+    resp = client.post("/prediction", data={"file": (BytesIO(payload), "img.jpeg")},
+                       content_type="multipart/form-data", headers={"X-Profile": "secret"})
+    assert resp.status_code == 200
+    dump = resp.headers["X-Profile-Dump"]
+    assert (tmp_path / dump).is_file()
+    auth = {"Authorization": "Bearer secret"}
+    assert client.get("/profiles", headers=auth).get_json()["profiles"] == [dump]
+    assert client.get(f"/profiles/{dump}", headers=auth).data == (tmp_path / dump).read_bytes()
+
+def test_async_job_classifies_zip_archive(client, monkeypatch, tmp_path):
+    # Ensures a zipped submission is queued, drained in the background and streamed back.
+    store = JobStore(str(tmp_path / "jobs.sqlite3"), str(tmp_path / "uploads"))
+    runner = JobRunner(store, app_module.classify_job_images, poll_interval=0.05)
+    monkeypatch.setattr(app_module, "job_services", {"store": store, "runner": runner})
+    runner.start()
+    paths = ["test_images/0/Sign 0 (116).jpeg", "test_images/4/Sign 4 (130).jpeg", "invalid_file.txt"]
+    archive = BytesIO()
+    with zipfile.ZipFile(archive, "w") as z:
+        for path in paths:
+            z.write(path, path.rsplit("/", 1)[-1])
+    archive.seek(0)
+    resp = client.post("/jobs", data={"files": (archive, "images.zip")}, content_type="multipart/form-data")
+    assert resp.status_code == 202
+    job_id = resp.get_json()["id"]
+    assert resp.headers["Location"] == f"/jobs/{job_id}"
+    assert resp.get_json()["total"] == 3
+
+    lines = client.get(f"/jobs/{job_id}/results?stream=1").get_data(as_text=True).splitlines()
+    results = sorted((json.loads(line) for line in lines), key=lambda r: r["index"])
+    assert [r["filename"] for r in results] == ["Sign 0 (116).jpeg", "Sign 4 (130).jpeg", "invalid_file.txt"]
+    assert results[0]["version"] == "default" and 0 <= results[0]["label"] <= 9
+    assert "error" in results[2]
+    status = client.get(f"/jobs/{job_id}").get_json()
+    assert (status["status"], status["done"], status["failed"], status["progress"]) == ("done", 2, 1, 1.0)
+    body = client.get(f"/jobs/{job_id}/results?after=0&limit=1").get_json()
+    assert len(body["results"]) == 1 and body["next"] > 0
+    assert client.delete(f"/jobs/{job_id}").status_code == 204
+    assert client.get(f"/jobs/{job_id}").status_code == 404
+    runner.close()
+
+def test_cascade_escalates_to_worker_pool(monkeypatch):
+    # Ensures CASCADE_MODEL_PATH still applies when inference runs in worker processes.
+    class FakePool:
+        def __init__(self, path, num_workers, **_options):
+            self.path, self.num_workers = path, num_workers
+        def start(self):
+            return self
+        def predict(self, images):
+            return np.eye(10, dtype=np.float32)[[7] * len(images)]
+        def close(self):
+            pass
+
+    class Uncertain:
+        def predict(self, images):
+            return np.full((len(images), 10), 0.1, dtype=np.float32)
+
+    monkeypatch.setitem(app_module.app.config, "INFERENCE_WORKERS", 2)
+    monkeypatch.setitem(app_module.app.config, "CASCADE_MODEL_PATH", "first.tflite")
+    monkeypatch.setattr(app_module, "WorkerPool", FakePool)
+    monkeypatch.setattr(app_module, "load_model", lambda path, backend=None: Uncertain())
+    version = ModelVersion("pooled", "digit_model.h5", app_module.build_serving_model)
+    serving_model = version.get()
+    try:
+        assert isinstance(serving_model, CascadeModel) and isinstance(serving_model.full, FakePool)
+        assert version.nbytes == 2 * os.path.getsize("digit_model.h5")
+        assert serving_model.predict(np.zeros((3, 224, 224, 3), dtype=np.float32)).argmax(axis=1).tolist() == [7] * 3
+        assert serving_model.stats()["escalated"] == 3
+    finally:
+        version.unload()
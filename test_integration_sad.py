@@ -2,7 +2,13 @@
 
 import pytest
 from app import app
+import time
+import app as app_module
+import numpy as np
+from embeddings import EmbeddingIndex
 from io import BytesIO
+from admission import AdmissionController
+from jobs import JobRunner, JobStore
 
 @pytest.fixture
 def client():
@@ -27,3 +33,192 @@ def test_missing_file(client):
     response = client.post("/prediction", data={}, content_type="multipart/form-data")
     assert response.status_code == 200
     assert b"File cannot be processed." in response.data  # Check if the error message is displayed
+
+def test_batch_prediction_reports_corrupt_file_individually(client):
+    # Ensures one corrupt upload does not fail the rest of the batch.
+    with open("test_images/6/Sign 6 (103).jpeg", "rb") as f:
+        good = BytesIO(f.read())
+    bad = BytesIO(b"\x00\x01\x02\x03\x04corrupt")
+    resp = client.post(
+        "/prediction/batch",
+        data={"files": [(bad, "bad.jpg"), (good, "good.jpeg")]},
+        content_type="multipart/form-data",
+    )
+    assert resp.status_code == 200
+    bad_result, good_result = resp.get_json()["results"]
+    assert "cannot be processed" in bad_result["error"]
+    assert "label" in good_result
+
+def test_batch_prediction_without_files(client):
+    # Ensures an empty batch request is rejected with a JSON error.
+    resp = client.post("/prediction/batch", data={}, content_type="multipart/form-data")
+    assert resp.status_code == 400
+    assert "error" in resp.get_json()
+
+def test_prediction_with_expired_deadline(client):
+    # Ensures requests whose deadline already passed are dropped before inference.
+    with open("test_images/6/Sign 6 (103).jpeg", "rb") as f:
+        # Trailing bytes keep the upload distinct from cached ones
+        img = BytesIO(f.read() + b"deadline")
+    resp = client.post(
+        "/prediction",
+        data={"file": (img, "img.jpeg")},
+        content_type="multipart/form-data",
+        headers={"X-Request-Deadline": str(time.time() - 1)},
+    )
+    assert resp.status_code == 504
+    assert client.get("/stats/admission").get_json()["expired"] >= 1
+
+def test_prediction_with_invalid_deadline(client):
+    # Ensures a malformed deadline header is rejected.
+    resp = client.post(
+        "/prediction",
+        data={},
+        content_type="multipart/form-data",
+        headers={"X-Request-Deadline": "soon"},
+    )
+    assert resp.status_code == 400
+
+def test_json_prediction_rejects_bad_input(client):
+    # Ensures the JSON API reports a missing file, a bad k and a corrupt image as 400.
+    assert client.post("/api/predict", data={}, content_type="multipart/form-data").status_code == 400
+    bad_k = client.post(
+        "/api/predict?k=0",
+        data={"file": (BytesIO(b"irrelevant"), "img.jpeg")},
+        content_type="multipart/form-data",
+    )
+    assert bad_k.status_code == 400
+    corrupt = client.post(
+        "/api/predict",
+        data={"file": (BytesIO(b"\x00\x01\x02corrupt"), "bad.jpg")},
+        content_type="multipart/form-data",
+    )
+    assert corrupt.status_code == 400
+    assert "cannot be processed" in corrupt.get_json()["error"]
+
+def test_metrics_count_unreadable_images(client):
+    # Ensures undecodable uploads are counted by exception type.
+    client.post(
+        "/prediction",
+        data={"file": (BytesIO(b"\x00\x01\x02metrics"), "bad.jpg")},
+        content_type="multipart/form-data",
+    )
+    text = client.get("/metrics").get_data(as_text=True)
+    assert 'prediction_errors_total{route="/prediction",type="UnidentifiedImageError"}' in text
+
+def test_upload_over_size_limit_is_rejected(client, monkeypatch):
+    # Ensures bodies over MAX_CONTENT_LENGTH are refused with 413.
+    monkeypatch.setitem(app.config, "MAX_CONTENT_LENGTH", 1024)
+    resp = client.post(
+        "/prediction",
+        data={"file": (BytesIO(b"x" * 4096), "big.jpg")},
+        content_type="multipart/form-data",
+    )
+    assert resp.status_code == 413
+    assert b"exceeds the limit" in resp.data
+
+def test_image_over_pixel_limit_is_rejected(client, monkeypatch):
+    # Ensures images whose header declares too many pixels are refused before decoding.
+    monkeypatch.setitem(app.config, "MAX_IMAGE_PIXELS", 1000)
+    with open("test_images/2/Sign 2 (97).jpeg", "rb") as f:
+        img = BytesIO(f.read() + b"pixels")
+    resp = client.post("/prediction", data={"file": (img, "img.jpeg")}, content_type="multipart/form-data")
+    assert resp.status_code == 413
+    assert b"exceeds the limit" in resp.data
+
+def test_similar_images_without_index(client, monkeypatch):
+    # Ensures /similar reports a missing embedding index with 404.
+    monkeypatch.setattr(app_module, "embedding_index", None)
+    with open("test_images/2/Sign 2 (97).jpeg", "rb") as f:
+        img = BytesIO(f.read())
+    resp = client.post("/similar", data={"file": (img, "img.jpeg")}, content_type="multipart/form-data")
+    assert resp.status_code == 404
+    assert "index" in resp.get_json()["error"]
+
+def test_similar_images_rejects_bad_input(client, monkeypatch):
+    # Ensures /similar answers a missing file, a bad k and an unreadable file with 400.
+    index = EmbeddingIndex(64)
+    index.add(np.ones((1, 64), dtype=np.float32), ["ones"])
+    monkeypatch.setattr(app_module, "embedding_index", index)
+    assert client.post("/similar", data={}, content_type="multipart/form-data").status_code == 400
+    with open("test_images/2/Sign 2 (97).jpeg", "rb") as f:
+        img = BytesIO(f.read())
+    resp = client.post("/similar?k=0", data={"file": (img, "img.jpeg")}, content_type="multipart/form-data")
+    assert resp.status_code == 400
+    with open("invalid_file.txt", "rb") as f:
+        resp = client.post("/similar", data={"file": (f, "invalid_file.txt")}, content_type="multipart/form-data")
+    assert resp.status_code == 400
+
+def test_frame_prediction_rejects_bad_input(client):
+    # Ensures /api/predict/frames answers a bad stride and an unreadable file with 400.
+    with open("test_images/2/Sign 2 (97).jpeg", "rb") as f:
+        img = BytesIO(f.read())
+    resp = client.post("/api/predict/frames?stride=0", data={"file": (img, "img.jpeg")},
+                       content_type="multipart/form-data")
+    assert resp.status_code == 400
+    with open("invalid_file.txt", "rb") as f:
+        resp = client.post("/api/predict/frames", data={"file": (f, "invalid_file.txt")},
+                           content_type="multipart/form-data")
+    assert resp.status_code == 400
+
+def test_model_admin_routes_require_token(client, monkeypatch):
+    # Ensures model administration is off without a token and rejects wrong ones.
+    monkeypatch.setitem(app.config, "MODEL_ADMIN_TOKEN", None)
+    assert client.post("/models/default/activate").status_code == 403
+    monkeypatch.setitem(app.config, "MODEL_ADMIN_TOKEN", "secret")
+    assert client.post("/models/default/activate", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get("/models").get_json()["active"] == "default"
+
+def test_model_admin_rejects_unknown_versions_and_files(client, monkeypatch):
+    # Ensures unknown versions give 404 and registering a missing file gives 400.
+    monkeypatch.setitem(app.config, "MODEL_ADMIN_TOKEN", "secret")
+    auth = {"Authorization": "Bearer secret"}
+    assert client.post("/models/missing/activate", headers=auth).status_code == 404
+    assert client.post("/models/missing/candidate", data={"share": "0.1"}, headers=auth).status_code == 404
+    assert client.post("/models/default/candidate", data={"share": "2"}, headers=auth).status_code == 400
+    resp = client.post("/models", data={"name": "v9", "path": "no_such_model.h5"}, headers=auth)
+    assert resp.status_code == 400
+
+def test_job_routes_reject_bad_requests(client, monkeypatch, tmp_path):
+    # Ensures job routes report missing uploads, unknown jobs, bad cursors and corrupt archives.
+    monkeypatch.setattr(app_module, "job_services", {})
+    monkeypatch.setitem(app_module.app.config, "JOB_DB_PATH", str(tmp_path / "jobs.sqlite3"))
+    monkeypatch.setitem(app_module.app.config, "JOB_UPLOAD_DIR", str(tmp_path / "uploads"))
+    assert client.post("/jobs", data={}, content_type="multipart/form-data").status_code == 400
+    assert client.get("/jobs/missing").status_code == 404
+    assert client.get("/jobs/missing/results").status_code == 404
+    assert client.delete("/jobs/missing").status_code == 404
+    assert client.get("/stats/jobs").get_json()["queued"] == 0
+    # Looking up jobs before any was submitted creates no queue and starts no workers
+    assert app_module.job_services == {} and list(tmp_path.iterdir()) == []
+    store = JobStore(str(tmp_path / "jobs.sqlite3"), str(tmp_path / "uploads"))
+    monkeypatch.setattr(app_module, "job_services", {"store": store, "runner": JobRunner(store, app_module.classify_job_images)})
+    empty = BytesIO(b"PK\x05\x06" + b"\x00" * 18)
+    resp = client.post("/jobs", data={"files": (empty, "empty.zip")}, content_type="multipart/form-data")
+    assert resp.status_code == 400
+    broken = BytesIO(b"PK\x05\x06" + b"\x00" * 4 + b"\x01\x00\x01\x00" + b"\x2e\x00\x00\x00" + b"\x00" * 6)
+    resp = client.post("/jobs", data={"files": (broken, "broken.zip")}, content_type="multipart/form-data")
+    assert resp.status_code == 400
+    assert "Archive cannot be read" in resp.get_json()["error"]
+
+def test_batch_prediction_is_shed_and_deadline_checked(client, monkeypatch):
+    # Ensures /prediction/batch goes through admission control like the other prediction routes.
+    with open("test_images/6/Sign 6 (117).jpeg", "rb") as f:
+        payload = f.read()
+    resp = client.post(
+        "/prediction/batch",
+        data={"files": [(BytesIO(payload), "a.jpeg")]},
+        content_type="multipart/form-data",
+        headers={"X-Request-Deadline": str(time.time() - 1)},
+    )
+    assert resp.status_code == 504
+    monkeypatch.setattr(app_module, "admission", AdmissionController(1, 0))
+    monkeypatch.setitem(app.config, "ADMISSION_RETRY_AFTER", 7)
+    with app_module.admission.admit():
+        resp = client.post(
+            "/prediction/batch",
+            data={"files": [(BytesIO(payload), "a.jpeg")]},
+            content_type="multipart/form-data",
+        )
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == "7"
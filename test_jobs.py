@@ -0,0 +1,118 @@
+"""Unit tests for the persistent job queue and its background runner."""
+
+# Standard library
+import io
+import zipfile
+
+# Third-party
+import pytest
+
+# Your own modules
+from jobs import DONE, PENDING, RUNNING, JobRunner, JobStore, SubmissionTooLarge, expand_uploads
+
+
+def read_label(path):
+    # Images are plain text digits, so results are easy to check
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data.isdigit():
+        return {"error": "not a digit"}
+    return {"label": int(data)}
+
+
+def submit(store, *payloads):
+    return store.submit((f"{i}.txt", io.BytesIO(payload)) for i, payload in enumerate(payloads))
+
+
+def test_runner_drains_jobs_in_batches_and_tracks_progress(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"), str(tmp_path / "uploads"))
+    job_id = submit(store, b"3", b"x", b"7")
+    assert store.status(job_id)["status"] == PENDING
+    runner = JobRunner(store, lambda paths: [read_label(p) for p in paths], batch_size=2)
+    assert runner.run_once() == 2
+    status = store.status(job_id)
+    assert (status["status"], status["done"], status["failed"], status["pending"]) == (RUNNING, 1, 1, 1)
+    results, cursor = store.results(job_id)
+    assert [r["filename"] for r in results] == ["0.txt", "1.txt"]
+    assert runner.run_once() == 1
+    assert runner.run_once() == 0
+    status = store.status(job_id)
+    assert status["status"] == DONE
+    assert status["progress"] == 1.0
+    assert store.results(job_id, after=cursor)[0] == [{"index": 2, "filename": "2.txt", "label": 7}]
+    assert not (tmp_path / "uploads" / job_id).exists()
+    assert runner.stats()["images"] == 3
+
+
+def test_claimed_images_are_requeued_after_their_lease_and_failed_batches(tmp_path):
+    db, uploads = str(tmp_path / "jobs.sqlite3"), str(tmp_path / "uploads")
+    store = JobStore(db, uploads)
+    job_id = submit(store, b"1", b"2")
+    assert len(store.claim(10)) == 2
+    store.close()
+
+    # A restart alone does not take images away from a process still holding them
+    store = JobStore(db, uploads)
+    assert store.claim(10) == []
+    store.close()
+
+    store = JobStore(db, uploads, lease_seconds=0)
+
+    def unavailable(_paths):
+        raise RuntimeError("model is loading")
+
+    runner = JobRunner(store, unavailable)
+    with pytest.raises(RuntimeError):
+        runner.run_once()
+    assert store.queued() == 2
+    assert runner.stats()["last_error"] == "RuntimeError: model is loading"
+
+    runner.classify = lambda paths: [read_label(p) for p in paths]
+    runner.run_once()
+    assert [r["label"] for r in store.results(job_id)[0]] == [1, 2]
+
+
+def test_stores_sharing_a_database_never_repeat_result_cursors(tmp_path):
+    db, uploads = str(tmp_path / "jobs.sqlite3"), str(tmp_path / "uploads")
+    first, second = JobStore(db, uploads), JobStore(db, uploads)
+    job_id = submit(first, b"0", b"1", b"2", b"3")
+    delivered = []
+    results, cursor = first.results(job_id)
+    for store in (first, second, first, second):
+        runner = JobRunner(store, lambda paths: [read_label(p) for p in paths], batch_size=1)
+        assert runner.run_once() == 1
+        results, cursor = store.results(job_id, after=cursor)
+        delivered.extend(r["label"] for r in results)
+    assert delivered == [0, 1, 2, 3]
+    # A third process opening the database continues the shared sequence
+    third = JobStore(db, uploads)
+    assert third.results(job_id, after=cursor) == ([], cursor)
+    assert [r["label"] for r in third.results(job_id)[0]] == [0, 1, 2, 3]
+
+
+def test_submit_counts_the_bytes_it_writes(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"), str(tmp_path / "uploads"))
+    with pytest.raises(SubmissionTooLarge, match="Image 0.txt"):
+        store.submit([("0.txt", io.BytesIO(b"12345"))], max_image_bytes=4)
+    with pytest.raises(SubmissionTooLarge, match="at most 5 bytes"):
+        store.submit([("0.txt", io.BytesIO(b"123")), ("1.txt", io.BytesIO(b"456"))], max_total_bytes=5)
+    assert list((tmp_path / "uploads").iterdir()) == []
+    job_id = store.submit([("0.txt", io.BytesIO(b"123")), ("1.txt", io.BytesIO(b"45"))], 3, 5)
+    assert store.status(job_id)["total"] == 2
+
+
+def test_zip_archives_are_expanded_within_limits():
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as z:
+        z.writestr("a/1.jpeg", b"1")
+        z.writestr("a/", b"")
+        z.writestr("a/2.jpeg", b"22")
+    uploads = [("set.zip", archive), ("3.jpeg", io.BytesIO(b"3"))]
+    images = [(name, stream.read()) for name, stream in expand_uploads(uploads, 5, 10)]
+    assert images == [("a/1.jpeg", b"1"), ("a/2.jpeg", b"22"), ("3.jpeg", b"3")]
+    with pytest.raises(SubmissionTooLarge):
+        list(expand_uploads([("set.zip", archive)], 1, 10))
+    with pytest.raises(SubmissionTooLarge):
+        list(expand_uploads([("set.zip", archive)], 5, 1))
+    with pytest.raises(SubmissionTooLarge):
+        list(expand_uploads([("set.zip", archive)], 5, 10, max_total_bytes=2))
@@ -0,0 +1,61 @@
+"""Unit tests for background model loading."""
+
+# Standard library
+import threading
+
+# Third-party
+import pytest
+
+# Your own modules
+from loading import ModelLoader, ModelNotReady
+
+
+def test_background_load_becomes_ready():
+    """The built model is returned once the loader thread finishes."""
+    def build(loader):
+        with loader.phase("load"):
+            return "model"
+
+    loader = ModelLoader(build)
+    loader.start()
+    assert loader.get(timeout=5) == "model"
+    status = loader.status()
+    assert status["state"] == ModelLoader.READY
+    assert set(status["timings_seconds"]) == {"load", "total"}
+
+
+def test_get_times_out_while_loading():
+    """Requests arriving before the model is ready raise ModelNotReady."""
+    release = threading.Event()
+
+    def build(_loader):
+        release.wait(5)
+        return "model"
+
+    loader = ModelLoader(build)
+    loader.start()
+    with pytest.raises(ModelNotReady):
+        loader.get(timeout=0.01)
+    assert loader.status()["state"] == ModelLoader.LOADING
+    release.set()
+    assert loader.get(timeout=5) == "model"
+
+
+def test_lazy_loader_starts_on_first_get():
+    """A loader that was never started loads when first asked."""
+    loader = ModelLoader(lambda _loader: "model")
+    assert loader.state == ModelLoader.PENDING
+    assert loader.get(timeout=5) == "model"
+
+
+def test_failed_load_is_reported():
+    """Load errors are kept for /healthz and raised as ModelNotReady."""
+    def build(_loader):
+        raise OSError("missing.h5 not found")
+
+    loader = ModelLoader(build)
+    loader.start(background=False)
+    assert loader.state == ModelLoader.FAILED
+    assert "missing.h5" in loader.status()["error"]
+    with pytest.raises(ModelNotReady):
+        loader.get(timeout=1)
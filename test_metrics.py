@@ -0,0 +1,51 @@
+"""Unit tests for the in-process metrics registry."""
+
+# Your own modules
+from metrics import MetricsRegistry
+
+
+def test_histogram_buckets_are_cumulative_in_output():
+    """Each bucket line counts every observation at or below its bound."""
+    registry = MetricsRegistry(buckets=(0.01, 0.1))
+    for value in (0.005, 0.05, 0.05, 3.0):
+        registry.observe("stage_seconds", value, stage="inference")
+    text = registry.render()
+    assert 'stage_seconds_bucket{stage="inference",le="0.01"} 1' in text
+    assert 'stage_seconds_bucket{stage="inference",le="0.1"} 3' in text
+    assert 'stage_seconds_bucket{stage="inference",le="+Inf"} 4' in text
+    assert 'stage_seconds_count{stage="inference"} 4' in text
+    assert "# TYPE stage_seconds histogram" in text
+
+
+def test_counters_are_kept_per_label_set():
+    """Counters with different labels are independent series."""
+    registry = MetricsRegistry()
+    registry.describe("errors_total", "Errors by type.")
+    registry.inc("errors_total", type="UnidentifiedImageError")
+    registry.inc("errors_total", type="UnidentifiedImageError")
+    registry.inc("errors_total", type="Overloaded")
+    assert registry.counter("errors_total", type="UnidentifiedImageError") == 2
+    assert registry.counter("errors_total", type="Missing") == 0
+    text = registry.render()
+    assert "# HELP errors_total Errors by type." in text
+    assert 'errors_total{type="Overloaded"} 1' in text
+
+
+def test_time_records_completed_blocks_only():
+    """The timing context manager skips blocks that raise."""
+    registry = MetricsRegistry()
+    with registry.time("stage_seconds", stage="render"):
+        pass
+    try:
+        with registry.time("stage_seconds", stage="render"):
+            raise RuntimeError
+    except RuntimeError:
+        pass
+    assert sum(registry.histogram("stage_seconds", stage="render")["counts"]) == 1
+
+
+def test_label_values_are_escaped():
+    """Quotes and backslashes in label values do not break the text format."""
+    registry = MetricsRegistry()
+    registry.inc("errors_total", type='bad"name\\')
+    assert 'errors_total{type="bad\\"name\\\\"} 1' in registry.render()
@@ -7,7 +7,9 @@ from PIL import Image
 import numpy as np
 
 # Your own modules
-from model import load_model, preprocess_image, predict_result
+from model import (
+    load_model, preprocess_image, preprocess_images, predict_proba, predict_result, save_fast_model,
+)
 
 
 # Load the model once for all tests
@@ -126,3 +128,49 @@ def test_model_predictions_consistency(model_instance):
     assert all(p == predictions_local[0] for p in predictions_local), (
         "Predictions should be consistent for the same input"
     )
+
+
+# Batch Tests
+
+def test_preprocess_images_contiguous_batch():
+    """Test preprocess_images builds one normalized float32 batch in input order."""
+    paths = ["test_images/0/Sign 0 (21).jpeg", "test_images/3/Sign 3 (122).jpeg"]
+    batch, indices, errors = preprocess_images(paths)
+
+    assert batch.shape == (2, 224, 224, 3) and batch.dtype == np.float32
+    assert batch.flags["C_CONTIGUOUS"]
+    assert indices == [0, 1] and not errors
+    np.testing.assert_allclose(batch[0], preprocess_image(paths[0])[0], atol=1e-6)
+
+
+def test_preprocess_images_reports_bad_files():
+    """Test undecodable files are reported individually without dropping the others."""
+    bad = BytesIO(b"\x00\x01notanimage")
+    batch, indices, errors = preprocess_images([bad, "test_images/1/Sign 1 (8).jpeg", "missing.jpeg"])
+
+    assert batch.shape == (1, 224, 224, 3)
+    assert indices == [1]
+    assert set(errors) == {0, 2}
+
+
+def test_predict_proba_matches_predict_result(model_instance):
+    """Test chunked batch probabilities agree with single-image predictions."""
+    paths = ["test_images/2/Sign 2 (97).jpeg", "test_images/4/Sign 4 (92).jpeg", "test_images/5/Sign 5 (86).jpeg"]
+    batch, _, _ = preprocess_images(paths)
+    probabilities = predict_proba(model_instance, batch, batch_size=2)
+
+    assert probabilities.shape[0] == 3
+    for row, path in zip(probabilities, paths):
+        assert np.argmax(row) == predict_result(model_instance, preprocess_image(path))
+
+
+def test_fast_model_format_round_trip(model_instance, tmp_path):
+    """Test a model saved with save_fast_model predicts like the original."""
+    path = tmp_path / "digit_model.npz"
+    save_fast_model(model_instance, str(path))
+    reloaded = load_model(str(path))
+
+    processed_img_local = preprocess_image("test_images/6/Sign 6 (103).jpeg")
+    np.testing.assert_allclose(
+        reloaded.predict(processed_img_local), model_instance.predict(processed_img_local), atol=1e-6
+    )
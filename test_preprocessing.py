@@ -0,0 +1,118 @@
+"""Unit tests for the fast preprocessing engine."""
+
+# Standard library
+from io import BytesIO
+
+# Third-party
+import numpy as np
+import pytest
+from PIL import Image
+
+# Your own modules
+from preprocessing import BufferPool, ImageTooLarge, decode_image, open_image, preprocess_into, to_rgb
+
+
+def jpeg_bytes(size, color=(120, 80, 40)):
+    """Encode a solid-colour JPEG of the given size."""
+    buf = BytesIO()
+    Image.new("RGB", size, color).save(buf, format="JPEG")
+    buf.seek(0)
+    return buf
+
+
+def test_preprocess_into_shape_and_range():
+    """Output is a normalized (1, 224, 224, 3) float32 array."""
+    arr = preprocess_into("test_images/2/Sign 2 (97).jpeg")
+    assert arr.shape == (1, 224, 224, 3)
+    assert arr.dtype == np.float32
+    assert 0.0 <= arr.min() and arr.max() <= 1.0
+
+
+def test_preprocess_into_fills_supplied_buffer():
+    """A caller-supplied buffer is written in place and returned."""
+    out = np.zeros((224, 224, 3), dtype=np.float32)
+    result = preprocess_into(jpeg_bytes((300, 300)), out)
+    assert result is out
+    assert out.max() > 0
+
+
+def test_draft_decoding_matches_full_decode():
+    """Reduced-scale decoding of a large JPEG stays close to the full decode."""
+    draft = preprocess_into(jpeg_bytes((3000, 2000)), draft=True)
+    full = preprocess_into(jpeg_bytes((3000, 2000)), draft=False)
+    np.testing.assert_allclose(draft, full, atol=0.02)
+
+
+def test_draft_decoding_reduces_decoded_size():
+    """Draft mode asks the JPEG decoder for a smaller bitmap."""
+    img = Image.open(jpeg_bytes((3200, 3200)))
+    img.draft(img.mode, (448, 448))
+    assert img.size[0] < 3200
+
+
+@pytest.mark.parametrize("resample", ["nearest", "bilinear", "bicubic", "lanczos"])
+def test_selectable_resample_filter(resample):
+    """Every named resample filter produces the model input size."""
+    assert decode_image(jpeg_bytes((500, 400)), resample=resample).size == (224, 224)
+
+
+def test_unknown_resample_filter_rejected():
+    """An unknown filter name raises KeyError."""
+    with pytest.raises(KeyError):
+        decode_image(jpeg_bytes((500, 400)), resample="sharpest")
+
+
+@pytest.mark.parametrize("mode", ["L", "RGBA", "P", "CMYK"])
+def test_modes_converted_to_rgb(mode):
+    """Grayscale, transparent, palette and CMYK inputs become RGB."""
+    img = Image.new("RGB", (256, 256), (10, 200, 30)).convert(mode)
+    assert decode_image(img).mode == "RGB"
+
+
+def test_transparent_pixels_flattened_on_white():
+    """Fully transparent pixels become white instead of their hidden colour."""
+    rgba = Image.new("RGBA", (4, 4), (0, 0, 0, 0))
+    assert to_rgb(rgba).getpixel((0, 0)) == (255, 255, 255)
+
+
+def test_buffer_pool_reuses_buffers():
+    """Released buffers are handed out again."""
+    pool = BufferPool()
+    first = pool.acquire()
+    pool.release(first)
+    assert pool.acquire() is first
+
+
+def test_buffer_pool_rejects_foreign_buffers():
+    """Buffers of the wrong shape cannot be released into the pool."""
+    with pytest.raises(ValueError):
+        BufferPool().release(np.empty((2, 224, 224, 3), dtype=np.float32))
+
+
+def test_oversized_header_rejected_before_decode():
+    """Images declaring more pixels than allowed raise without being decoded."""
+    buf = BytesIO()
+    Image.new("RGB", (400, 300)).save(buf, format="PNG")
+    buf.seek(0)
+    with pytest.raises(ImageTooLarge):
+        open_image(buf, max_pixels=100_000)
+
+
+def test_pixel_limit_applies_after_draft_reduction():
+    """A large JPEG is accepted when its reduced-scale decode fits the limit."""
+    img = open_image(jpeg_bytes((2000, 2000)), max_pixels=600_000)
+    assert img.size[0] * img.size[1] <= 600_000
+
+
+def test_model_sized_rgb_upload_skips_resampling():
+    """A 224x224 RGB image is returned as decoded, without a resize."""
+    img = Image.open(jpeg_bytes((224, 224)))
+    assert decode_image(img) is img
+    np.testing.assert_array_equal(
+        preprocess_into(jpeg_bytes((224, 224)))[0], np.asarray(Image.open(jpeg_bytes((224, 224)))) / np.float32(255)
+    )
+
+
+def test_model_sized_non_rgb_upload_still_converted():
+    """Only RGB inputs take the fast path; a 224x224 grayscale image is still expanded."""
+    assert decode_image(Image.new("L", (224, 224), 128)).mode == "RGB"
@@ -0,0 +1,37 @@
+"""Unit tests for the per-layer cost breakdown."""
+
+# Standard library
+import importlib
+
+# Third-party
+import numpy as np
+import pytest
+
+# Your own modules
+from model import load_model
+from profile_layers import add_shares, profile_model
+
+
+def test_serving_model_layers_are_all_profiled():
+    model = load_model("digit_model.h5", backend="keras")
+    rows = add_shares(profile_model(model, np.zeros((1, 224, 224, 3), dtype=np.float32), repeats=2))
+    assert [row["layer"] for row in rows] == [layer.name for layer in model.layers]
+    assert sum(row["params"] for row in rows) == model.count_params()
+    assert sum(row["time_share"] for row in rows) == pytest.approx(1.0, abs=1e-3)
+    assert all(row["seconds"] > 0 and row["activation_bytes"] > 0 for row in rows)
+
+
+def test_nested_model_layers_and_flop_counts():
+    keras = importlib.import_module("tensorflow").keras
+    base = keras.Sequential(
+        [keras.Input((8, 8, 3)), keras.layers.Conv2D(4, 3), keras.layers.DepthwiseConv2D(3)], name="base"
+    )
+    model = keras.Sequential([keras.Input((8, 8, 3)), base, keras.layers.GlobalAveragePooling2D(),
+                              keras.layers.Dense(2)])
+    rows = {row["layer"]: row for row in profile_model(model, np.ones((2, 8, 8, 3), dtype=np.float32), repeats=1)}
+    conv, depthwise = rows[f"base/{base.layers[0].name}"], rows[f"base/{base.layers[1].name}"]
+    assert conv["output_shape"] == [2, 6, 6, 4]
+    assert conv["flops"] == 2 * (2 * 6 * 6 * 4) * 3 * 3 * 3
+    assert depthwise["flops"] == 2 * (2 * 4 * 4 * 4) * 3 * 3
+    assert depthwise["activation_bytes"] == 2 * 4 * 4 * 4 * 4
+    assert rows[model.layers[-1].name]["flops"] == 2 * 2 * 2 * 4
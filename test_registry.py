@@ -0,0 +1,194 @@
+"""Unit tests for the model registry: hot swaps, candidate routing and LRU eviction."""
+
+# Standard library
+import threading
+import time
+
+# Third-party
+import pytest
+
+# Your own modules
+from loading import ModelNotReady
+from registry import ModelRegistry
+
+
+class StubModel:
+    """Stands in for a serving model and records whether it was closed."""
+
+    def __init__(self, path):
+        self.path = path
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class StubBuild:
+    """Build function whose loads can be held open, fail, or report a size."""
+
+    def __init__(self, nbytes=100):
+        self.nbytes = nbytes
+        self.gates = {}
+        self.failing = set()
+        self.calls = []
+
+    def __call__(self, version, loader):
+        self.calls.append(version.name)
+        gate = self.gates.get(version.name)
+        if gate is not None:
+            gate.wait(5)
+        if version.name in self.failing:
+            raise RuntimeError("broken model file")
+        version.nbytes = self.nbytes
+        return StubModel(version.path)
+
+
+def make_registry(build, budget=None, choose=None, names=("v1", "v2", "v3")):
+    registry = ModelRegistry(build, budget, choose or (lambda: 0.99))
+    for name in names:
+        registry.register(name, f"{name}.h5")
+    return registry
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.01)
+
+
+def test_first_activation_serves_while_loading():
+    build = StubBuild()
+    registry = make_registry(build)
+    registry.activate("v1", background=False)
+    assert registry.active.name == "v1"
+    assert registry.get().path == "v1.h5"
+
+
+def test_swap_happens_only_after_the_new_version_loaded():
+    build = StubBuild()
+    build.gates["v2"] = threading.Event()
+    registry = make_registry(build)
+    registry.activate("v1", background=False)
+
+    registry.activate("v2")
+    wait_for(lambda: "v2" in build.calls)
+    # v1 keeps serving while v2 loads
+    with registry.acquire() as version:
+        assert version.name == "v1"
+    build.gates["v2"].set()
+    wait_for(lambda: registry.active.name == "v2")
+    assert registry.get().path == "v2.h5"
+
+
+def test_failed_load_keeps_the_current_version():
+    build = StubBuild()
+    build.failing.add("v2")
+    registry = make_registry(build)
+    registry.activate("v1", background=False)
+    registry.activate("v2", background=False)
+    assert registry.active.name == "v1"
+    assert registry.status()["versions"]["v2"]["state"] == "failed"
+
+    # Activating again retries the load
+    build.failing.clear()
+    registry.activate("v2", background=False)
+    assert registry.active.name == "v2"
+
+
+def test_candidate_receives_its_share_of_traffic():
+    draws = iter([0.05, 0.5, 0.15, 0.95])
+    registry = make_registry(StubBuild(), choose=lambda: next(draws))
+    registry.activate("v1", background=False)
+    registry.set_candidate("v2", 0.2)
+    wait_for(lambda: registry.version("v2").ready)
+    picked = []
+    for _ in range(4):
+        with registry.acquire() as version:
+            picked.append(version.name)
+    assert picked == ["v2", "v1", "v2", "v1"]
+
+    registry.set_candidate(None, 0.0)
+    with registry.acquire() as version:
+        assert version.name == "v1"
+
+
+def test_candidate_share_must_be_a_fraction():
+    registry = make_registry(StubBuild())
+    with pytest.raises(ValueError):
+        registry.set_candidate("v2", 1.5)
+
+
+def test_least_recently_used_idle_version_is_evicted():
+    registry = make_registry(StubBuild(nbytes=100), budget=250)
+    registry.activate("v1", background=False)
+    registry.activate("v2", background=False)
+    old = registry.version("v1").loader.model
+    registry.activate("v3", background=False)
+
+    status = registry.status()
+    assert status["active"] == "v3"
+    assert status["versions"]["v1"]["state"] == "pending"
+    assert status["versions"]["v2"]["state"] == "ready"
+    assert status["resident_bytes"] == 200
+    assert status["evictions"] == 1
+    assert old.closed
+
+    # An evicted version loads again on demand
+    assert registry.version("v1").get().path == "v1.h5"
+
+
+def test_version_in_use_is_not_evicted():
+    registry = make_registry(StubBuild(nbytes=100), budget=100)
+    registry.activate("v1", background=False)
+    with registry.acquire() as held:
+        registry.activate("v2", background=False)
+        assert registry.active.name == "v2"
+        # The request that picked v1 before the swap finishes on it
+        assert held.name == "v1" and held.ready
+    assert registry.evict() == ["v1"]
+
+
+def test_register_conflicting_path_rejected():
+    registry = make_registry(StubBuild())
+    assert registry.register("v1", "v1.h5") is registry.version("v1")
+    with pytest.raises(ValueError):
+        registry.register("v1", "other.h5")
+    with pytest.raises(KeyError):
+        registry.version("missing")
+
+
+def test_acquire_without_active_version():
+    registry = make_registry(StubBuild())
+    with pytest.raises(ModelNotReady):
+        with registry.acquire():
+            pass
+
+
+def test_load_and_unload_hooks_see_every_reload():
+    events = []
+    registry = ModelRegistry(
+        StubBuild(nbytes=100), 150, on_loaded=lambda v: events.append(("loaded", v.name)),
+        on_unloaded=lambda v: events.append(("unloaded", v.name)),
+    )
+    for name in ("v1", "v2"):
+        registry.register(name, f"{name}.h5")
+    registry.activate("v1", background=False)
+    registry.activate("v2", background=False)
+    registry.version("v1").get()
+    assert events == [("loaded", "v1"), ("loaded", "v2"), ("unloaded", "v1"), ("loaded", "v1")]
+
+
+def test_pinned_version_is_not_evicted():
+    registry = make_registry(StubBuild(nbytes=100), budget=100)
+    registry.activate("v1", background=False)
+    registry.activate("v2", background=False)
+    with registry.acquire("v1") as pinned:
+        assert pinned.name == "v1"
+        pinned.get()
+        assert registry.evict() == []
+    assert registry.evict() == ["v1"]
+    with pytest.raises(KeyError):
+        with registry.acquire("missing"):
+            pass
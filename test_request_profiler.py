@@ -0,0 +1,37 @@
+"""Unit tests for the opt-in request profiler."""
+
+# Standard library
+import pstats
+
+# Your own modules
+from request_profiler import RequestProfiler
+
+
+def test_header_token_or_sampling_selects_requests(tmp_path):
+    profiler = RequestProfiler(str(tmp_path), sample_rate=0.25, token="secret", choose=iter([0.5, 0.1]).__next__)
+    assert profiler.wanted("secret")
+    assert not profiler.wanted("wrong")
+    assert profiler.wanted(None)
+    assert not RequestProfiler(str(tmp_path)).wanted("secret")
+
+
+def test_one_request_is_profiled_at_a_time(tmp_path):
+    profiler = RequestProfiler(str(tmp_path))
+    profile = profiler.start()
+    assert profiler.start() is None
+    profiler.discard(profile)
+    assert profiler.dumps() == []
+    profiler.discard(profiler.start())
+
+
+def test_saved_profile_is_readable_and_old_dumps_are_pruned(tmp_path):
+    profiler = RequestProfiler(str(tmp_path / "dumps"), max_dumps=2)
+    names = []
+    for _ in range(3):
+        profile = profiler.start()
+        sorted(range(1000), reverse=True)
+        names.append(profiler.stop(profile, "/prediction"))
+    assert names[0].endswith("-prediction.prof")
+    assert profiler.dumps() == names[1:]
+    stats = pstats.Stats(str(tmp_path / "dumps" / names[-1]))
+    assert any(func[2] == "<built-in method builtins.sorted>" for func in stats.stats)
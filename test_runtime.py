@@ -0,0 +1,62 @@
+"""Unit tests for thread-pool and CPU affinity configuration and the thread tuner."""
+
+# Standard library
+import os
+
+# Third-party
+import pytest
+
+# Your own modules
+from runtime import (
+    INTER_OP_ENV,
+    INTRA_OP_ENV,
+    apply_runtime_config,
+    available_cpus,
+    configured_intra_op_threads,
+    format_cpus,
+    parse_cpus,
+)
+from tune_threads import pick_best, tuned_settings
+
+
+def test_parse_and_format_cpus_round_trip():
+    assert parse_cpus("0-3,6, 8-9") == [0, 1, 2, 3, 6, 8, 9]
+    assert parse_cpus([2, 1, 2]) == [1, 2]
+    assert parse_cpus(None) is None
+    assert parse_cpus("") is None
+    assert format_cpus([9, 0, 1, 2, 3, 6, 8]) == "0-3,6,8-9"
+
+
+def test_apply_runtime_config_sets_thread_environment(monkeypatch):
+    monkeypatch.delenv(INTRA_OP_ENV, raising=False)
+    monkeypatch.delenv(INTER_OP_ENV, raising=False)
+    apply_runtime_config(intra_op_threads=3, inter_op_threads=None)
+    assert os.environ[INTRA_OP_ENV] == "3"
+    assert INTER_OP_ENV not in os.environ
+    assert configured_intra_op_threads() == 3
+
+
+@pytest.mark.skipif(not hasattr(os, "sched_setaffinity"), reason="needs sched_setaffinity")
+def test_apply_runtime_config_pins_process():
+    cpus = available_cpus()
+    try:
+        apply_runtime_config(cpus=cpus[:1])
+        assert available_cpus() == cpus[:1]
+    finally:
+        os.sched_setaffinity(0, cpus)
+
+
+def test_pick_best_prefers_low_p99_with_enough_throughput():
+    results = [
+        {"intra": 1, "inter": 1, "concurrency": 1, "cpus": None, "p99_ms": 2.0, "throughput": 50.0},
+        {"intra": 2, "inter": 1, "concurrency": 4, "cpus": "0-1", "p99_ms": 6.0, "throughput": 100.0},
+        {"intra": 2, "inter": 2, "concurrency": 4, "cpus": None, "p99_ms": 5.0, "throughput": 95.0},
+    ]
+    best = pick_best(results, min_throughput=0.9)
+    assert best is results[2]
+    assert tuned_settings(best) == {
+        "INFERENCE_INTRA_OP_THREADS": 2,
+        "INFERENCE_INTER_OP_THREADS": 2,
+        "ADMISSION_MAX_IN_FLIGHT": 4,
+    }
+    assert tuned_settings(results[1])["INFERENCE_CPUS"] == "0-1"
@@ -0,0 +1,39 @@
+"""Unit tests for the preprocessing configuration sweep."""
+
+# Third-party
+import numpy as np
+
+# Your own modules
+from preprocessing import preprocess_into
+from sweep_preprocess import preprocess_config, rank_results
+
+IMAGE = "test_images/2/Sign 2 (97).jpeg"
+
+
+def test_current_configuration_matches_preprocessing():
+    """The baseline configuration reproduces preprocess_into exactly."""
+    np.testing.assert_array_equal(preprocess_config(IMAGE, "bicubic", "auto", "float32"), preprocess_into(IMAGE)[0])
+
+
+def test_reduction_and_dtype_are_applied():
+    """Reduced decodes still produce a 224x224 image in the requested dtype."""
+    arr = preprocess_config(IMAGE, "bilinear", "4", "float16")
+    assert arr.shape == (224, 224, 3)
+    assert arr.dtype == np.float16
+    assert 0.0 <= arr.min() and arr.max() <= 1.0
+
+
+def result(accuracy, ms, predictions):
+    """Build a sweep result with the fields rank_results reads."""
+    return {"accuracy": accuracy, "preprocess_ms": {"median": ms}, "predictions": predictions}
+
+
+def test_ranking_puts_fast_configurations_within_tolerance_first():
+    """Fast but inaccurate configurations rank after slower acceptable ones."""
+    baseline = result(0.9, 5.0, [1, 2, 3, 4])
+    cheap_bad = result(0.5, 1.0, [1, 1, 1, 1])
+    cheap_good = result(0.895, 2.0, [1, 2, 3, 3])
+    ranked = rank_results([baseline, cheap_bad, cheap_good], baseline, tolerance=0.01)
+    assert ranked == [cheap_good, baseline, cheap_bad]
+    assert cheap_good["agreement"] == 0.75
+    assert not cheap_bad["within_tolerance"]
@@ -0,0 +1,27 @@
+"""Unit tests for the benchmark process helpers."""
+
+# Standard library
+import multiprocessing
+import os
+
+# Your own modules
+from sysinfo import child_result
+
+
+def test_child_result_returns_what_the_child_put():
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    proc = ctx.Process(target=results.put, args=({"accuracy": 1.0},))
+    proc.start()
+    assert child_result(proc, results, poll_interval=0.1) == {"accuracy": 1.0}
+    proc.join()
+
+
+def test_child_result_gives_up_when_the_child_dies():
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    proc = ctx.Process(target=os._exit, args=(3,))
+    proc.start()
+    assert child_result(proc, results, poll_interval=0.1) is None
+    proc.join()
+    assert proc.exitcode == 3
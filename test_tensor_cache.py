@@ -0,0 +1,67 @@
+"""Unit tests for the memory-mapped preprocessed tensor cache."""
+
+# Standard library
+import shutil
+
+# Third-party
+import numpy as np
+
+# Your own modules
+from preprocessing import preprocess_into
+from tensor_cache import TensorCache, build_cache, normalize_batch
+
+SOURCES = ("test_images/3/Sign 3 (122).jpeg", "test_images/6/Sign 6 (103).jpeg", "test_images/6/Sign 6 (117).jpeg")
+
+
+def make_tree(root):
+    """Copy three labelled images and one unreadable file under ``root``."""
+    for source in SOURCES:
+        label = source.split("/")[1]
+        (root / label).mkdir(parents=True, exist_ok=True)
+        shutil.copy(source, root / label)
+    (root / "6" / "broken.jpg").write_bytes(b"not an image")
+
+
+def test_cache_matches_preprocessing(tmp_path):
+    """Cached rows, once normalized, equal preprocess_into's output."""
+    make_tree(tmp_path / "images")
+    stats = build_cache(str(tmp_path / "images"), str(tmp_path / "cache"))
+    assert (stats["decoded"], stats["failed"]) == (3, 1)
+    cache = TensorCache(str(tmp_path / "cache"))
+    assert len(cache) == 3
+    assert cache.labels.tolist() == [3, 6, 6]
+    for row, path in enumerate(cache.paths):
+        np.testing.assert_array_equal(normalize_batch(cache.images[row:row + 1]), preprocess_into(path))
+
+
+def test_rebuild_only_decodes_changed_files(tmp_path):
+    """Unchanged files are reused, and a replaced file is decoded again."""
+    make_tree(tmp_path / "images")
+    build_cache(str(tmp_path / "images"), str(tmp_path / "cache"))
+    assert build_cache(str(tmp_path / "images"), str(tmp_path / "cache"))["decoded"] == 0
+    shutil.copy("test_images/0/Sign 0 (116).jpeg", tmp_path / "images" / "6" / "Sign 6 (117).jpeg")
+    stats = build_cache(str(tmp_path / "images"), str(tmp_path / "cache"))
+    assert (stats["reused"], stats["decoded"]) == (2, 1)
+    cache = TensorCache(str(tmp_path / "cache"))
+    row = cache.paths.index(str(tmp_path / "images" / "6" / "Sign 6 (117).jpeg"))
+    np.testing.assert_array_equal(
+        normalize_batch(cache.images[row:row + 1]), preprocess_into("test_images/0/Sign 0 (116).jpeg")
+    )
+
+
+def test_changed_parameters_rebuild_everything(tmp_path):
+    """A different resample filter invalidates every cached row."""
+    make_tree(tmp_path / "images")
+    build_cache(str(tmp_path / "images"), str(tmp_path / "cache"))
+    stats = build_cache(str(tmp_path / "images"), str(tmp_path / "cache"), resample="bilinear")
+    assert (stats["reused"], stats["decoded"]) == (0, 3)
+
+
+def test_batches_are_views_of_the_mapped_file(tmp_path):
+    """Batches slice the memory map instead of copying it."""
+    make_tree(tmp_path / "images")
+    build_cache(str(tmp_path / "images"), str(tmp_path / "cache"))
+    cache = TensorCache(str(tmp_path / "cache"))
+    batches = list(cache.batches(2))
+    assert [len(images) for images, _ in batches] == [2, 1]
+    assert all(np.shares_memory(images, cache.images) for images, _ in batches)
@@ -0,0 +1,49 @@
+"""Unit tests for the multi-process inference worker pool."""
+
+# Third-party
+import numpy as np
+import pytest
+
+# Your own modules
+from model import load_model, preprocess_images
+from workers import WorkerPool
+
+IMAGE_PATHS = ["test_images/1/Sign 1 (8).jpeg", "test_images/3/Sign 3 (122).jpeg", "test_images/8/Sign 8 (100).jpeg"]
+
+
+@pytest.fixture(scope="module")
+def pool():
+    """Start a two-process pool once for the module."""
+    worker_pool = WorkerPool("digit_model.h5", num_workers=2, max_batch_size=2, compiled=False).start()
+    yield worker_pool
+    worker_pool.close()
+
+
+def test_pool_matches_in_process_model(pool):
+    """Workers return the same probabilities as the model loaded in-process."""
+    images, _, _ = preprocess_images(IMAGE_PATHS)
+    expected = load_model("digit_model.h5").predict(images)
+    np.testing.assert_allclose(pool.predict(images), expected, atol=1e-5)
+
+
+def test_pool_chunks_batches_larger_than_buffer(pool):
+    """Batches larger than max_batch_size are split across handoffs."""
+    images, _, _ = preprocess_images(IMAGE_PATHS * 3)
+    assert pool.predict(images).shape == (9, 10)
+
+
+def test_crashed_worker_is_restarted(pool):
+    """Killing a worker process costs a restart, not a failed request."""
+    images, _, _ = preprocess_images(IMAGE_PATHS[:1])
+    for worker in pool._workers:  # pylint: disable=protected-access
+        worker.process.kill()
+        worker.process.join()
+    assert pool.predict(images).shape == (1, 10)
+    stats = pool.stats()
+    assert sum(w["restarts"] for w in stats["per_worker"]) >= 1
+
+
+def test_pool_requires_a_worker():
+    """A pool without workers is refused."""
+    with pytest.raises(ValueError):
+        WorkerPool("digit_model.h5", num_workers=0)
@@ -0,0 +1,175 @@
+"""Find the inference thread and concurrency settings with the best latency on this host.
+
+Every combination of TensorFlow intra-op threads, inter-op threads, request
+concurrency (callers running predict_result at once, the setting applied as
+ADMISSION_MAX_IN_FLIGHT) and, with --pin, CPU pinning is measured in a fresh
+interpreter on representative images from the labelled folder. The CPUs are
+split evenly between --workers-per-host serving processes, and one process's
+share is what each configuration may use. Among the configurations reaching
+--min-throughput of the best throughput, the one with the lowest p99
+latency wins and is written to tuned_config.json, which the app loads at
+startup (FLASK_-prefixed environment variables still take precedence).
+
+Usage:
+    python tune_threads.py [--model digit_model.h5] [--images test_images]
+        [--workers-per-host 1] [--intra 1,2,4] [--inter 1,2] [--concurrency 1,2,4,8]
+        [--pin] [--requests 200] [--output tuned_config.json] [--report tuning_report.json]
+"""
+
+# Standard library
+import argparse
+import itertools
+import json
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Your own modules
+from runtime import available_cpus, format_cpus
+
+CHILD_FLAG = "--child"
+
+
+def representative_images(image_root):
+    """Preprocess one image per label, so every class is represented."""
+    # pylint: disable=import-outside-toplevel
+    from datasets import list_labelled_images
+    from model import preprocess_images
+
+    paths = {label: path for path, label in list_labelled_images(image_root)}
+    images, _, _ = preprocess_images(list(paths.values()))
+    return images
+
+
+def measure(config, model_path, image_root, requests):
+    """Apply one configuration and time ``requests`` predict_result calls.
+
+    Args:
+        config (dict): ``intra``, ``inter``, ``concurrency`` and ``cpus``.
+        model_path (str): Model file to serve.
+        image_root (str): Labelled image folder to draw requests from.
+        requests (int): Number of timed calls.
+
+    Returns:
+        dict: p50 and p99 latency in milliseconds and requests per second.
+    """
+    # pylint: disable=import-outside-toplevel
+    from runtime import apply_runtime_config, configure_tensorflow
+
+    apply_runtime_config(config["intra"], config["inter"], config["cpus"])
+    configure_tensorflow()
+
+    from classify_dir import load_serving_model
+    from model import predict_result
+
+    serving_model = load_serving_model(model_path)
+    images = representative_images(image_root)
+
+    def call(i):
+        started = time.perf_counter()
+        predict_result(serving_model, images[i % len(images)][None])
+        return time.perf_counter() - started
+
+    with ThreadPoolExecutor(config["concurrency"]) as executor:
+        list(executor.map(call, range(config["concurrency"] * 2)))
+        started = time.perf_counter()
+        latencies = list(executor.map(call, range(requests)))
+    elapsed = time.perf_counter() - started
+    return {
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "p99_ms": round(statistics.quantiles(latencies, n=100)[98] * 1000, 3),
+        "throughput": round(requests / elapsed, 2),
+    }
+
+
+def run_child(config, args):
+    """Run measure in a fresh interpreter, since thread pools are fixed once TensorFlow starts."""
+    output = subprocess.run(
+        [sys.executable, __file__, CHILD_FLAG, json.dumps([config, args.model, args.images, args.requests])],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def candidate_configs(args, cpus):
+    """Return every configuration to measure for a process owning ``cpus``."""
+    cores = len(cpus)
+    if args.intra:
+        intra = [int(v) for v in args.intra.split(",") if v]
+    else:
+        intra = sorted({n for n in (1, 2, 4, 8) if n <= cores} | {cores})
+    inter = [int(v) for v in args.inter.split(",") if v]
+    concurrency = [int(v) for v in args.concurrency.split(",") if v]
+    pinning = [None, format_cpus(cpus)] if args.pin else [None]
+    return [
+        {"intra": a, "inter": b, "concurrency": c, "cpus": p}
+        for a, b, c, p in itertools.product(intra, inter, concurrency, pinning)
+    ]
+
+
+def pick_best(results, min_throughput):
+    """Return the lowest-p99 result among those within ``min_throughput`` of the best throughput."""
+    best_throughput = max(r["throughput"] for r in results)
+    eligible = [r for r in results if r["throughput"] >= min_throughput * best_throughput]
+    return min(eligible, key=lambda r: (r["p99_ms"], -r["throughput"]))
+
+
+def tuned_settings(best):
+    """Translate a winning configuration into app config keys."""
+    settings = {
+        "INFERENCE_INTRA_OP_THREADS": best["intra"],
+        "INFERENCE_INTER_OP_THREADS": best["inter"],
+        "ADMISSION_MAX_IN_FLIGHT": best["concurrency"],
+    }
+    if best["cpus"]:
+        settings["INFERENCE_CPUS"] = best["cpus"]
+    return settings
+
+
+def main():
+    """Measure every configuration, print the table and write the winner."""
+    if len(sys.argv) == 3 and sys.argv[1] == CHILD_FLAG:
+        print(json.dumps(measure(*json.loads(sys.argv[2]))))
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="digit_model.h5", help="Model file to serve")
+    parser.add_argument("--images", default="test_images", help="Directory of <label>/<image> files")
+    parser.add_argument("--workers-per-host", type=int, default=1, help="Serving processes sharing this host")
+    parser.add_argument("--intra", default=None, help="Comma-separated intra-op thread counts")
+    parser.add_argument("--inter", default="1,2", help="Comma-separated inter-op thread counts")
+    parser.add_argument("--concurrency", default="1,2,4,8", help="Comma-separated concurrent request counts")
+    parser.add_argument("--pin", action="store_true", help="Also try pinning to one process's share of CPUs")
+    parser.add_argument("--requests", type=int, default=200, help="Timed requests per configuration")
+    parser.add_argument("--min-throughput", type=float, default=0.9,
+                        help="Share of the best throughput a configuration must reach to be picked")
+    parser.add_argument("--output", default="tuned_config.json", help="Where to write the chosen settings")
+    parser.add_argument("--report", default="tuning_report.json", help="Where to write every measurement")
+    args = parser.parse_args()
+
+    cpus = available_cpus()
+    share = max(len(cpus) // args.workers_per_host, 1)
+    cpu_sets = [format_cpus(cpus[i * share:(i + 1) * share]) for i in range(args.workers_per_host)]
+    results = []
+    print(f"{'intra':>6}{'inter':>6}{'conc':>6}{'cpus':>10}{'p50 ms':>10}{'p99 ms':>10}{'req/s':>10}")
+    for config in candidate_configs(args, cpus[:share]):
+        result = {**config, **run_child(config, args)}
+        results.append(result)
+        print(f"{config['intra']:>6}{config['inter']:>6}{config['concurrency']:>6}{config['cpus'] or 'all':>10}"
+              f"{result['p50_ms']:>10.2f}{result['p99_ms']:>10.2f}{result['throughput']:>10.1f}")
+
+    best = pick_best(results, args.min_throughput)
+    settings = tuned_settings(best)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(settings, f, indent=1)
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump({"cpus": format_cpus(cpus), "cpu_sets": cpu_sets, "best": best, "results": results}, f, indent=1)
+    print(f"Best: {settings} -> {args.output}")
+    if best["cpus"] and args.workers_per_host > 1:
+        print(f"Start each serving process with its own FLASK_INFERENCE_CPUS from: {', '.join(cpu_sets)}")
+
+
+if __name__ == "__main__":
+    main()
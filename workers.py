@@ -0,0 +1,217 @@
+"""Multi-process inference with shared-memory tensor handoff."""
+
+# Standard library
+import importlib
+import multiprocessing
+import queue
+import threading
+
+# Third-party
+import numpy as np
+
+# Your own modules
+from backends import backend_for_path
+from model import load_model
+from runtime import configure_tensorflow
+
+IMAGE_SHAPE = (224, 224, 3)
+
+
+class WorkerCrashed(RuntimeError):
+    """Raised when a worker process dies and the retry on a fresh worker fails too."""
+
+
+def _worker_main(model_spec, buffer, max_batch_size, conn):
+    """Serve predictions from one process until the parent closes the pipe."""
+    model_path, backend, compiled = model_spec
+    images = np.frombuffer(buffer, dtype=np.float32).reshape(max_batch_size, *IMAGE_SHAPE)
+    # Thread counts and CPU affinity are inherited from the parent
+    if backend == "keras":
+        configure_tensorflow()
+    serving_model = load_model(model_path, backend)
+    if compiled and backend == "keras":
+        serving_model = importlib.import_module("engine").InferenceEngine(serving_model)
+    conn.send(("ready", None))
+    while True:
+        try:
+            count = conn.recv()
+        except EOFError:
+            return
+        try:
+            conn.send(("ok", np.asarray(serving_model.predict(images[:count]), dtype=np.float32)))
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            # Report model errors to the caller instead of dying
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+class _Worker:
+    """One worker process, its pipe and the shared input buffer it reads from."""
+
+    def __init__(self, ctx, index, max_batch_size, model_spec):
+        self.index = index
+        self.buffer = ctx.RawArray("f", max_batch_size * int(np.prod(IMAGE_SHAPE)))
+        self.images = np.frombuffer(self.buffer, dtype=np.float32).reshape(max_batch_size, *IMAGE_SHAPE)
+        self._ctx = ctx
+        self._max_batch_size = max_batch_size
+        self._model_spec = model_spec
+        self.process = None
+        self.conn = None
+        self.requests = 0
+        self.restarts = 0
+
+    def spawn(self, timeout):
+        """Start the process and wait until it has loaded the model."""
+        parent, child = self._ctx.Pipe()
+        self.process = self._ctx.Process(
+            target=_worker_main,
+            args=(self._model_spec, self.buffer, self._max_batch_size, child),
+            name=f"inference-worker-{self.index}",
+            daemon=True,
+        )
+        self.process.start()
+        child.close()
+        self.conn = parent
+        status, _ = self.receive(timeout)
+        if status != "ready":
+            raise WorkerCrashed(f"Worker {self.index} failed to start")
+
+    def receive(self, timeout):
+        """Wait for the next message, raising WorkerCrashed if the process dies."""
+        waited = 0.0
+        while not self.conn.poll(0.1):
+            waited += 0.1
+            if not self.process.is_alive() or (timeout is not None and waited >= timeout):
+                raise WorkerCrashed(f"Worker {self.index} stopped responding")
+        try:
+            return self.conn.recv()
+        except (EOFError, OSError) as e:
+            raise WorkerCrashed(f"Worker {self.index} died") from e
+
+    def stop(self):
+        """Close the pipe and terminate the process."""
+        if self.conn is not None:
+            self.conn.close()
+        if self.process is not None:
+            self.process.join(timeout=5)
+            if self.process.is_alive():
+                self.process.terminate()
+
+
+class WorkerPool:
+    """Run inference in several processes, each holding its own model copy.
+
+    Images are written into a per-worker shared buffer and only the batch
+    size crosses the pipe, so tensors are never pickled. A worker that dies
+    is restarted and the request retried once on the fresh process.
+
+    Args:
+        model_path (str): Model file each worker loads.
+        num_workers (int): Number of worker processes.
+        max_batch_size (int): Largest batch handed to one worker at once.
+        backend (str): Backend name, or None to pick one from the extension.
+        compiled (bool): Whether Keras workers use the compiled engine.
+        timeout (float): Seconds to wait for a worker to start or answer.
+    """
+
+    def __init__(self, model_path, num_workers=2, *, max_batch_size=32, backend=None, compiled=True, timeout=120.0):
+        if num_workers < 1:
+            raise ValueError("num_workers must be at least 1")
+        self.max_batch_size = max_batch_size
+        self.timeout = timeout
+        ctx = multiprocessing.get_context("spawn")
+        model_spec = (model_path, backend or backend_for_path(model_path), compiled)
+        self._workers = [_Worker(ctx, i, max_batch_size, model_spec) for i in range(num_workers)]
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start every worker and wait until all have loaded the model.
+
+        Returns:
+            WorkerPool: The started pool.
+        """
+        errors = []
+
+        def spawn(worker):
+            try:
+                worker.spawn(self.timeout)
+            except WorkerCrashed as e:
+                errors.append(e)
+
+        # Workers import TensorFlow and load the model in parallel
+        threads = [threading.Thread(target=spawn, args=(worker,)) for worker in self._workers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            self.close()
+            raise errors[0]
+        for worker in self._workers:
+            self._idle.put(worker)
+        return self
+
+    def predict(self, images):
+        """Predict class probabilities on the next idle worker.
+
+        Args:
+            images (np.ndarray): Preprocessed images of shape (N, 224, 224, 3).
+
+        Returns:
+            np.ndarray: Class probabilities of shape (N, num_classes).
+        """
+        images = np.asarray(images, dtype=np.float32).reshape(-1, *IMAGE_SHAPE)
+        chunks = [
+            self._predict_chunk(images[start:start + self.max_batch_size])
+            for start in range(0, len(images), self.max_batch_size)
+        ]
+        return np.concatenate(chunks) if chunks else np.empty((0, 0), dtype=np.float32)
+
+    def close(self):
+        """Stop every worker process."""
+        for worker in self._workers:
+            worker.stop()
+
+    def stats(self):
+        """Return per-worker request and restart counts.
+
+        Returns:
+            dict: Worker count and per-worker counters.
+        """
+        return {
+            "workers": len(self._workers),
+            "per_worker": [
+                {"requests": w.requests, "restarts": w.restarts, "alive": bool(w.process and w.process.is_alive())}
+                for w in self._workers
+            ],
+        }
+
+    def _predict_chunk(self, images):
+        worker = self._idle.get()
+        try:
+            try:
+                return self._handoff(worker, images)
+            except WorkerCrashed:
+                self._restart(worker)
+                return self._handoff(worker, images)
+        finally:
+            self._idle.put(worker)
+
+    def _handoff(self, worker, images):
+        count = len(images)
+        worker.images[:count] = images
+        try:
+            worker.conn.send(count)
+        except (BrokenPipeError, OSError) as e:
+            raise WorkerCrashed(f"Worker {worker.index} died") from e
+        status, payload = worker.receive(self.timeout)
+        worker.requests += 1
+        if status == "error":
+            raise RuntimeError(payload)
+        return payload
+
+    def _restart(self, worker):
+        with self._lock:
+            worker.stop()
+            worker.restarts += 1
+            worker.spawn(self.timeout)